@@ -0,0 +1,196 @@
+# backend/arima/backtest.py
+import os
+import sys
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from concurrent.futures import as_completed
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+warnings.filterwarnings('ignore')
+
+HORIZON = 6                 # aujourd'hui + 5 jours, comme predict_close
+MIN_TRAIN = 30              # taille minimale de la fenêtre d'entraînement
+BACKTEST_LOOKBACK_DAYS = 5 * 365
+BACKTEST_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "backtests")
+
+
+def walk_forward_forecasts(closes, order, params, origins, horizon=HORIZON):
+    """
+    Prévisions 1..horizon pas depuis plusieurs origines, paramètres fixes
+
+    Un seul filtrage de Kalman sur toute la série, puis propagation
+    vectorisée des états prédits a(t|t-1) de toutes les origines:
+        y(t+h-1) = Z a + d,   a ← T a + c
+
+    Args:
+        closes (ndarray): Série complète
+        order (tuple): Ordre ARIMA
+        params (ndarray): Paramètres estimés (sans regard sur le futur)
+        origins (ndarray): Indices t du premier point prédit (données < t)
+
+    Returns:
+        ndarray: (len(origins), horizon) prévisions
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+
+    fr = ARIMA(closes, order=order).filter(params).filter_results
+    Z = fr.design[:, :, 0]
+    T = fr.transition[:, :, 0]
+    d = fr.obs_intercept[:, 0][:, None]
+    c = fr.state_intercept[:, 0][:, None]
+
+    states = fr.predicted_state[:, origins]
+    forecasts = np.empty((horizon, len(origins)))
+    for h in range(horizon):
+        forecasts[h] = (Z @ states + d)[0]
+        states = T @ states + c
+
+    return forecasts.T
+
+
+def backtest_series(closes, order, horizon=HORIZON, train_size=None, refit_every=None):
+    """
+    Backtest walk-forward d'une série
+
+    Args:
+        closes (ndarray): Prix de clôture triés
+        order (tuple): Ordre ARIMA
+        train_size (int): Première origine (défaut: 60% de la série)
+        refit_every (int): Ré-estimation tous les N pas (défaut: une seule fois)
+
+    Returns:
+        tuple: (origins, forecasts (n_origins × horizon))
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+
+    n = len(closes)
+    train_size = max(MIN_TRAIN, train_size or int(n * 0.6))
+    if train_size >= n:
+        raise ValueError(f"Série trop courte ({n} points, besoin > {train_size})")
+
+    block = refit_every or n
+    all_origins, all_forecasts = [], []
+
+    for start in range(train_size, n, block):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            params = ARIMA(closes[:start], order=order).fit().params
+        origins = np.arange(start, min(start + block, n))
+        all_origins.append(origins)
+        all_forecasts.append(walk_forward_forecasts(closes, order, params, origins, horizon))
+
+    return np.concatenate(all_origins), np.vstack(all_forecasts)
+
+
+def _backtest_symbol(symbol, dates, closes, order, horizon, train_size, refit_every):
+    """Exécuté dans un worker: table de résultats pour un symbole"""
+    start = time.perf_counter()
+    origins, forecasts = backtest_series(closes, order, horizon, train_size, refit_every)
+
+    # Table longue: une ligne par (origine, horizon) avec une valeur observée
+    h = np.arange(1, horizon + 1)
+    targets = origins[:, None] + h[None, :] - 1
+    valid = targets < len(closes)
+    rows_origin = np.broadcast_to(origins[:, None], targets.shape)[valid]
+    rows_target = targets[valid]
+
+    table = pd.DataFrame({
+        "symbol": symbol,
+        "order": str(tuple(order)),
+        "origin_date": pd.DatetimeIndex(dates[rows_origin - 1]),
+        "target_date": pd.DatetimeIndex(dates[rows_target]),
+        "horizon": np.broadcast_to(h[None, :], targets.shape)[valid].astype(np.int8),
+        "forecast": forecasts[valid].astype(np.float32),
+        "actual": closes[rows_target].astype(np.float32),
+    })
+    table["error"] = table["forecast"] - table["actual"]
+
+    return symbol, table, time.perf_counter() - start
+
+
+def summarize(table):
+    """RMSE / MAE / MAPE par symbole et horizon"""
+    t = table.copy()
+    t["abs_error"] = t["error"].abs()
+    t["sq_error"] = t["error"] ** 2
+    t["ape"] = t["abs_error"] / t["actual"].abs() * 100
+
+    summary = t.groupby(["symbol", "horizon"]).agg(
+        n=("error", "size"),
+        rmse=("sq_error", lambda s: float(np.sqrt(s.mean()))),
+        mae=("abs_error", "mean"),
+        mape=("ape", "mean"),
+    )
+    return summary.round(4)
+
+
+def run_backtest(histories, orders=None, horizon=HORIZON, train_size=None, refit_every=None, save=True):
+    """
+    Backtest de tous les symboles en parallèle (pool de process partagé)
+
+    Args:
+        histories (dict): {symbol: DataFrame avec colonne 'close'}
+        orders (dict): {symbol: order} (défaut: ordre retenu par symbole)
+
+    Returns:
+        tuple: (table détaillée, résumé)
+    """
+    from arima.batch_predict import get_process_pool
+    from arima.order_selection import get_order
+
+    orders = orders or {}
+    pool = get_process_pool()
+    futures = {}
+
+    for symbol, df in histories.items():
+        df = df.sort_index()
+        order = tuple(orders.get(symbol) or get_order(symbol))
+        futures[pool.submit(
+            _backtest_symbol, symbol, df.index.to_numpy(), df['close'].to_numpy(dtype=np.float64),
+            order, horizon, train_size, refit_every
+        )] = symbol
+
+    tables = []
+    for future in as_completed(futures):
+        symbol = futures[future]
+        try:
+            _, table, elapsed = future.result()
+            tables.append(table)
+            print(f"✅ Backtest {symbol}: {table['origin_date'].nunique()} origines en {elapsed:.2f}s")
+        except Exception as e:
+            print(f"❌ Backtest {symbol}: {e}")
+
+    if not tables:
+        return pd.DataFrame(), pd.DataFrame()
+
+    table = pd.concat(tables, ignore_index=True)
+    summary = summarize(table)
+
+    if save:
+        os.makedirs(BACKTEST_DIR, exist_ok=True)
+        stamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
+        table.to_csv(os.path.join(BACKTEST_DIR, f"backtest_{stamp}.csv.gz"), index=False, compression="gzip")
+        summary.to_csv(os.path.join(BACKTEST_DIR, f"summary_{stamp}.csv"))
+        print(f"💾 Résultats écrits dans {BACKTEST_DIR}")
+
+    return table, summary
+
+
+if __name__ == "__main__":
+    # python -m arima.backtest [SYMBOLS...]
+    from influxdb_client_local import get_closes_matrix
+
+    symbols = sys.argv[1:] or ["AAPL", "MSFT", "GOOGL", "AMZN", "TSLA",
+                               "META", "NVDA", "NFLX", "JPM", "V"]
+    matrix = get_closes_matrix(symbols, lookback_days=BACKTEST_LOOKBACK_DAYS, fill=None)
+    histories = {}
+    for symbol in matrix.columns:
+        df = matrix[[symbol]].dropna().rename(columns={symbol: 'close'})
+        if len(df) > MIN_TRAIN:
+            histories[symbol] = df
+
+    table, summary = run_backtest(histories)
+    print(summary.to_string())
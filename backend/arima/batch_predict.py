@@ -0,0 +1,205 @@
+# backend/arima/batch_predict.py
+import os
+import sys
+import time
+import atexit
+import threading
+import multiprocessing
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+# Un worker par cœur: les fits statsmodels sont CPU-bound et tiennent le GIL
+BATCH_MAX_WORKERS = os.cpu_count() or 1
+BATCH_FIT_TIMEOUT = 300     # secondes sans aucun fit terminé: workers bloqués, les fits en cours échouent
+
+# Jamais fork depuis le serveur multi-thread: un verrou (spans, métriques)
+# tenu par un autre thread au moment du fork bloquerait le worker
+BATCH_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_process_pool():
+    """Pool de process partagé (créé au premier batch)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=BATCH_MAX_WORKERS,
+                                        mp_context=multiprocessing.get_context(BATCH_START_METHOD))
+            print(f"⚙️ Pool ARIMA démarré ({BATCH_MAX_WORKERS} workers, {BATCH_START_METHOD})")
+        return _pool
+
+def discard_process_pool(pool):
+    """
+    Abandonne un pool dont les workers ne répondent plus
+    Workers arrêtés de force, le prochain appel à get_process_pool() en recrée un.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    # Pas d'API publique pour arrêter un worker bloqué (Python < 3.14)
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+    print("⚠️ Pool ARIMA abandonné (workers sans réponse)")
+
+def shutdown_process_pool():
+    """Arrête le pool (appelé à l'arrêt de l'API)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+atexit.register(shutdown_process_pool)
+
+def _fit_and_forecast(symbol, dates, closes, state=None, order=None):
+    """
+    Exécuté dans un process worker: entraîne (ou met à jour) ARIMA et prédit 6 jours
+
+    Returns:
+        tuple: (symbol, forecasts, state, secondes de fit)
+    """
+    from arima.predict_arima import train_with_fallback
+
+    start = time.perf_counter()
+    df = pd.DataFrame({'close': closes}, index=pd.DatetimeIndex(dates, name='date'))
+    model, state = train_with_fallback(df, state, order)
+    forecasts = model.forecast(steps=6)
+
+    return symbol, [float(v) for v in forecasts], state, time.perf_counter() - start
+
+def _load_history(symbol, today):
+    """Garantit 30 jours et prépare l'historique (sans aujourd'hui)"""
+    from fetch_api import fetch_and_ensure_30_days
+
+    df = fetch_and_ensure_30_days(symbol, min_days=30)
+    if df.empty or len(df) < 30:
+        raise ValueError(f"Données insuffisantes ({len(df) if not df.empty else 0} jours, besoin 30+)")
+
+    df = df[df.index.date < today.date()]
+    return df.sort_index()
+
+def _load_histories(symbols, today, min_days=30):
+    """
+    Historiques de plusieurs symboles: une requête groupée, puis
+    fetch_and_ensure_30_days seulement pour les symboles incomplets
+
+    Returns:
+        tuple: (histories {symbol: DataFrame}, errors {symbol: message})
+    """
+    from influxdb_client_local import get_closes_matrix
+
+    matrix = get_closes_matrix(symbols, fill=None)
+    histories, errors = {}, {}
+
+    for symbol in symbols:
+        try:
+            if symbol in matrix and matrix[symbol].count() >= min_days:
+                df = matrix[[symbol]].dropna().rename(columns={symbol: 'close'})
+                histories[symbol] = df[df.index.date < today.date()]
+            else:
+                histories[symbol] = _load_history(symbol, today)
+        except Exception as e:
+            print(f"❌ {symbol}: {e}")
+            errors[symbol] = str(e)
+
+    return histories, errors
+
+def predict_batch(symbols, use_cache=True, concurrency=None):
+    """
+    Prédictions pour plusieurs symboles, fits ARIMA en parallèle
+
+    Args:
+        use_cache (bool): Servir depuis le cache mémoire si possible
+        concurrency (int): Fits simultanés au plus (défaut: un par worker)
+
+    1. Cache mémoire (si use_cache)
+    2. Chargement des historiques (une requête InfluxDB pour tous)
+    3. Fits répartis sur le pool de process
+    4. Stockage + résultat au fil de l'eau
+
+    Yields:
+        dict: Résultat par symbole (même format que predict_close), ou
+              {"error": True, "symbol": ..., "message": ...} en cas d'échec
+    """
+    from forecast_cache import forecast_cache
+    from arima.predict_arima import store_forecasts
+    from arima.model_store import model_store
+    from arima.order_selection import get_order
+    from metrics import ARIMA_FIT_SECONDS
+
+    today = pd.Timestamp.now().normalize()
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+
+    print(f"\n📦 BATCH: {len(symbols)} symboles")
+
+    # ===== 1. CACHE MÉMOIRE =====
+    pending = []
+    for symbol in symbols:
+        cached = forecast_cache.get(symbol) if use_cache else None
+        if cached is not None:
+            cached["source"] = "memory_cache"
+            cached["cache_hit"] = True
+            yield cached
+        else:
+            pending.append(symbol)
+
+    if not pending:
+        return
+
+    # ===== 2. HISTORIQUES =====
+    histories, errors = _load_histories(pending, today)
+    for symbol, message in errors.items():
+        yield {"error": True, "symbol": symbol, "message": message}
+
+    # ===== 3. FITS PARALLÈLES (au plus `concurrency` en cours) =====
+    pool = get_process_pool()
+    concurrency = max(1, concurrency or BATCH_MAX_WORKERS)
+    queued = list(histories.items())
+    running = {}
+
+    def submit_next():
+        symbol, df = queued.pop(0)
+        future = pool.submit(_fit_and_forecast, symbol, df.index.to_numpy(), df['close'].to_numpy(),
+                             model_store.get(symbol), get_order(symbol))
+        running[future] = symbol
+
+    while queued and len(running) < concurrency:
+        submit_next()
+
+    # ===== 4. RÉSULTATS AU FIL DE L'EAU =====
+    while running:
+        done, _ = wait(running, timeout=BATCH_FIT_TIMEOUT, return_when=FIRST_COMPLETED)
+        if not done:
+            # Aucun fit terminé à temps: les fits en cours échouent, les suivants
+            # partent sur un nouveau pool
+            discard_process_pool(pool)
+            for symbol in running.values():
+                yield {"error": True, "symbol": symbol,
+                       "message": f"Erreur prédiction: fit sans réponse après {BATCH_FIT_TIMEOUT}s"}
+            running.clear()
+            pool = get_process_pool()
+            while queued and len(running) < concurrency:
+                submit_next()
+            continue
+
+        for future in done:
+            symbol = running.pop(future)
+            if queued:
+                submit_next()
+            try:
+                _, forecasts, state, elapsed = future.result()
+                ARIMA_FIT_SECONDS.observe(elapsed, order=str(state["order"]), kind="batch")
+                model_store.put(symbol, state)
+                result = store_forecasts(symbol, histories[symbol], forecasts, state["order"], today)
+                result["fit_seconds"] = round(elapsed, 3)
+                yield result
+            except Exception as e:
+                print(f"❌ Erreur batch {symbol}: {e}")
+                yield {"error": True, "symbol": symbol, "message": f"Erreur prédiction: {str(e)}"}
+
+    print(f"✅ BATCH terminé: {len(symbols)} symboles")
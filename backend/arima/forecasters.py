@@ -0,0 +1,141 @@
+# backend/arima/forecasters.py
+import time
+import threading
+from abc import ABC, abstractmethod
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from tracing import traced
+
+HORIZON = 6                     # aujourd'hui + 5 jours
+PREDICT_LATENCY_BUDGET_MS = 1500
+
+
+class Forecaster(ABC):
+    """
+    Interface commune des modèles de prévision
+
+    forecast(df, steps) → (prévisions ndarray, meta dict)
+    meta contient au minimum "model" (libellé affiché) et "tier".
+    """
+
+    name = "base"
+    tier = "fast"
+
+    @abstractmethod
+    def forecast(self, df, steps=HORIZON, **context):
+        ...
+
+
+class ARForecaster(Forecaster):
+    """AR(p) estimé par moindres carrés sur les variations de clôture (NumPy pur)"""
+
+    name = "ar"
+    tier = "fast"
+
+    def __init__(self, p=5):
+        self.p = p
+
+    @traced("fast.ar")
+    def forecast(self, df, steps=HORIZON, **context):
+        closes = df['close'].to_numpy(dtype=np.float64)
+        dy = np.diff(closes)
+        p = max(1, min(self.p, len(dy) // 4))
+
+        # dy[t] = c + φ1 dy[t-1] + ... + φp dy[t-p]
+        lags = sliding_window_view(dy, p)[:-1, ::-1]
+        X = np.column_stack([np.ones(len(lags)), lags])
+        coef, *_ = np.linalg.lstsq(X, dy[p:], rcond=None)
+
+        history = list(dy[-p:][::-1])
+        out = np.empty(steps)
+        level = closes[-1]
+        for h in range(steps):
+            step = coef[0] + np.dot(coef[1:], history[:p])
+            level += step
+            out[h] = level
+            history.insert(0, step)
+
+        return out, {"model": f"AR({p})", "tier": self.tier}
+
+
+class HoltForecaster(Forecaster):
+    """Lissage exponentiel de Holt (niveau + tendance)"""
+
+    name = "holt"
+    tier = "fast"
+
+    def __init__(self, alpha=0.5, beta=0.1):
+        self.alpha = alpha
+        self.beta = beta
+
+    @traced("fast.holt")
+    def forecast(self, df, steps=HORIZON, **context):
+        closes = df['close'].to_numpy(dtype=np.float64)
+        a, b = self.alpha, self.beta
+        level, trend = closes[0], closes[1] - closes[0]
+
+        for y in closes[1:]:
+            previous = level
+            level = a * y + (1 - a) * (level + trend)
+            trend = b * (level - previous) + (1 - b) * trend
+
+        out = level + trend * np.arange(1, steps + 1)
+        return out, {"model": "Holt", "tier": self.tier}
+
+
+class ArimaForecaster(Forecaster):
+    """ARIMA statsmodels (mise à jour incrémentale si un état est fourni)"""
+
+    name = "arima"
+    tier = "arima"
+
+    def forecast(self, df, steps=HORIZON, state=None, order=None, **context):
+        from arima.predict_arima import train_with_fallback
+
+        model, state = train_with_fallback(df, state, order)
+        return np.asarray(model.forecast(steps=steps)), {
+            "model": "ARIMA",
+            "tier": self.tier,
+            "order": state["order"],
+            "state": state,
+        }
+
+
+FORECASTERS = {
+    "ar": ARForecaster(),
+    "holt": HoltForecaster(),
+    "arima": ArimaForecaster(),
+}
+
+FAST_FORECASTER = "ar"
+
+
+def get_forecaster(name):
+    return FORECASTERS[name]
+
+
+# ===== Estimation du coût ARIMA (moyennes mobiles exponentielles) =====
+_cost_lock = threading.Lock()
+_arima_cost = {"incremental": 0.05, "cold": 1.0}  # secondes, valeurs initiales prudentes
+
+
+def estimate_arima_seconds(state, order):
+    """Durée attendue d'un passage ARIMA: incrémental si l'état a le bon ordre"""
+    kind = "incremental" if state is not None and state["order"] == tuple(order) else "cold"
+    with _cost_lock:
+        return _arima_cost[kind], kind
+
+
+def record_arima_seconds(kind, seconds, weight=0.3):
+    with _cost_lock:
+        _arima_cost[kind] = (1 - weight) * _arima_cost[kind] + weight * seconds
+
+
+@traced("arima.forecast")
+def timed_arima_forecast(df, state, order, steps=HORIZON):
+    """ARIMA + mise à jour de l'estimation de coût"""
+    _, kind = estimate_arima_seconds(state, order)
+    start = time.perf_counter()
+    forecasts, meta = FORECASTERS["arima"].forecast(df, steps, state=state, order=order)
+    record_arima_seconds(kind, time.perf_counter() - start)
+    return forecasts, meta
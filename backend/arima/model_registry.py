@@ -0,0 +1,113 @@
+# backend/arima/model_registry.py
+import os
+import glob
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+# Répertoire du registre (un fichier .npz par symbole et ordre)
+MODEL_DIR = os.environ.get(
+    "MODEL_REGISTRY_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "models")
+)
+
+
+def _path(symbol, order):
+    return os.path.join(MODEL_DIR, f"{symbol.upper()}_{''.join(str(o) for o in order)}.npz")
+
+
+def save_state(symbol, state):
+    """
+    Sérialise un modèle: paramètres, ordre, vecteur d'état final,
+    données d'entraînement et empreinte (format .npz compressé)
+    """
+    try:
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        results = state["results"]
+        path = _path(symbol, state["order"])
+        tmp = path + ".tmp"
+
+        with open(tmp, "wb") as f:
+            np.savez_compressed(
+                f,
+                order=np.asarray(state["order"], dtype=np.int64),
+                params=np.asarray(state["params"], dtype=np.float64),
+                state=np.asarray(results.predicted_state[:, -1], dtype=np.float64),
+                state_cov=np.asarray(results.predicted_state_cov[:, :, -1], dtype=np.float64),
+                dates=state["dates"],
+                closes=state["closes"],
+                fingerprint=np.asarray(state["fingerprint"]),
+                refit_date=np.asarray(state["refit_date"].value, dtype=np.int64),
+                appended=np.asarray(state["appended"], dtype=np.int64),
+            )
+        os.replace(tmp, path)  # écriture atomique
+
+        # Un seul ordre par symbole dans le registre
+        for other in glob.glob(os.path.join(MODEL_DIR, f"{symbol.upper()}_*.npz")):
+            if other != path:
+                os.remove(other)
+
+    except Exception as e:
+        print(f"⚠️ Sauvegarde modèle {symbol} échouée: {e}")
+
+
+def load_state(symbol):
+    """
+    Recharge un modèle du registre, sans ré-estimation
+
+    Le modèle est reconstruit par filtrage avec les paramètres stockés.
+    L'empreinte est revérifiée: fichier incohérent → None (refit).
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+    from arima.model_store import data_fingerprint
+
+    paths = glob.glob(os.path.join(MODEL_DIR, f"{symbol.upper()}_*.npz"))
+    if not paths:
+        return None
+
+    path = max(paths, key=os.path.getmtime)
+    try:
+        start = time.perf_counter()
+        with np.load(path) as data:
+            order = tuple(int(o) for o in data["order"])
+            params = data["params"]
+            dates = data["dates"]
+            closes = data["closes"]
+            fingerprint = str(data["fingerprint"])
+            refit_date = pd.Timestamp(int(data["refit_date"]))
+            appended = int(data["appended"])
+
+        if data_fingerprint(dates, closes) != fingerprint:
+            print(f"⚠️ Modèle {symbol}: empreinte invalide, ignoré")
+            return None
+
+        results = ARIMA(closes, order=order).filter(params)
+
+        print(f"📂 Modèle {symbol} ARIMA{order} chargé ({(time.perf_counter() - start) * 1000:.1f} ms)")
+        return {
+            "results": results,
+            "order": order,
+            "params": params,
+            "dates": dates,
+            "closes": closes,
+            "fingerprint": fingerprint,
+            "last_date": pd.Timestamp(int(dates[-1])),
+            "refit_date": refit_date,
+            "appended": appended,
+        }
+
+    except Exception as e:
+        print(f"⚠️ Chargement modèle {symbol} échoué: {e}")
+        return None
+
+
+def load_states(symbols, max_workers=4):
+    """Charge plusieurs modèles en parallèle → {symbol: state}"""
+    if not symbols:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        states = dict(zip(symbols, pool.map(load_state, symbols)))
+
+    return {s: state for s, state in states.items() if state is not None}
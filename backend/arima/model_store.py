@@ -0,0 +1,180 @@
+# backend/arima/model_store.py
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from influx_writer import index_to_ns
+from tracing import traced
+
+# Politique de mise à jour
+REFIT_EVERY_DAYS = 7        # ré-estimation complète au moins une fois par semaine
+MAX_APPEND_BARS = 10        # au-delà, l'historique a trop bougé → ré-estimation
+DRIFT_Z_THRESHOLD = 4.0     # erreur standardisée max tolérée sur les nouvelles barres
+
+
+def data_fingerprint(dates_ns, closes):
+    """Empreinte des données d'entraînement (dates + closes)"""
+    h = hashlib.sha1()
+    h.update(np.ascontiguousarray(dates_ns, dtype=np.int64).tobytes())
+    h.update(np.round(np.asarray(closes, dtype=np.float64), 6).tobytes())
+    return h.hexdigest()
+
+
+def make_state(model, df, dates_ns=None, closes=None, refit_date=None, appended=0):
+    """
+    État d'un modèle entraîné (sérialisable avec pickle)
+
+    Args:
+        model: Résultat ARIMA (statsmodels) entraîné sur df
+        df (DataFrame): Historique utilisé, colonne 'close'
+    """
+    if dates_ns is None:
+        dates_ns = index_to_ns(df.index)
+        closes = df['close'].to_numpy(dtype=np.float64)
+
+    return {
+        "results": model,
+        "order": tuple(model.model.order),
+        "params": np.asarray(model.params),
+        "dates": np.asarray(dates_ns, dtype=np.int64),
+        "closes": np.asarray(closes, dtype=np.float64),
+        "fingerprint": data_fingerprint(dates_ns, closes),
+        "last_date": pd.Timestamp(int(dates_ns[-1])),
+        "refit_date": refit_date if refit_date is not None else pd.Timestamp.now().normalize(),
+        "appended": appended,
+    }
+
+
+def history_matches(df_ns, df_closes, state):
+    """
+    Vérifie que l'historique actuel prolonge celui du modèle
+    (même empreinte sur la période commune, dernière date présente)
+    """
+    if state["dates"][-1] not in df_ns:
+        return False
+
+    common, i_state, i_df = np.intersect1d(state["dates"], df_ns, return_indices=True)
+    return data_fingerprint(common, state["closes"][i_state]) == data_fingerprint(common, df_closes[i_df])
+
+
+@traced("arima.update_model")
+def update_model(df, state):
+    """
+    Met à jour un modèle existant avec les nouvelles barres de df
+
+    - Aucune nouvelle barre → modèle réutilisé tel quel
+    - Nouvelles barres → filtrage avec les paramètres existants (pas de fit)
+    - Échéance REFIT_EVERY_DAYS ou dérive des erreurs → ré-estimation
+      avec warm start depuis les paramètres précédents
+
+    Returns:
+        tuple: (model, state, mode) avec mode "reuse", "append" ou "refit"
+
+    Raises:
+        ValueError: Historique incompatible avec l'état (refit complet requis)
+    """
+    from arima.train_arima import train_arima
+
+    df = df.sort_index()
+    df_ns = index_to_ns(df.index)
+    df_closes = df['close'].to_numpy(dtype=np.float64)
+
+    # L'historique stocké doit prolonger celui du modèle
+    if not history_matches(df_ns, df_closes, state):
+        raise ValueError(f"empreinte des données modifiée (modèle au {state['last_date'].date()})")
+
+    is_new = df_ns > state["dates"][-1]
+    new = df[is_new]
+    if new.empty:
+        print(f"♻️ Modèle ARIMA{state['order']} réutilisé (aucune nouvelle barre)")
+        return state["results"], state, "reuse"
+
+    age_days = (pd.Timestamp.now().normalize() - state["refit_date"]).days
+    due = age_days >= REFIT_EVERY_DAYS or state["appended"] + len(new) > MAX_APPEND_BARS
+
+    if not due:
+        model = state["results"].append(new['close'].values, refit=False)
+
+        # Diagnostic: erreurs de prévision à 1 pas standardisées sur les nouvelles barres
+        errors = model.standardized_forecasts_error[0, -len(new):]
+        drift = float(np.nanmax(np.abs(errors))) if len(errors) else 0.0
+
+        if drift <= DRIFT_Z_THRESHOLD:
+            print(f"➕ ARIMA{state['order']} prolongé de {len(new)} barre(s) sans ré-estimation (|z| max {drift:.2f})")
+            new_state = make_state(
+                model, df,
+                dates_ns=np.concatenate([state["dates"], df_ns[is_new]]),
+                closes=np.concatenate([state["closes"], df_closes[is_new]]),
+                refit_date=state["refit_date"],
+                appended=state["appended"] + len(new),
+            )
+            return model, new_state, "append"
+
+        print(f"⚠️ Dérive détectée (|z| max {drift:.2f} > {DRIFT_Z_THRESHOLD}), ré-estimation")
+
+    model = train_arima(df, order=state["order"], plot_results=False,
+                        evaluate=False, start_params=state["params"])
+    return model, make_state(model, df), "refit"
+
+
+class ModelStore:
+    """
+    États des derniers modèles entraînés, par symbole
+
+    Adossé au registre disque (arima/model_registry.py): chargement
+    paresseux au premier accès, sauvegarde à chaque mise à jour.
+    """
+
+    def __init__(self, persist=True):
+        self.persist = persist
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol):
+        symbol = symbol.upper()
+        with self._lock:
+            if symbol in self._states:
+                return self._states[symbol]
+
+        state = None
+        if self.persist:
+            from arima.model_registry import load_state
+            state = load_state(symbol)
+
+        with self._lock:
+            return self._states.setdefault(symbol, state)
+
+    def put(self, symbol, state):
+        symbol = symbol.upper()
+        with self._lock:
+            self._states[symbol] = state
+
+        if self.persist and state is not None:
+            from arima.model_registry import save_state
+            save_state(symbol, state)
+
+    def preload(self, symbols, max_workers=4):
+        """Charge en parallèle les modèles du registre (démarrage)"""
+        from arima.model_registry import load_states
+
+        if not self.persist:
+            return 0
+
+        missing = [s.upper() for s in symbols if s.upper() not in self._states]
+        loaded = load_states(missing, max_workers=max_workers)
+        with self._lock:
+            for symbol, state in loaded.items():
+                self._states.setdefault(symbol, state)
+        return len(loaded)
+
+    def drop(self, symbol):
+        with self._lock:
+            self._states.pop(symbol.upper(), None)
+
+    def symbols(self):
+        with self._lock:
+            return [s for s, state in self._states.items() if state is not None]
+
+
+# Instance partagée par le process
+model_store = ModelStore()
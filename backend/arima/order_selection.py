@@ -0,0 +1,200 @@
+# backend/arima/order_selection.py
+import os
+import json
+import threading
+import warnings
+import itertools
+import numpy as np
+import pandas as pd
+from arima.model_registry import MODEL_DIR
+
+warnings.filterwarnings('ignore')
+
+DEFAULT_ORDER = (2, 1, 2)
+FALLBACK_ORDER = (1, 1, 1)
+
+# Espace de recherche (d est choisi une fois par test ADF)
+MAX_P = 3
+MAX_Q = 3
+SCREEN_MAXITER = 15         # fit approximatif pour le premier tri
+PRUNE_MARGIN = 10.0         # écart d'AIC/BIC au-delà duquel un candidat est abandonné
+ORDER_MAX_AGE_DAYS = 30     # nouvelle recherche au-delà
+ORDER_SEARCH_TIMEOUT = 600  # secondes par passe (tri / fits complets) avant abandon du pool
+
+ORDER_FILE = os.path.join(MODEL_DIR, "orders.json")
+
+_lock = threading.Lock()
+_orders = None          # symbol -> {"order": [...], "criterion": ..., "score": ..., "selected_at": ...}
+_searching = set()
+
+
+def choose_d(closes, alpha=0.05):
+    """Ordre de différenciation: 0 si la série est stationnaire (ADF), sinon 1"""
+    from statsmodels.tsa.stattools import adfuller
+
+    try:
+        pvalue = adfuller(closes, autolag="AIC")[1]
+        return 0 if pvalue < alpha else 1
+    except Exception:
+        return 1
+
+
+def _score_order(closes, order, criterion, maxiter=None):
+    """Exécuté dans un worker: score AIC/BIC d'un ordre (inf si échec)"""
+    from statsmodels.tsa.arima.model import ARIMA
+
+    try:
+        kwargs = {"method_kwargs": {"maxiter": maxiter}} if maxiter else {}
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # non-convergence attendue au tri rapide
+            fit = ARIMA(closes, order=order).fit(**kwargs)
+        score = getattr(fit, criterion)
+        return order, float(score) if np.isfinite(score) else float("inf")
+    except Exception:
+        return order, float("inf")
+
+
+def select_order(df, criterion="aic", max_p=MAX_P, max_q=MAX_Q):
+    """
+    Recherche automatique de (p,d,q) par AIC/BIC
+
+    1. d choisi par test ADF
+    2. Tri rapide de tous les (p,q) avec un fit limité à SCREEN_MAXITER
+       itérations, en parallèle sur le pool de process
+    3. Les candidats à plus de PRUNE_MARGIN du meilleur sont abandonnés
+    4. Fit complet des survivants
+
+    Returns:
+        tuple: (order, score)
+    """
+    from arima.batch_predict import discard_process_pool, get_process_pool
+
+    closes = df.sort_index()['close'].to_numpy(dtype=np.float64)
+    d = choose_d(closes)
+    candidates = [(p, d, q) for p, q in itertools.product(range(max_p + 1), range(max_q + 1)) if p + q > 0]
+
+    pool = get_process_pool()
+
+    # Tri rapide
+    try:
+        screened = list(pool.map(_score_order, itertools.repeat(closes), candidates,
+                                 itertools.repeat(criterion), itertools.repeat(SCREEN_MAXITER),
+                                 timeout=ORDER_SEARCH_TIMEOUT))
+    except TimeoutError:
+        discard_process_pool(pool)
+        raise
+    best_screen = min(score for _, score in screened)
+    limit = best_screen + PRUNE_MARGIN if np.isfinite(best_screen) else float("inf")
+    survivors = [order for order, score in screened if score <= limit]
+
+    print(f"🔎 Sélection d'ordre: {len(candidates)} candidats, {len(survivors)} retenus après tri (d={d})")
+
+    # Fit complet des survivants
+    try:
+        scored = list(pool.map(_score_order, itertools.repeat(closes), survivors,
+                               itertools.repeat(criterion), timeout=ORDER_SEARCH_TIMEOUT))
+    except TimeoutError:
+        discard_process_pool(pool)
+        raise
+    order, score = min(scored, key=lambda item: item[1])
+
+    if not np.isfinite(score):
+        return DEFAULT_ORDER, float("inf")
+    return tuple(order), score
+
+
+def _load_orders():
+    global _orders
+    if _orders is None:
+        try:
+            with open(ORDER_FILE) as f:
+                _orders = json.load(f)
+        except (OSError, ValueError):
+            _orders = {}
+    return _orders
+
+
+def _save_orders():
+    try:
+        os.makedirs(os.path.dirname(ORDER_FILE), exist_ok=True)
+        tmp = ORDER_FILE + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(_orders, f, indent=2)
+        os.replace(tmp, ORDER_FILE)
+    except Exception as e:
+        print(f"⚠️ Sauvegarde des ordres échouée: {e}")
+
+
+def get_order(symbol):
+    """Ordre retenu pour le symbole (DEFAULT_ORDER si aucune recherche)"""
+    with _lock:
+        entry = _load_orders().get(symbol.upper())
+    return tuple(entry["order"]) if entry else DEFAULT_ORDER
+
+
+def set_order(symbol, order, criterion="aic", score=None):
+    with _lock:
+        _load_orders()[symbol.upper()] = {
+            "order": list(order),
+            "criterion": criterion,
+            "score": score,
+            "selected_at": pd.Timestamp.now().isoformat(),
+        }
+        _save_orders()
+
+
+def order_is_stale(symbol):
+    with _lock:
+        entry = _load_orders().get(symbol.upper())
+    if not entry:
+        return True
+    age = pd.Timestamp.now() - pd.Timestamp(entry["selected_at"])
+    return age.days >= ORDER_MAX_AGE_DAYS
+
+
+def search_order(symbol, df, criterion="aic"):
+    """Recherche et mémorise l'ordre d'un symbole (bloquant)"""
+    symbol = symbol.upper()
+    try:
+        order, score = select_order(df, criterion=criterion)
+        set_order(symbol, order, criterion, score)
+        print(f"✅ {symbol}: ordre ARIMA{order} retenu ({criterion.upper()}={score:.2f})")
+        return order
+    except Exception as e:
+        print(f"❌ Sélection d'ordre {symbol} échouée: {e}")
+        return None
+    finally:
+        with _lock:
+            _searching.discard(symbol)
+
+
+def schedule_order_search(symbol, df, criterion="aic"):
+    """
+    Lance la recherche en arrière-plan si l'ordre est absent ou ancien
+    Le chemin de requête n'attend jamais: il utilise get_order() en attendant.
+    """
+    symbol = symbol.upper()
+    if not order_is_stale(symbol):
+        return False
+
+    with _lock:
+        if symbol in _searching:
+            return False
+        _searching.add(symbol)
+
+    threading.Thread(target=search_order, args=(symbol, df.copy(), criterion), daemon=True).start()
+    return True
+
+
+if __name__ == "__main__":
+    # Recherche hors ligne: python -m arima.order_selection AAPL MSFT ...
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+    from influxdb_client_local import get_close_from_influx
+
+    for symbol in sys.argv[1:] or ["AAPL", "MSFT"]:
+        df = get_close_from_influx(symbol)
+        if len(df) >= 30:
+            search_order(symbol, df)
+        else:
+            print(f"⚠️ {symbol}: données insuffisantes ({len(df)} jours)")
@@ -1,30 +1,278 @@
 import pandas as pd
+import numpy as np
+import hashlib
 import sys
 import os
+import time
+import threading
 from datetime import datetime, timedelta
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-def predict_close(symbol):
+from broadcaster import broadcaster
+from tracing import traced
+from metrics import PREDICT_SECONDS, PREDICT_STAGE_SECONDS, ARIMA_FIT_SECONDS, FALLBACKS
+
+def _progress(symbol, stage, message):
+    """Étape du pipeline poussée aux clients abonnés (/stream)"""
+    broadcaster.publish("progress", {"stage": stage, "message": message}, symbol)
+
+def _stage_done(stage, symbol, start):
+    """Durée de l'étape → métriques; retourne le début de l'étape suivante"""
+    now = time.perf_counter()
+    PREDICT_STAGE_SECONDS.observe(now - start, stage=stage, symbol=symbol)
+    return now
+
+def forecast_run_id(last_date, model, forecasts):
+    """Identifiant d'un run de prévision: dernière barre, modèle, valeurs prédites"""
+    h = hashlib.sha1(f"{pd.Timestamp(last_date).date() if last_date is not None else ''}|{model}|".encode())
+    h.update(np.round(np.asarray(forecasts, dtype=np.float64), 6).tobytes())
+    return h.hexdigest()[:12]
+
+@traced("arima.train_with_fallback")
+def train_with_fallback(df, state=None, order=None):
+    """
+    Entraîne ARIMA avec l'ordre donné (défaut (2,1,2)), fallback (1,1,1) en cas d'échec
+    
+    Avec l'état d'un modèle précédent de même ordre, le modèle est mis
+    à jour (nouvelles barres / warm start) au lieu d'être ré-entraîné.
+    
+    Returns:
+        tuple: (model, state)
+    """
+    from arima.train_arima import train_arima
+    from arima.model_store import make_state, update_model
+    from arima.order_selection import DEFAULT_ORDER, FALLBACK_ORDER
+    
+    order = tuple(order) if order else DEFAULT_ORDER
+    
+    if state is not None and state["order"] == order:
+        try:
+            with ARIMA_FIT_SECONDS.time(order=str(order), kind="update") as labels:
+                model, state, mode = update_model(df, state)
+                labels["kind"] = mode
+            return model, state
+        except Exception as e:
+            FALLBACKS.inc(kind="incremental_refit")
+            print(f"   ⚠️ Mise à jour incrémentale impossible ({e}), ré-entraînement complet")
+    
+    try:
+        with ARIMA_FIT_SECONDS.time(order=str(order), kind="cold"):
+            model = train_arima(df, order=order, plot_results=False, evaluate=False)
+    except Exception as e:
+        if order == FALLBACK_ORDER:
+            raise
+        # Fallback sur modèle simple
+        FALLBACKS.inc(kind="fallback_order")
+        print(f"   ⚠️ ARIMA{order} échoué, essai {FALLBACK_ORDER}...")
+        with ARIMA_FIT_SECONDS.time(order=str(FALLBACK_ORDER), kind="cold"):
+            model = train_arima(df, order=FALLBACK_ORDER, plot_results=False, evaluate=False)
+    
+    return model, make_state(model, df)
+
+@traced("predict.store_forecasts")
+def horizon_dates(today):
+    """Dates cibles d'un run: aujourd'hui + 5 jours"""
+    return [today + timedelta(days=i) for i in range(6)]
+
+
+def todays_horizon(horizon, today):
+    """
+    Courbe stockée réutilisable: les 6 points, tous écrits par un run d'aujourd'hui
+    
+    Le J+1 d'hier ou le J+5 d'il y a cinq jours tombent aussi aujourd'hui:
+    sans run_date identique ils ne comptent pas comme une prédiction récente.
+    
+    Returns:
+        DataFrame (6 lignes, de today à today+5) ou None
+    """
+    dates = horizon_dates(today)
+    if horizon.empty or "run_date" not in horizon or not all(date in horizon.index for date in dates):
+        return None
+    run = horizon.loc[dates]
+    if not (run["run_date"] == today.date().isoformat()).all():
+        return None
+    return run
+
+
+def store_forecasts(symbol, df, forecasts, order, today=None, model="ARIMA", tier="arima", wait=False):
+    """
+    Stocke les 6 prédictions (aujourd'hui + 5 jours) et construit la réponse
+    
+    Args:
+        df (DataFrame): Historique utilisé pour l'entraînement (sans aujourd'hui)
+        forecasts: 6 valeurs prédites
+        order (tuple): Ordre ARIMA effectivement utilisé (None hors ARIMA)
+        model (str): Libellé du modèle
+        tier (str): Niveau ayant produit la prévision ("fast" ou "arima")
+        wait (bool): Attendre que les prédictions soient lisibles dans le stockage
+    """
+    from influxdb_client_local import write_predictions_to_influx
+    from forecast_cache import forecast_cache
+    
+    if today is None:
+        today = pd.Timestamp.now().normalize()
+    forecasts = list(forecasts)
+    
+    prediction_today = forecasts[0]
+    yesterday_close = float(df['close'].iloc[-1])
+    change_percent = ((prediction_today - yesterday_close) / yesterday_close) * 100
+    
+    print(f"   🔮 Prédiction aujourd'hui: ${prediction_today:.2f}")
+    print(f"   📈 Variation: {change_percent:+.2f}%")
+    
+    # ===== 5. STOCKER PRÉDICTIONS =====
+    print(f"\n5️⃣ Stockage prédictions...")
+    
+    # Aujourd'hui + 5 prochains jours, un seul envoi à la file d'écriture
+    # (run_date: seule une courbe complète écrite aujourd'hui est réutilisée)
+    dates = horizon_dates(today)
+    write_predictions_to_influx(symbol, dates, forecasts[:6], model=model,
+                                run_date=today.date().isoformat(), wait=wait)
+    
+    next_5_days = []
+    for i in range(1, 6):
+        future_date = dates[i]
+        future_prediction = forecasts[i]
+        
+        # Préparer pour le résultat
+        prev_close = forecasts[i-1]
+        future_change = ((future_prediction - prev_close) / prev_close) * 100
+        
+        next_5_days.append({
+            "date": future_date.isoformat(),
+            "predicted_close": float(future_prediction),
+            "day_number": i,
+            "change_from_previous": round(future_change, 2)
+        })
+        
+        print(f"   📅 J+{i} ({future_date.date()}): ${future_prediction:.2f} ({future_change:+.2f}%)")
+    
+    # Calcul confiance
+    confidence = min(95, 70 + min(len(df) / 2, 25))
+    
+    # ===== RÉSULTAT =====
+    result = {
+        "symbol": symbol,
+        "predicted_close": float(prediction_today),
+        "prediction_date": today.isoformat(),
+        "yesterday_close": float(yesterday_close),
+        "change_percent": round(change_percent, 2),
+        "model": model,
+        "tier": tier,
+        "order": list(order) if order else None,
+        "source": "new_training",
+        "confidence": int(confidence),
+        "data_points": len(df),
+        "cache_hit": False,
+        "run_id": forecast_run_id(df.index[-1], model, forecasts[:6]),
+        "next_5_days": next_5_days,
+        "message": f"Close prédit pour {today.date()} + 5 jours suivants basé sur {len(df)} jours"
+    }
+    
+    forecast_cache.put(symbol, df.index[-1], order, result)
+    broadcaster.publish("prediction", result, symbol)
+    
+    return result
+
+_arima_pending = set()
+_arima_pending_lock = threading.Lock()
+
+def refresh_arima_async(symbol, df, state, order, today):
+    """
+    Lance ARIMA en arrière-plan; son résultat remplace ensuite
+    la prévision du niveau rapide (InfluxDB + cache mémoire)
+    """
+    from arima.forecasters import timed_arima_forecast
+    from arima.model_store import model_store
+    
+    with _arima_pending_lock:
+        if symbol in _arima_pending:
+            return False
+        _arima_pending.add(symbol)
+    
+    def run():
+        try:
+            forecasts, meta = timed_arima_forecast(df, state, order)
+            model_store.put(symbol, meta["state"])
+            store_forecasts(symbol, df, forecasts, meta["order"], today)
+            print(f"🔁 {symbol}: prévision rapide remplacée par ARIMA{meta['order']}")
+        except Exception as e:
+            print(f"❌ ARIMA en arrière-plan {symbol} échoué: {e}")
+        finally:
+            with _arima_pending_lock:
+                _arima_pending.discard(symbol)
+    
+    threading.Thread(target=run, daemon=True).start()
+    return True
+
+@traced("predict.predict_close")
+def predict_close(symbol, budget_ms=None):
     """
     PROCESSUS COMPLET selon votre use case:
+    0. Cache mémoire
     1. Vérifier prédiction <24h
     2. Si oui → retourner
     3. Si non → garantir 30 jours de données
-    4. Entraîner ARIMA
+    4. Entraîner ARIMA si le budget de latence le permet, sinon
+       prévision rapide (NumPy) et ARIMA en arrière-plan
     5. Prédire close d'aujourd'hui + 5 prochains jours
     6. Stocker prédictions
+    
+    Les appels concurrents sur un même symbole partagent un seul calcul
+    (single-flight dans le process, verrou fichier entre workers).
     """
+    from forecast_cache import forecast_cache
+    from single_flight import predict_flight, symbol_file_lock
+    
+    symbol = symbol.upper()
+    start = time.perf_counter()
+    
+    # ===== 0. CACHE MÉMOIRE =====
+    cached = forecast_cache.get(symbol)
+    if cached is not None:
+        print(f"⚡ Prédiction {symbol} servie depuis le cache mémoire")
+        cached["source"] = "memory_cache"
+        cached["cache_hit"] = True
+        _observe_predict(symbol, cached, "memory", start)
+        return cached
+    
+    def run():
+        # Un autre worker a peut-être déjà calculé pendant l'attente:
+        # l'étape 1 retrouvera alors sa prédiction dans InfluxDB
+        with symbol_file_lock(symbol):
+            return _predict_close(symbol, budget_ms)
+    
+    result = predict_flight.do(symbol, run)
+    cache = "error" if result.get("error") else "influx" if result.get("source") == "cached" else "miss"
+    _observe_predict(symbol, result, cache, start)
+    return result
+
+def _observe_predict(symbol, result, cache, start):
+    order = result.get("order")
+    PREDICT_SECONDS.observe(time.perf_counter() - start, symbol=symbol, cache=cache,
+                            tier=result.get("tier", ""), order=str(tuple(order)) if order else "")
+
+@traced("predict.pipeline")
+def _predict_close(symbol, budget_ms=None):
+    """Pipeline de prédiction (étapes 1 à 6), sans coalescence"""
     try:
         # Imports
         from influxdb_client_local import (
             get_close_from_influx,
-            write_market_dataframe,
-            get_prediction_for_today,
-            write_prediction_to_influx
+            get_prediction_horizon
         )
         from fetch_api import fetch_and_ensure_30_days
-        from arima.train_arima import train_arima
+        from forecast_cache import forecast_cache
+        from arima.model_store import model_store
+        from arima.order_selection import get_order, schedule_order_search
+        from arima.forecasters import (
+            FAST_FORECASTER,
+            PREDICT_LATENCY_BUDGET_MS,
+            get_forecaster,
+            estimate_arima_seconds,
+            timed_arima_forecast
+        )
         
         symbol = symbol.upper()
         today = pd.Timestamp.now().normalize()
@@ -36,46 +284,64 @@ def predict_close(symbol):
         
         # ===== 1. VÉRIFIER PRÉDICTION <24h =====
         print("\n1️⃣ Vérification prédiction existante...")
-        existing_pred = get_prediction_for_today(symbol)
+        stage_start = time.perf_counter()
+        _progress(symbol, "check_cache", "Vérification prédiction existante")
+        horizon = todays_horizon(get_prediction_horizon(symbol, start=today, days=6), today)
+        stage_start = _stage_done("check_cache", symbol, stage_start)
         
-        if existing_pred is not None:
+        if horizon is not None:
             print(f"   ✅ PRÉDICTION CACHE TROUVÉE!")
+            existing_pred = float(horizon.at[today, "predicted_close"])
+            stored_model = horizon.at[today, "model"]
+            stored_model = stored_model if isinstance(stored_model, str) else "ARIMA"
             
             # Récupérer close d'hier pour contexte
             df = get_close_from_influx(symbol)
             yesterday_close = float(df['close'].iloc[-1]) if not df.empty else 0
             
-            # Récupérer les 5 prochains jours du cache
+            # Les 5 prochains jours viennent du même run
             next_5_days = []
+            prev_close = existing_pred
             for i in range(1, 6):
                 future_date = today + timedelta(days=i)
-                future_pred = get_prediction_for_today(symbol, date=future_date)
-                if future_pred is not None:
-                    next_5_days.append({
-                        "date": future_date.isoformat(),
-                        "predicted_close": float(future_pred),
-                        "day_number": i
-                    })
+                future_pred = float(horizon.at[future_date, "predicted_close"])
+                next_5_days.append({
+                    "date": future_date.isoformat(),
+                    "predicted_close": future_pred,
+                    "day_number": i,
+                    "change_from_previous": round((future_pred - prev_close) / prev_close * 100, 2)
+                })
+                prev_close = future_pred
             
-            return {
+            result = {
                 "symbol": symbol,
                 "predicted_close": float(existing_pred),
                 "prediction_date": today.isoformat(),
                 "yesterday_close": float(yesterday_close),
                 "change_percent": round(((existing_pred - yesterday_close) / yesterday_close * 100), 2) if yesterday_close > 0 else 0,
-                "model": "ARIMA",
+                "model": stored_model,
+                "tier": "arima" if stored_model == "ARIMA" else "fast",
                 "source": "cached",
                 "confidence": 95,
                 "cache_hit": True,
+                "run_id": forecast_run_id(df.index[-1] if not df.empty else None, stored_model,
+                                          [existing_pred] + [d["predicted_close"] for d in next_5_days]),
                 "next_5_days": next_5_days,
                 "message": f"Prédiction récente (<24h) pour {today.date()}"
             }
+            
+            if not df.empty:
+                forecast_cache.put(symbol, df.index[-1], None, result)
+            broadcaster.publish("prediction", result, symbol)
+            return result
         
         print("   ❌ Pas de prédiction récente, nouvelle prédiction nécessaire")
         
         # ===== 2. GARANTIR 30 JOURS DE DONNÉES =====
         print(f"\n2️⃣ Garantir 30 jours de données...")
+        _progress(symbol, "ensure_data", "Chargement de l'historique")
         df = fetch_and_ensure_30_days(symbol, min_days=30)
+        stage_start = _stage_done("ensure_data", symbol, stage_start)
         
         if df.empty or len(df) < 30:
             return {
@@ -92,77 +358,52 @@ def predict_close(symbol):
         print(f"   📅 Période: {df.index[0].date()} → {df.index[-1].date()}")
         print(f"   💰 Close d'hier: ${df['close'].iloc[-1]:.2f}")
         
-        # ===== 3. ENTRAÎNER ARIMA =====
+        # ===== 3. ENTRAÎNER ARIMA (SELON BUDGET) =====
         print(f"\n3️⃣ Entraînement modèle ARIMA...")
-        try:
-            model = train_arima(df, order=(2,1,2), plot_results=False)
-        except Exception as e:
-            # Fallback sur modèle simple
-            print(f"   ⚠️ ARIMA(2,1,2) échoué, essai (1,1,1)...")
-            model = train_arima(df, order=(1,1,1), plot_results=False)
-        
-        # ===== 4. PRÉDIRE AUJOURD'HUI + 5 JOURS =====
-        print(f"\n4️⃣ Prédiction du close pour aujourd'hui + 5 prochains jours...")
+        _progress(symbol, "train", "Entraînement du modèle")
+        order = get_order(symbol)
+        state = model_store.get(symbol)
+        budget = (budget_ms if budget_ms is not None else PREDICT_LATENCY_BUDGET_MS) / 1000
+        expected, kind = estimate_arima_seconds(state, order)
         
-        # Prédire 6 jours (aujourd'hui + 5 suivants)
-        forecasts = model.forecast(steps=6)
+        forecasts = None
+        deferred = expected > budget
+        if not deferred:
+            try:
+                forecasts, meta = timed_arima_forecast(df, state, order)
+                model_store.put(symbol, meta["state"])
+            except Exception as e:
+                FALLBACKS.inc(kind="arima_failed_fast_tier")
+                print(f"   ⚠️ ARIMA échoué ({e}), niveau rapide utilisé")
+        else:
+            FALLBACKS.inc(kind="budget_fast_tier")
+            print(f"   ⏱️ ARIMA {kind} estimé à {expected:.2f}s > budget {budget:.2f}s → niveau rapide")
         
-        prediction_today = forecasts[0]
-        yesterday_close = float(df['close'].iloc[-1])
-        change_percent = ((prediction_today - yesterday_close) / yesterday_close) * 100
+        if forecasts is None:
+            fast = get_forecaster(FAST_FORECASTER)
+            forecasts, meta = fast.forecast(df)
+            meta["order"] = None
+        stage_start = _stage_done("train", symbol, stage_start)
         
-        print(f"   🔮 Prédiction aujourd'hui: ${prediction_today:.2f}")
-        print(f"   📈 Variation: {change_percent:+.2f}%")
+        # Recherche d'ordre en arrière-plan (jamais sur le chemin de la requête)
+        schedule_order_search(symbol, df)
         
-        # ===== 5. STOCKER PRÉDICTIONS =====
-        print(f"\n5️⃣ Stockage prédictions...")
-        
-        # Stocker aujourd'hui
-        write_prediction_to_influx(symbol, today, prediction_today)
-        
-        # Stocker les 5 prochains jours
-        next_5_days = []
-        for i in range(1, 6):
-            future_date = today + timedelta(days=i)
-            future_prediction = forecasts[i]
-            
-            # Stocker dans InfluxDB
-            write_prediction_to_influx(symbol, future_date, future_prediction)
-            
-            # Préparer pour le résultat
-            prev_close = forecasts[i-1]
-            future_change = ((future_prediction - prev_close) / prev_close) * 100
-            
-            next_5_days.append({
-                "date": future_date.isoformat(),
-                "predicted_close": float(future_prediction),
-                "day_number": i,
-                "change_from_previous": round(future_change, 2)
-            })
-            
-            print(f"   📅 J+{i} ({future_date.date()}): ${future_prediction:.2f} ({future_change:+.2f}%)")
+        # ===== 4. PRÉDIRE AUJOURD'HUI + 5 JOURS =====
+        print(f"\n4️⃣ Prédiction {meta['model']} du close pour aujourd'hui + 5 prochains jours...")
+        _progress(symbol, "store", f"Prévision {meta['model']} calculée, stockage")
         
-        # Calcul confiance
-        confidence = min(95, 70 + min(len(df) / 2, 25))
+        # Écriture attendue: un autre worker qui prendra le verrou du symbole
+        # doit retrouver cette prédiction à l'étape 1 au lieu de ré-entraîner
+        result = store_forecasts(symbol, df, forecasts, meta["order"], today,
+                                 model=meta["model"], tier=meta["tier"], wait=True)
+        _stage_done("store", symbol, stage_start)
         
-        # ===== RÉSULTAT =====
-        result = {
-            "symbol": symbol,
-            "predicted_close": float(prediction_today),
-            "prediction_date": today.isoformat(),
-            "yesterday_close": float(yesterday_close),
-            "change_percent": round(change_percent, 2),
-            "model": "ARIMA",
-            "source": "new_training",
-            "confidence": int(confidence),
-            "data_points": len(df),
-            "cache_hit": False,
-            "next_5_days": next_5_days,
-            "message": f"Close prédit pour {today.date()} + 5 jours suivants basé sur {len(df)} jours"
-        }
+        # ARIMA remplacera la prévision rapide une fois terminé
+        if deferred:
+            refresh_arima_async(symbol, df, state, order, today)
         
         print(f"\n✅ PRÉDICTION COMPLÈTE")
-        print(f"   Aujourd'hui: ${prediction_today:.2f} (Confiance: {confidence}%)")
+        print(f"   Aujourd'hui: ${result['predicted_close']:.2f} (Confiance: {result['confidence']}%)")
         print(f"   5 jours suivants stockés")
         
         return result
@@ -4,15 +4,19 @@ from statsmodels.tsa.arima.model import ARIMA
 from sklearn.metrics import mean_squared_error
 import numpy as np
 import warnings
+from tracing import span, traced
 warnings.filterwarnings('ignore')
 
-def train_arima(df, order=(2,1,2), plot_results=False):
+@traced("arima.train_arima")
+def train_arima(df, order=(2,1,2), plot_results=False, evaluate=True, start_params=None):
     """
     Entraîne un modèle ARIMA sur les données financières
     
     Args:
         df (DataFrame): Doit contenir la colonne 'close'
         order (tuple): Paramètres (p,d,q) pour ARIMA
+        evaluate (bool): Fit supplémentaire sur 80% pour RMSE/MAE
+        start_params: Paramètres initiaux (warm start depuis un fit précédent)
     
     Returns:
         model_fit: Modèle ARIMA entraîné
@@ -38,37 +42,34 @@ def train_arima(df, order=(2,1,2), plot_results=False):
     print(f"   Prix actuel: ${data[-1]:.2f}")
     
     try:
-        # Entraînement
-        print("⚡ Entraînement en cours...")
-        model = ARIMA(train, order=order)
-        model_fit = model.fit()
-        
-        # Prédictions test
-        predictions = model_fit.forecast(steps=len(test))
-        
-        # Évaluation
-        rmse = np.sqrt(mean_squared_error(test, predictions))
-        mae = np.mean(np.abs(test - predictions))
-        
-        print(f"\n📈 PERFORMANCE:")
-        print(f"   RMSE: {rmse:.2f} points")
-        print(f"   MAE: {mae:.2f} points")
+        if evaluate:
+            # Entraînement
+            print("⚡ Entraînement en cours...")
+            with span("arima.fit", stage="evaluate", n=len(train)):
+                model = ARIMA(train, order=order)
+                model_fit = model.fit()
+            
+            # Prédictions test
+            predictions = model_fit.forecast(steps=len(test))
+            
+            # Évaluation
+            rmse = np.sqrt(mean_squared_error(test, predictions))
+            mae = np.mean(np.abs(test - predictions))
+            
+            print(f"\n📈 PERFORMANCE:")
+            print(f"   RMSE: {rmse:.2f} points")
+            print(f"   MAE: {mae:.2f} points")
         
         # Ré-entraîner sur toutes les données pour prédiction
-        final_model = ARIMA(data, order=order)
-        final_fit = final_model.fit()
+        if start_params is not None:
+            print("♻️ Warm start depuis les paramètres précédents")
+        with span("arima.fit", stage="final", n=len(data), warm_start=start_params is not None):
+            final_model = ARIMA(data, order=order)
+            final_fit = final_model.fit(start_params=start_params)
         
         print(f"\n✅ Modèle ARIMA{order} entraîné avec succès")
         return final_fit
         
     except Exception as e:
-        print(f"❌ Erreur entraînement: {e}")
-        
-        # Fallback: modèle simple
-        try:
-            simple_model = ARIMA(data, order=(1,1,1))
-            simple_fit = simple_model.fit()
-            print("✅ Modèle simple (1,1,1) réussi")
-            return simple_fit
-        except:
-            raise ValueError("Échec de l'entraînement ARIMA")
\ No newline at end of file
+        print(f"❌ Erreur entraînement ARIMA{order}: {e}")
+        raise ValueError("Échec de l'entraînement ARIMA") from e
@@ -0,0 +1,210 @@
+# backend/benchmarks/__main__.py
+#
+# python -m benchmarks [--storage influx|sqlite] [--only train_arima,predict] [--quick]
+#                      [--save-baseline] [--tolerance 0.25]
+#
+# Hors ligne: InfluxDB et Alpha Vantage sont remplacés par des faux en
+# mémoire (benchmarks/fakes.py), SQLite, caches et registre de modèles
+# dans un dossier temporaire. Code de sortie 1 si une métrique régresse
+# au-delà de la tolérance par rapport à benchmarks/baseline_<storage>.json.
+#
+# Les durées dépendent de la machine: une charge de référence est mesurée
+# dans le même run (calibration) et la baseline est ramenée à cette vitesse
+# avant comparaison. --quick (médianes de peu de mesures) élargit la tolérance.
+import os
+import sys
+import json
+import shutil
+import platform
+import tempfile
+
+# Avant tout import du backend: caches et modèles isolés, pas de tâches de fond
+_WORKDIR = tempfile.mkdtemp(prefix="bench-")
+os.environ["MARKET_CACHE_DIR"] = os.path.join(_WORKDIR, "market_cache")
+os.environ["MODEL_REGISTRY_DIR"] = os.path.join(_WORKDIR, "models")
+os.environ["SQLITE_PATH"] = os.path.join(_WORKDIR, "market.sqlite3")
+os.environ["PRECOMPUTE_ENABLED"] = "0"
+os.environ["PROFILING_ENABLED"] = "0"
+
+import pandas as pd
+
+from benchmarks.suite import BENCHMARKS, Context, calibrate, quiet
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+DEFAULT_TOLERANCE = 0.25        # +25% de latence (ou -20% de débit) = régression
+NOISE_FLOOR_MS = 1.0            # écarts absolus plus petits ignorés (mesures sub-ms)
+QUICK_TOLERANCE_FACTOR = 2      # --quick: tolérances doublées
+
+
+def machine_scale(calibration, baseline):
+    """Rapport de vitesse run / baseline (1.0 si la baseline n'a pas de calibration)"""
+    reference = (baseline or {}).get("calibration_ms")
+    if not reference or not calibration:
+        return 1.0
+    return calibration / reference
+
+
+def rescale(results, scale):
+    """Métriques ramenées à une machine `scale` fois plus lente (durées ×, débits ÷)"""
+    scaled = {}
+    for name, r in results.items():
+        if r.get("value"):
+            factor = scale if r["better"] == "lower" else 1 / scale
+            r = {**r, "value": round(r["value"] * factor, 3)}
+        scaled[name] = r
+    return scaled
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE, scale=1.0, widen=1.0):
+    """
+    Compare chaque métrique à la baseline
+
+    Args:
+        scale (float): Vitesse relative de la machine (machine_scale), appliquée à la baseline
+        widen (float): Facteur appliqué à toutes les tolérances (runs --quick)
+
+    Returns:
+        list: Régressions [{"metric", "baseline", "value", "change", "tolerance"}]
+    """
+    regressions = []
+    baseline = rescale(baseline, scale)
+    for name, current in results.items():
+        reference = baseline.get(name)
+        if reference is None or not reference.get("value"):
+            continue
+        tol = current.get("tolerance", tolerance) * widen
+        base, value = reference["value"], current["value"]
+        change = value / base - 1
+
+        if current["better"] == "lower":
+            regressed = value > base * (1 + tol)
+            if current["unit"] == "ms" and value - base < NOISE_FLOOR_MS:
+                regressed = False
+        else:
+            regressed = value < base / (1 + tol)
+
+        if regressed:
+            regressions.append({"metric": name, "baseline": base, "value": value,
+                                "change": round(change, 3), "tolerance": tol})
+    return regressions
+
+
+def baseline_path(storage):
+    return os.path.join(BENCH_DIR, f"baseline_{storage}.json")
+
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _environment():
+    import numpy, statsmodels
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "pandas": pd.__version__,
+        "statsmodels": statsmodels.__version__,
+    }
+
+
+def _print_table(results, baseline):
+    # baseline déjà ramenée à la vitesse de la machine
+    width = max(len(n) for n in results)
+    for name, r in results.items():
+        line = f"{name:<{width}}  {r['value']:>12.3f} {r['unit']:<6}"
+        reference = baseline.get(name)
+        if reference and reference.get("value"):
+            line += f"  (baseline {reference['value']:.3f}, {r['value'] / reference['value'] - 1:+.1%})"
+        print(line)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmarks hors ligne du backend (faux InfluxDB / Alpha Vantage)")
+    parser.add_argument("--storage", choices=["influx", "sqlite"], default="influx",
+                        help="Backend de stockage mesuré (influx = faux InfluxDB en mémoire)")
+    parser.add_argument("--only", help=f"Sous-ensemble séparé par des virgules ({', '.join(BENCHMARKS)})")
+    parser.add_argument("--quick", action="store_true", help="Moins de répétitions (tendance, pas de baseline)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--baseline", help="Défaut: benchmarks/baseline_<storage>.json")
+    parser.add_argument("--save-baseline", action="store_true", help="Enregistrer ces résultats comme baseline")
+    args = parser.parse_args(argv)
+
+    os.environ["STORAGE_BACKEND"] = args.storage
+    args.baseline = args.baseline or baseline_path(args.storage)
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"benchmarks inconnus: {unknown}")
+
+    try:
+        with quiet():
+            ctx = Context(repeat=2 if args.quick else 5)
+
+        # Avant et après: la vitesse moyenne sur la durée du run
+        before = calibrate(ctx.repeat * 4)
+        results = {}
+        for name in names:
+            print(f"⏱️  {name}...", flush=True)
+            results.update(BENCHMARKS[name](ctx))
+        calibration = (before + calibrate(ctx.repeat * 4)) / 2
+    finally:
+        from influxdb_client_local import close_storage
+        with quiet():
+            close_storage()
+        shutil.rmtree(_WORKDIR, ignore_errors=True)
+
+    baseline = load_baseline(args.baseline)
+    scale = machine_scale(calibration, baseline)
+    reference = rescale(baseline["results"], scale) if baseline else {}
+    report = {
+        "created": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "storage": args.storage,
+        "environment": _environment(),
+        "quick": args.quick,
+        "calibration_ms": round(calibration, 3),
+        "results": results,
+    }
+
+    print()
+    print(f"🧭 Calibration: {calibration:.3f} ms (machine ×{scale:.2f} par rapport à la baseline)")
+    _print_table(results, reference)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"bench_{pd.Timestamp.now():%Y%m%d_%H%M%S}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Résultats: {path}")
+
+    if args.save_baseline:
+        # Une sélection partielle (--only) complète la baseline existante,
+        # ramenée à la calibration de ce run
+        report["results"] = {**reference, **results}
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📌 Baseline enregistrée: {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print("⚠️ Pas de baseline (python -m benchmarks --save-baseline)")
+        return 0
+
+    widen = QUICK_TOLERANCE_FACTOR if args.quick else 1
+    regressions = compare(results, reference, args.tolerance, widen=widen)
+    for r in regressions:
+        print(f"❌ Régression {r['metric']}: {r['baseline']} → {r['value']} ({r['change']:+.1%}, tolérance {r['tolerance']:.0%})")
+    if not regressions:
+        print(f"✅ Aucune régression (tolérance {args.tolerance * widen:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+# backend/benchmarks/fakes.py
+import re
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+from influxdb_client.client.flux_table import FluxRecord, FluxTable
+
+_FIELD_RE = re.compile(r'(\w+)=("(?:[^"\\]|\\.)*"|[^,]+)')
+
+
+def synthetic_prices(symbol, days=400, end=None, start_price=None, seed=None):
+    """
+    Clôtures synthétiques (marche aléatoire géométrique, jours ouvrés)
+
+    Reproductible: la graine dépend du symbole, la dernière barre est la
+    veille (comme après l'ingestion du soir).
+
+    Returns:
+        DataFrame: colonne 'close', index date naïf à minuit
+    """
+    end = pd.Timestamp(end if end is not None else pd.Timestamp.now().normalize() - pd.tseries.offsets.BDay(1))
+    index = pd.bdate_range(end=end.normalize(), periods=days, name="date")
+    rng = np.random.default_rng(seed if seed is not None else sum(map(ord, symbol)))
+    start_price = start_price or float(rng.uniform(50, 500))
+    returns = rng.normal(0.0004, 0.018, size=days)
+    closes = np.round(start_price * np.exp(np.cumsum(returns)), 2)
+    return pd.DataFrame({'close': closes}, index=index)
+
+
+class _RawResponse:
+    """Comme la réponse urllib3 de query_raw: le CSV est dans .data"""
+
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeInfluxDB:
+    """
+    InfluxDB en mémoire (query_api + write_api du client synchrone)
+
+    - write(): le line protocol est conservé tel quel et décodé à la
+      lecture suivante (une écriture ne coûte qu'un append)
+    - query_raw(): CSV sans annotations, comme avec CSV_DIALECT; la
+      requête est reconnue par ses paramètres (series / panel / horizon)
+    - latency: aller-retour réseau simulé (secondes) par appel
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.queries = 0
+        self.writes = 0
+        self._points = {}       # (measurement, symbol) -> {field: {ns: value}}
+        self._pending = []
+        self._version = 0
+        self._payloads = {}     # (version, requête) -> CSV (les lectures répétées ne re-sérialisent pas)
+        self._lock = threading.Lock()
+
+    # ----- données -----
+
+    def load_closes(self, symbol, df):
+        """Charge une série 'close' (index naïf ou UTC) dans stock_prices"""
+        index = pd.DatetimeIndex(df.index).as_unit("ns")
+        if index.tz is None:
+            index = index.tz_localize("UTC")
+        with self._lock:
+            field = self._points.setdefault(("stock_prices", symbol), {}).setdefault("close", {})
+            field.update(zip(index.asi8.tolist(), df['close'].astype(float).tolist()))
+            self._version += 1
+
+    def clear(self, measurement, symbol=None):
+        with self._lock:
+            self._decode_pending()
+            for key in [k for k in self._points if k[0] == measurement and symbol in (None, k[1])]:
+                del self._points[key]
+            self._version += 1
+
+    def _decode_pending(self):
+        # Appelé sous self._lock
+        pending, self._pending = self._pending, []
+        for payload in pending:
+            for line in payload.split("\n"):
+                if not line:
+                    continue
+                head, ts = line.rsplit(" ", 1)
+                series, fields = head.split(" ", 1)
+                measurement, *tags = series.split(",")
+                tags = dict(tag.split("=", 1) for tag in tags)
+                point = self._points.setdefault((measurement, tags.get("symbol")), {})
+                for name, value in _FIELD_RE.findall(fields):
+                    value = value[1:-1].replace('\\"', '"') if value.startswith('"') else float(value)
+                    point.setdefault(name, {})[int(ts)] = value
+        if pending:
+            self._version += 1
+
+    def _frame(self, measurement, symbol, fields, start_ns, stop_ns=None):
+        point = self._points.get((measurement, symbol), {})
+        columns = {f: pd.Series(point[f], dtype=object if f in ("model", "run_date") else float)
+                   for f in fields if f in point}
+        if not columns:
+            return pd.DataFrame(columns=fields)
+        frame = pd.DataFrame(columns).sort_index()
+        keep = frame.index >= start_ns
+        if stop_ns is not None:
+            keep &= frame.index < stop_ns
+        return frame[keep]
+
+    # ----- write_api / delete_api -----
+
+    def write(self, bucket=None, org=None, record=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        if isinstance(record, (list, tuple)):
+            record = "\n".join(record)
+        with self._lock:
+            self._pending.append(record)
+            self.writes += 1
+
+    def delete(self, start=None, stop=None, predicate="", bucket=None, org=None):
+        """DeleteApi.delete: prédicat _measurement="..." [AND symbol="..."]"""
+        if self.latency:
+            time.sleep(self.latency)
+        terms = dict(re.findall(r'(\w+)="([^"]*)"', predicate))
+        self.clear(terms["_measurement"], terms.get("symbol"))
+
+    # ----- query_api -----
+
+    def query_raw(self, query=None, org=None, dialect=None, params=None):
+        if self.latency:
+            time.sleep(self.latency)
+        params = params or {}
+        key = repr(sorted((k, str(v)) for k, v in params.items()))
+        with self._lock:
+            self.queries += 1
+            self._decode_pending()
+            cached = self._payloads.get((self._version, key))
+            if cached is None:
+                cached = self._payloads[(self._version, key)] = self._csv(params)
+        return _RawResponse(cached)
+
+    def query(self, query=None, org=None, params=None):
+        """Requêtes à tables (high-water mark / dernière prédiction): un enregistrement last()"""
+        if self.latency:
+            time.sleep(self.latency)
+        params = params or {}
+        measurement = "stock_prices" if "stock_prices" in (query or "") else "predictions"
+        field = "close" if measurement == "stock_prices" else "predicted_close"
+        with self._lock:
+            self.queries += 1
+            self._decode_pending()
+            values = self._points.get((measurement, params.get("symbol")), {}).get(field, {})
+            if not values:
+                return []
+            ns = max(values)
+        table = FluxTable()
+        table.records.append(FluxRecord(0, {
+            "_time": datetime.fromtimestamp(ns / 1e9, tz=timezone.utc),
+            "_value": values[ns],
+            "_field": field,
+        }))
+        return [table]
+
+    def _csv(self, params):
+        now = pd.Timestamp.now(tz="UTC")
+
+        def to_ns(value):
+            if isinstance(value, timedelta):
+                return (now + value).value
+            value = pd.Timestamp(value)
+            return (value.tz_localize("UTC") if value.tzinfo is None else value).value
+
+        if "symbols" in params and "stop" in params:
+            # PREDICTION_PANEL_QUERY: une ligne par (date, symbole)
+            frames = []
+            for symbol in params["symbols"]:
+                frame = self._frame("predictions", symbol, ["predicted_close", "model"],
+                                    to_ns(params["start"]), to_ns(params["stop"]))
+                if not frame.empty:
+                    frames.append(frame.assign(symbol=symbol))
+            frame = pd.concat(frames).sort_index() if frames else pd.DataFrame()
+        elif "symbols" in params:
+            # PANEL_QUERY: pivot sur le tag symbol
+            start = to_ns(params["start"])
+            columns = {}
+            for symbol in params["symbols"]:
+                frame = self._frame(params["measurement"], symbol, [params["field"]], start)
+                if not frame.empty:
+                    columns[symbol] = frame[params["field"]]
+            frame = pd.DataFrame(columns).sort_index()
+        elif "fields" in params:
+            # SERIES_QUERY
+            frame = self._frame(params["measurement"], params["symbol"], params["fields"], to_ns(params["start"]))
+        else:
+            # HORIZON_QUERY
+            frame = self._frame("predictions", params["symbol"], ["predicted_close", "model", "run_date"],
+                                to_ns(params["start"]), to_ns(params["stop"]))
+        return _to_flux_csv(frame)
+
+
+def _to_flux_csv(frame):
+    """DataFrame indexé en ns → CSV Flux brut (,result,table,_time,...)"""
+    if frame.empty:
+        return b""
+    out = frame.copy()
+    out.insert(0, "_time", pd.DatetimeIndex(out.index.to_numpy(dtype="int64").view("M8[ns]"))
+               .strftime("%Y-%m-%dT%H:%M:%SZ"))
+    out.insert(0, "table", 0)
+    out.insert(0, "result", "_result")
+    out.insert(0, "", "")
+    return out.to_csv(index=False).encode("utf-8")
+
+
+class FakeTimeSeries:
+    """
+    alpha_vantage.timeseries.TimeSeries (output_format="pandas") hors ligne
+
+    get_daily() renvoie les colonnes "1. open" ... "5. volume", dates
+    décroissantes, 100 barres en compact et tout l'historique en full.
+    """
+
+    latency = 0.0
+    calls = 0
+    history_days = 1000
+
+    def __init__(self, key=None, output_format="pandas", **kwargs):
+        self.output_format = output_format
+
+    def get_daily(self, symbol, outputsize="compact"):
+        if self.latency:
+            time.sleep(self.latency)
+        type(self).calls += 1
+        df = synthetic_prices(symbol, days=self.history_days)
+        if outputsize == "compact":
+            df = df.iloc[-100:]
+        close = df['close']
+        daily = pd.DataFrame({
+            "1. open": close.shift(1).fillna(close),
+            "2. high": close * 1.01,
+            "3. low": close * 0.99,
+            "4. close": close,
+            "5. volume": 1_000_000.0,
+        }, index=df.index.rename("date")).iloc[::-1]
+        meta = {"1. Information": "Daily Prices (synthetic)", "2. Symbol": symbol}
+        return daily, meta
+
+
+def install(influx=None, time_series=FakeTimeSeries):
+    """
+    Branche les faux services à la place des vrais (process courant)
+
+    Avec le stockage InfluxDB, le client synchrone et les deux écrivains
+    (marché, file de prédictions) pointent ensuite sur `influx`; les
+    autres backends sont utilisés tels quels. Alpha Vantage → `time_series`.
+    """
+    from influxdb_client_local import storage
+    import fetch_api
+
+    fetch_api.TimeSeries = time_series
+    if storage.name != "influx":
+        return None
+
+    influx = influx or FakeInfluxDB()
+    storage.query_api = influx
+    storage.write_api = influx
+    storage.delete_api = influx
+    storage.market_writer.write_api = influx
+    storage.prediction_queue.writer.write_api = influx
+    return influx
@@ -0,0 +1,278 @@
+# backend/benchmarks/suite.py
+import io
+import glob
+import os
+import time
+import asyncio
+import statistics
+from contextlib import contextmanager, redirect_stdout
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fakes import synthetic_prices, install
+
+HISTORY_DAYS = 1300             # ≈ 5 ans de barres: couvre le lookback des backtests
+TRAIN_LENGTHS = (60, 250, 1000)
+TRAIN_ORDERS = ((1, 1, 1), (2, 1, 2), (5, 1, 0))
+WRITE_SIZES = (1_000, 20_000)
+PREDICT_CONCURRENCY = 32
+PREDICT_CACHED_REQUESTS = 400
+PREDICT_UNCACHED_ROUNDS = 3
+NETWORK_LATENCY = 0.002         # aller-retour InfluxDB simulé pour /predict (s, faux InfluxDB seulement)
+CONCURRENT_TOLERANCE = 0.5      # scénarios concurrents: plus bruités
+CALIBRATION_SIZE = 160          # charge de référence: système linéaire + boucle Python
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Enregistre une fonction de benchmark: fn(ctx) -> {métrique: résultat}"""
+    def decorator(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return decorator
+
+
+@contextmanager
+def quiet():
+    """Le pipeline est bavard: sa sortie n'est pas mesurée"""
+    with redirect_stdout(io.StringIO()):
+        yield
+
+
+def measure(fn, repeat, warmup=1, setup=None):
+    """Durées (s) de `repeat` appels de fn, après `warmup` appels non comptés"""
+    samples = []
+    for i in range(warmup + repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            samples.append(elapsed)
+    return samples
+
+
+def latency(samples, tolerance=None):
+    """Durées (s) → métrique "médiane en ms" (+ p95/min pour le rapport)"""
+    ms = np.asarray(samples) * 1000
+    result = {
+        "value": round(float(np.median(ms)), 3),
+        "unit": "ms",
+        "better": "lower",
+        "p95": round(float(np.percentile(ms, 95)), 3),
+        "min": round(float(ms.min()), 3),
+        "n": len(ms),
+    }
+    if tolerance is not None:
+        result["tolerance"] = tolerance
+    return result
+
+
+def rate(value, unit, tolerance=None):
+    result = {"value": round(float(value), 1), "unit": unit, "better": "higher"}
+    if tolerance is not None:
+        result["tolerance"] = tolerance
+    return result
+
+
+def _reference_workload():
+    rng = np.random.default_rng(0)
+    a = rng.normal(size=(CALIBRATION_SIZE, CALIBRATION_SIZE)) + CALIBRATION_SIZE * np.eye(CALIBRATION_SIZE)
+    np.linalg.solve(a, rng.normal(size=CALIBRATION_SIZE))
+    total = 0.0
+    for i in range(100_000):
+        total += i % 7
+    return total
+
+
+def calibrate(repeat):
+    """
+    Vitesse de la machine pendant ce run: médiane (ms) d'une charge fixe
+
+    Mesurée avant et après les benchmarks; le rapport à la calibration de
+    la baseline ramène celle-ci à la machine (et à la charge) du moment.
+    """
+    return float(np.median(np.asarray(measure(_reference_workload, repeat=repeat)) * 1000))
+
+
+class Context:
+    """
+    Stockage configuré (InfluxDB → faux en mémoire) + Alpha Vantage factice,
+    marchés chargés avec des séries synthétiques
+    """
+
+    def __init__(self, repeat=5):
+        from main import SUPPORTED_MARKETS
+        from influxdb_client_local import storage
+        from arima.order_selection import DEFAULT_ORDER, set_order
+
+        self.repeat = repeat
+        self.storage = storage
+        self.symbols = [m["symbol"] for m in SUPPORTED_MARKETS]
+        self.influx = install()     # None avec un backend local (SQLite)
+        self.history = {}
+        for symbol in self.symbols:
+            self.history[symbol] = synthetic_prices(symbol, days=HISTORY_DAYS)
+            storage.write_bars(symbol, self.history[symbol])
+            # Ordre connu: pas de recherche d'ordre en arrière-plan pendant les mesures
+            set_order(symbol, DEFAULT_ORDER)
+
+    def reset_predictions(self, symbols):
+        """Oublie toute prévision (mémoire, stockage, registre de modèles)"""
+        from forecast_cache import forecast_cache
+        from arima.model_store import model_store
+        from arima.model_registry import MODEL_DIR
+
+        self.storage.flush()
+        self.storage.delete("predictions")
+        forecast_cache.invalidate()
+        for symbol in symbols:
+            model_store.drop(symbol)
+            for path in glob.glob(os.path.join(MODEL_DIR, f"{symbol}_*.npz")):
+                os.remove(path)
+
+
+@benchmark("train_arima")
+def bench_train_arima(ctx):
+    from arima.train_arima import train_arima
+
+    closes = ctx.history[ctx.symbols[0]]
+    results = {}
+    for n in TRAIN_LENGTHS:
+        df = closes.iloc[-n:]
+        for order in TRAIN_ORDERS:
+            with quiet():
+                samples = measure(lambda: train_arima(df, order=order, evaluate=False), repeat=max(ctx.repeat // 2, 3))
+            results[f"train_arima[n={n},order={order}]"] = latency(samples)
+    return results
+
+
+@benchmark("influx_decode")
+def bench_influx_decode(ctx):
+    import local_cache
+    from influxdb_client_local import get_close_from_influx, query_panel
+
+    symbol = ctx.symbols[0]
+    results = {}
+    for lookback in (100, 5 * 365):
+        with quiet():
+            samples = measure(lambda: get_close_from_influx(symbol, lookback_days=lookback),
+                              repeat=ctx.repeat * 4, setup=lambda: local_cache.invalidate(symbol))
+        results[f"get_close_from_influx[lookback={lookback}]"] = latency(samples)
+
+    if ctx.influx is not None:
+        from influx_storage import read_csv_frame
+
+        # Décodage seul du CSV multi-symboles (matrice dates × symboles)
+        payload = ctx.influx.query_raw(params={
+            "measurement": "stock_prices", "field": "close", "symbols": ctx.symbols,
+            "start": pd.Timestamp("1970-01-01"),
+        }).data
+        samples = measure(lambda: read_csv_frame(payload, ctx.symbols), repeat=ctx.repeat * 4)
+        results[f"read_csv_frame[panel={len(ctx.symbols)}x{HISTORY_DAYS}]"] = latency(samples)
+
+    with quiet():
+        samples = measure(lambda: query_panel(ctx.symbols, lookback_days=5 * 365), repeat=ctx.repeat * 4)
+    results[f"query_panel[symbols={len(ctx.symbols)},lookback={5 * 365}]"] = latency(samples)
+    return results
+
+
+@benchmark("write_market_dataframe")
+def bench_write_market_dataframe(ctx):
+    import local_cache
+    from influxdb_client_local import write_market_dataframe
+
+    symbol = "BENCHW"
+    results = {}
+    for rows in WRITE_SIZES:
+        df = synthetic_prices(symbol, days=rows)
+
+        def setup():
+            ctx.storage.delete("stock_prices", symbol)
+            local_cache.invalidate(symbol)
+
+        with quiet():
+            samples = measure(lambda: write_market_dataframe(symbol, df), repeat=ctx.repeat, setup=setup)
+        results[f"write_market_dataframe[rows={rows}]"] = latency(samples)
+        results[f"write_market_dataframe[rows={rows}].rows_per_second"] = rate(rows / statistics.median(samples), "rows/s")
+    return results
+
+
+@benchmark("ensure_data_cold")
+def bench_ensure_data_cold(ctx):
+    """Symbole inconnu: Alpha Vantage (faux) → delta → écriture → ≥30 jours"""
+    from fetch_api import fetch_and_ensure_30_days
+
+    counter = iter(range(10_000))
+    with quiet():
+        samples = measure(lambda: fetch_and_ensure_30_days(f"COLD{next(counter)}"), repeat=ctx.repeat * 2)
+    return {"fetch_and_ensure_30_days[cold]": latency(samples)}
+
+
+async def _load(app, paths, concurrency):
+    """Requêtes concurrentes sur l'app ASGI; retourne (durées, codes, durée totale)"""
+    import httpx
+
+    semaphore = asyncio.Semaphore(concurrency)
+    durations, statuses = [], []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one(path):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path)
+                durations.append(time.perf_counter() - start)
+                statuses.append(response.status_code)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(p) for p in paths))
+        return durations, statuses, time.perf_counter() - start
+
+
+def _check(statuses, scenario):
+    failed = [s for s in statuses if s != 200]
+    if failed:
+        raise RuntimeError(f"{scenario}: {len(failed)}/{len(statuses)} réponses en erreur ({sorted(set(failed))})")
+
+
+@benchmark("predict")
+def bench_predict(ctx):
+    """
+    /predict de bout en bout (app ASGI; faux InfluxDB avec latence réseau)
+
+    - uncached: aucune prévision stockée ni modèle en registre, un appel
+      par marché en parallèle; ARIMA dans la requête (budget large)
+    - cached: prévisions en cache mémoire, PREDICT_CONCURRENCY clients
+    """
+    from main import app
+
+    if ctx.influx is not None:
+        ctx.influx.latency = NETWORK_LATENCY
+    results = {}
+    try:
+        cold = [f"/predict/{s}?budget_ms=600000" for s in ctx.symbols]
+        durations, walls = [], []
+        for _ in range(PREDICT_UNCACHED_ROUNDS):
+            ctx.reset_predictions(ctx.symbols)
+            with quiet():
+                samples, statuses, wall = asyncio.run(_load(app, cold, len(cold)))
+            _check(statuses, "predict uncached")
+            durations.extend(samples)
+            walls.append(wall)
+        results[f"predict[uncached,concurrency={len(cold)}]"] = latency(durations, CONCURRENT_TOLERANCE)
+        results[f"predict[uncached,concurrency={len(cold)}].wall"] = latency(walls, CONCURRENT_TOLERANCE)
+
+        paths = [f"/predict/{ctx.symbols[i % len(ctx.symbols)]}" for i in range(PREDICT_CACHED_REQUESTS)]
+        with quiet():
+            samples, statuses, wall = asyncio.run(_load(app, paths, PREDICT_CONCURRENCY))
+        _check(statuses, "predict cached")
+        results[f"predict[cached,concurrency={PREDICT_CONCURRENCY}]"] = latency(samples, CONCURRENT_TOLERANCE)
+        results[f"predict[cached,concurrency={PREDICT_CONCURRENCY}].requests_per_second"] = rate(
+            len(paths) / wall, "req/s", CONCURRENT_TOLERANCE)
+    finally:
+        if ctx.influx is not None:
+            ctx.influx.latency = 0.0
+    return results
@@ -0,0 +1,98 @@
+# backend/broadcaster.py
+import asyncio
+import threading
+import itertools
+
+SUBSCRIBER_QUEUE_SIZE = 100     # événements en attente par client (les plus anciens sont abandonnés)
+
+
+class Subscription:
+    """File d'événements d'un client, liée à sa boucle asyncio"""
+
+    def __init__(self, symbols, loop, maxsize=SUBSCRIBER_QUEUE_SIZE):
+        self.symbols = {s.upper() for s in symbols} if symbols else None  # None = tous
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def wants(self, symbol):
+        return self.symbols is None or symbol is None or symbol.upper() in self.symbols
+
+    def _offer(self, event):
+        # Exécuté dans la boucle du client
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class Broadcaster:
+    """
+    Diffusion des événements (nouvelles barres, progression, prédictions)
+    vers tous les clients abonnés au symbole
+
+    publish() peut être appelé depuis n'importe quel thread (requêtes,
+    ARIMA en arrière-plan, précalcul): chaque événement est remis dans
+    la boucle asyncio de l'abonné. Les écouteurs internes (add_listener)
+    sont appelés directement, dans le thread qui publie.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._listeners = []
+        self.published = 0
+
+    def subscribe(self, symbols=None):
+        """Nouvel abonnement (à appeler depuis la boucle asyncio du client)"""
+        sub = Subscription(symbols, asyncio.get_running_loop())
+        with self._lock:
+            sub.id = next(self._ids)
+            self._subscribers[sub.id] = sub
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.pop(sub.id, None)
+
+    def add_listener(self, callback):
+        """Écouteur du process (caches dérivés): callback(message) pour chaque événement"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def publish(self, event, data, symbol=None):
+        """Envoie {"event", "symbol", "data"} aux abonnés concernés"""
+        message = {"event": event, "symbol": symbol, "data": data}
+        with self._lock:
+            targets = [s for s in self._subscribers.values() if s.wants(symbol)]
+            listeners = list(self._listeners)
+            self.published += 1
+
+        for callback in listeners:
+            try:
+                callback(message)
+            except Exception as e:
+                print(f"⚠️ Écouteur {event} en échec: {e}")
+
+        for sub in targets:
+            try:
+                sub.loop.call_soon_threadsafe(sub._offer, message)
+            except RuntimeError:
+                # Boucle fermée: client parti sans se désabonner
+                self.unsubscribe(sub)
+
+    def stats(self):
+        with self._lock:
+            subs = list(self._subscribers.values())
+        return {
+            "subscribers": len(subs),
+            "published": self.published,
+            "dropped": sum(s.dropped for s in subs),
+        }
+
+
+broadcaster = Broadcaster()
@@ -0,0 +1,124 @@
+# backend/circuit_breaker.py
+import time
+import asyncio
+import threading
+
+BREAKER_FAILURE_THRESHOLD = 5   # échecs consécutifs avant ouverture
+BREAKER_RESET_TIMEOUT = 30.0    # secondes avant un essai (demi-ouvert)
+
+
+class CircuitOpenError(Exception):
+    """Appel refusé sans tentative: le service est considéré indisponible"""
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur pour un service distant (InfluxDB)
+
+    - fermé: les appels passent, les échecs consécutifs sont comptés
+    - ouvert: après `failure_threshold` échecs, les appels échouent
+      immédiatement (CircuitOpenError) pendant `reset_timeout` secondes
+    - demi-ouvert: un seul appel d'essai; succès → fermé, échec → ouvert
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+        self.rejected = 0
+        self.trips = 0
+        self.last_error = None
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """Vrai si un appel peut être tenté maintenant"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            # Délai écoulé: un seul appel d'essai à la fois
+            if self._probing:
+                self.rejected += 1
+                return False
+            self._state = self.HALF_OPEN
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                print(f"✅ Disjoncteur {self.name} refermé")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            self.last_error = str(error) if error is not None else None
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.trips += 1
+                    print(f"⛔ Disjoncteur {self.name} ouvert ({self._failures} échecs): {error}")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def check(self):
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} indisponible (disjoncteur ouvert)")
+
+    def call(self, fn, *args, **kwargs):
+        """Appel synchrone protégé"""
+        self.check()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    async def acall(self, fn, *args, **kwargs):
+        """Appel asynchrone protégé (fn renvoie une coroutine)"""
+        self.check()
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            # Annulé (timeout de l'appelant): libère l'essai sans conclure
+            with self._lock:
+                self._probing = False
+            raise
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    def stats(self):
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "last_error": self.last_error,
+            }
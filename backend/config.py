@@ -1 +1,27 @@
-"" 
+# backend/config.py
+import os
+
+# Variables d'environnement (ou fichier backend/.env, voir .env.example)
+try:
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
+except ImportError:
+    pass
+
+# Stockage: "influx" (serveur InfluxDB 2.x) ou "sqlite" (fichier local, sans serveur)
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "influx")
+
+# InfluxDB
+INFLUX_URL = os.environ.get("INFLUX_URL", "http://localhost:8086")
+INFLUX_TOKEN = os.environ.get("INFLUX_TOKEN", "")
+INFLUX_ORG = os.environ.get("INFLUX_ORG", "NOSQL")
+INFLUX_BUCKET = os.environ.get("INFLUX_BUCKET", "finance")
+
+# SQLite
+SQLITE_PATH = os.environ.get(
+    "SQLITE_PATH",
+    os.path.join(os.path.dirname(__file__), "data", "market.sqlite3")
+)
+
+# Alpha Vantage
+ALPHA_VANTAGE_API_KEY = os.environ.get("ALPHA_VANTAGE_API_KEY", "")
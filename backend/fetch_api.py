@@ -1,14 +1,44 @@
 # backend/fetch_api.py
 from alpha_vantage.timeseries import TimeSeries
 import pandas as pd
-import time
+import numpy as np
 from datetime import datetime, timedelta
-from influxdb_client_local import write_market_dataframe, get_close_from_influx
+from influxdb_client_local import write_market_dataframe, get_close_from_influx, get_high_water_mark
+from influx_writer import index_to_ns
+import local_cache
+from metrics import ALPHA_VANTAGE_SECONDS, FALLBACKS
+from tracing import span, traced
+from config import ALPHA_VANTAGE_API_KEY as API_KEY
+from ingestion import QuotaExceeded
 
-API_KEY = "VZYTGW0T2CHR5OJ1."
+def _get_daily(ts, symbol, outputsize=None, acquire=None):
+    """
+    Appel TimeSeries.get_daily chronométré
+    acquire(): jeton de quota pris avant chaque appel réel (peut lever QuotaExceeded)
+    """
+    if acquire is not None:
+        acquire()
+    kwargs = {"outputsize": outputsize} if outputsize else {}
+    with span("alpha_vantage.get_daily", outputsize=outputsize or "default"), \
+         ALPHA_VANTAGE_SECONDS.time(outputsize=outputsize or "default", status="error") as labels:
+        result = ts.get_daily(symbol=symbol, **kwargs)
+        labels["status"] = "ok"
+    return result
 
-def fetch_from_api(symbol):
-    """Récupère les données depuis Alpha Vantage"""
+@traced("alpha_vantage.fetch_from_api")
+def fetch_from_api(symbol, acquire=None):
+    """
+    Récupère les données depuis Alpha Vantage (une fois par jour, puis cache local)
+    
+    Args:
+        acquire: Limiteur appelé avant chaque appel API (compact, puis full, puis
+                 default en repli); QuotaExceeded est propagée à l'appelant
+    """
+    cached = local_cache.read_raw_response(symbol)
+    if cached is not None:
+        print(f"📂 Réponse Alpha Vantage du jour en cache pour {symbol} ({len(cached)} jours)")
+        return cached
+    
     try:
         print(f"📥 Fetch {symbol} depuis Alpha Vantage...")
         
@@ -16,15 +46,21 @@ def fetch_from_api(symbol):
         
         # Essayer compact d'abord
         try:
-            df, meta_data = ts.get_daily(symbol=symbol, outputsize="compact")
+            df, meta_data = _get_daily(ts, symbol, "compact", acquire)
             print(f"   Mode: compact (≈100 derniers jours)")
+        except QuotaExceeded:
+            raise
         except:
             # Fallback
+            FALLBACKS.inc(kind="alpha_vantage_full")
             try:
-                df, meta_data = ts.get_daily(symbol=symbol, outputsize="full")
+                df, meta_data = _get_daily(ts, symbol, "full", acquire)
                 print(f"   Mode: full (historique complet)")
+            except QuotaExceeded:
+                raise
             except:
-                df, meta_data = ts.get_daily(symbol=symbol)
+                FALLBACKS.inc(kind="alpha_vantage_default")
+                df, meta_data = _get_daily(ts, symbol, acquire=acquire)
                 print(f"   Mode: default")
         
         # Formater les données
@@ -42,25 +78,86 @@ def fetch_from_api(symbol):
         
         df.index = pd.to_datetime(df.index)
         df = df.sort_index()
+        local_cache.write_raw_response(symbol, df)
         
         print(f"✅ {len(df)} jours récupérés ({df.index.min().date()} → {df.index.max().date()})")
         return df
         
+    except QuotaExceeded:
+        raise
     except Exception as e:
         print(f"❌ Erreur fetch {symbol}: {e}")
         return pd.DataFrame()
 
+def compute_delta(fetched, existing=None, high_water=None):
+    """
+    Barres à écrire: nouvelles (après le high-water mark) ou modifiées
+    
+    Args:
+        fetched (DataFrame): Données reçues de l'API
+        existing (DataFrame): Données déjà lues depuis InfluxDB (optionnel)
+        high_water: Date de la dernière barre stockée (optionnel, ignorée
+                    sans données existantes: lecture en échec ou barres expirées)
+    
+    Returns:
+        DataFrame: Sous-ensemble de fetched à écrire
+    """
+    if fetched.empty:
+        return fetched
+    
+    fetched_ns = index_to_ns(fetched.index)
+    has_existing = existing is not None and not existing.empty
+    
+    # Rien de lisible en base: le high-water mark ne prouve pas que les barres
+    # antérieures sont stockées, tout réécrire (écriture idempotente)
+    if not has_existing:
+        return fetched
+    if high_water is None:
+        high_water = existing.index.max()
+    
+    hw_ns = index_to_ns([high_water])[0]
+    to_write = fetched_ns > hw_ns
+    
+    # Barres déjà couvertes: écrire seulement les manquantes ou modifiées
+    stored = pd.Series(existing['close'].to_numpy(), index=index_to_ns(existing.index))
+    stored = stored[~stored.index.duplicated(keep='last')]
+    old = ~to_write
+    previous = stored.reindex(fetched_ns[old]).to_numpy()
+    values = fetched['close'].to_numpy()[old]
+    to_write[old] = np.isnan(previous) | ~np.isclose(values, previous, rtol=0, atol=1e-6)
+    
+    return fetched[to_write]
+
+@traced("data.fetch_and_ensure_30_days")
 def fetch_and_ensure_30_days(symbol, min_days=30):
     """
     Garantit qu'on a au moins 30 jours de données
     1. Vérifie données existantes
     2. Si <30 jours → fetch API
-    3. Fusionne et stocke
+    3. Fusionne et stocke (barres nouvelles ou modifiées uniquement)
     4. Retourne ≥30 jours
     """
     print(f"\n🔄 Garantir {min_days} jours pour {symbol}")
     
     # 1. Vérifier données existantes
+    existing_data, enough = load_existing(symbol, min_days)
+    if enough:
+        return existing_data
+    
+    # 2. Fetch depuis API
+    print(f"📥 Données insuffisantes, fetch API...")
+    new_data = fetch_from_api(symbol)
+    
+    # 3-5. Fusionner, stocker, vérifier
+    return merge_and_store(symbol, existing_data, new_data, min_days)
+
+def load_existing(symbol, min_days=30):
+    """
+    Données existantes dans InfluxDB
+    
+    Returns:
+        tuple: (DataFrame, True si ≥ min_days jours → pas de fetch API)
+    """
     existing_data = get_close_from_influx(symbol)
     
     if not existing_data.empty:
@@ -69,17 +166,28 @@ def fetch_and_ensure_30_days(symbol, min_days=30):
         # Si déjà ≥30 jours, retourner
         if len(existing_data) >= min_days:
             print(f"✅ Suffisamment de données ({len(existing_data)} ≥ {min_days} jours)")
-            return existing_data
-    
-    # 2. Fetch depuis API
-    print(f"📥 Données insuffisantes, fetch API...")
-    new_data = fetch_from_api(symbol)
+            return existing_data, True
     
+    return existing_data, False
+
+def _to_utc(df):
+    """Index de dates en UTC (un index naïf est déjà en UTC, comme Point.time)"""
+    index = pd.DatetimeIndex(df.index)
+    index = index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+    return df.set_axis(index.rename(df.index.name))
+
+@traced("data.merge_and_store")
+def merge_and_store(symbol, existing_data, new_data, min_days=30):
+    """Fusionne les données API avec l'existant et stocke le delta"""
     if new_data.empty:
         print(f"❌ Échec fetch API")
         # Retourner données existantes même si insuffisantes
         return existing_data if not existing_data.empty else pd.DataFrame()
     
+    # Index de l'API / du cache brut naïf, celui du stockage en UTC:
+    # aligner avant toute comparaison de dates
+    new_data = _to_utc(new_data)
+    
     # 3. Fusionner
     if not existing_data.empty:
         combined = pd.concat([existing_data, new_data])
@@ -91,8 +199,13 @@ def fetch_and_ensure_30_days(symbol, min_days=30):
         combined = new_data
         print(f"📈 Nouvelles données: {len(combined)} jours")
     
-    # 4. Stocker
-    write_market_dataframe(symbol, combined)
+    # 4. Stocker (uniquement les barres nouvelles ou modifiées)
+    delta = compute_delta(new_data, existing_data, get_high_water_mark(symbol))
+    if delta.empty:
+        print(f"✅ Aucune barre nouvelle à écrire")
+    else:
+        print(f"💾 {len(delta)}/{len(new_data)} barres à écrire (nouvelles ou modifiées)")
+        write_market_dataframe(symbol, delta)
     
     # 5. Vérifier
     if len(combined) >= min_days:
@@ -103,19 +216,27 @@ def fetch_and_ensure_30_days(symbol, min_days=30):
     return combined
 
 def fetch_multiple_markets(markets, min_days=30):
-    """Récupère données pour plusieurs marchés avec garantie min_days"""
-    results = {}
+    """
+    Récupère données pour plusieurs marchés avec garantie min_days (scripts)
+    Depuis une boucle asyncio (FastAPI, lifespan): await afetch_multiple_markets(...)
+    """
+    import asyncio
     
-    for i, symbol in enumerate(markets):
-        print(f"\n[{i+1}/{len(markets)}] Traitement {symbol}")
-        
-        data = fetch_and_ensure_30_days(symbol, min_days)
-        results[symbol] = len(data) if not data.empty else 0
-        
-        # Attendre 15s entre les appels API
-        if i < len(markets) - 1:
-            print(f"⏳ Attente 15s...")
-            time.sleep(15)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(afetch_multiple_markets(markets, min_days=min_days))
+    raise RuntimeError("fetch_multiple_markets appelé dans une boucle asyncio: "
+                       "utiliser await afetch_multiple_markets(...)")
+
+async def afetch_multiple_markets(markets, min_days=30):
+    """
+    Version asynchrone de fetch_multiple_markets
+    Planificateur asyncio limité par les quotas Alpha Vantage (voir ingestion.py)
+    """
+    from ingestion import ingest_markets
+    
+    results = await ingest_markets(markets, min_days=min_days)
     
     # Résumé
     print(f"\n{'='*50}")
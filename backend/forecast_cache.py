@@ -0,0 +1,108 @@
+# backend/forecast_cache.py
+import time
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Configuration cache
+FORECAST_CACHE_TTL = 6 * 3600  # secondes
+FORECAST_CACHE_MAXSIZE = 256
+
+
+class ForecastCache:
+    """
+    Cache mémoire des prédictions (TTL + éviction LRU)
+
+    Clé: (symbol, date du dernier close observé, ordre du modèle)
+    Une entrée n'est servie que pour le jour où elle a été calculée.
+    """
+
+    def __init__(self, ttl=FORECAST_CACHE_TTL, maxsize=FORECAST_CACHE_MAXSIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (expires_at, day, result)
+        self._latest = {}              # symbol -> key la plus récente
+        self._lock = threading.Lock()
+
+    def get(self, symbol):
+        """Retourne la prédiction en cache pour le symbole, ou None"""
+        symbol = symbol.upper()
+        today = pd.Timestamp.now().normalize()
+
+        with self._lock:
+            key = self._latest.get(symbol)
+            entry = self._entries.get(key) if key is not None else None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, day, result = entry
+            if expires_at < time.monotonic() or day != today:
+                self._drop(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(result)
+
+    def put(self, symbol, last_date, order, result):
+        """Stocke une prédiction calculée pour aujourd'hui"""
+        symbol = symbol.upper()
+        key = (symbol, pd.Timestamp(last_date).normalize(), tuple(order) if order else None)
+        today = pd.Timestamp.now().normalize()
+
+        with self._lock:
+            previous = self._latest.get(symbol)
+            if previous is not None and previous != key:
+                self._entries.pop(previous, None)
+
+            self._entries[key] = (time.monotonic() + self.ttl, today, dict(result))
+            self._entries.move_to_end(key)
+            self._latest[symbol] = key
+
+            while len(self._entries) > self.maxsize:
+                oldest, _ = self._entries.popitem(last=False)
+                if self._latest.get(oldest[0]) == oldest:
+                    del self._latest[oldest[0]]
+                self.evictions += 1
+
+    def invalidate(self, symbol=None):
+        """Invalide un symbole (nouvelles barres) ou tout le cache"""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+                self._latest.clear()
+                return
+
+            symbol = symbol.upper()
+            for key in [k for k in self._entries if k[0] == symbol]:
+                self._drop(key)
+
+    def stats(self):
+        """Compteurs hit/miss"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def _drop(self, key):
+        self._entries.pop(key, None)
+        if self._latest.get(key[0]) == key:
+            del self._latest[key[0]]
+
+
+# Instance partagée par le process
+forecast_cache = ForecastCache()
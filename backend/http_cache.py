@@ -0,0 +1,90 @@
+# backend/http_cache.py
+import gzip
+import json
+import hashlib
+
+import pandas as pd
+from fastapi.responses import Response
+
+from precompute import next_slot
+
+# Encodeur JSON rapide (optionnel): json standard sinon
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+GZIP_MIN_SIZE = 512         # octets: en dessous, la compression ne gagne rien
+GZIP_LEVEL = 5
+FAST_TIER_MAX_AGE = 60      # prévision rapide: remplacée par ARIMA dès la fin du fit
+
+
+def dumps(payload):
+    """dict → JSON (bytes), types NumPy / dates compris"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=str,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=str, separators=(",", ":")).encode("utf-8")
+
+
+def etag(*parts, weak=False):
+    """
+    ETag: empreinte des éléments qui identifient la représentation
+
+    Fort: mêmes éléments = mêmes octets. Faible (W/): même contenu, mais
+    des champs annexes du corps (provenance...) peuvent différer.
+    """
+    digest = hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def seconds_until_next_update(now=None):
+    """Secondes avant le prochain précalcul (nouvelle séance, prévisions du jour)"""
+    now = pd.Timestamp(now or pd.Timestamp.now())
+    return max(0, int((next_slot(now) - now).total_seconds()))
+
+
+def cache_control(max_age):
+    return f"public, max-age={max_age}" if max_age > 0 else "no-cache"
+
+
+def _gzip_tag(tag):
+    # Représentation compressée = autres octets, donc autre ETag fort
+    return tag[:-1] + '-gzip"'
+
+
+def _matches(request, tag):
+    """If-None-Match (comparaison faible, RFC 9110)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {t.strip().removeprefix("W/") for t in header.split(",")}
+    tag = tag.removeprefix("W/")
+    return tag in candidates or _gzip_tag(tag) in candidates
+
+
+def cached_json(request, payload, tag, max_age=0):
+    """
+    Réponse JSON conditionnelle
+
+    - 304 sans corps si If-None-Match correspond à l'ETag
+    - sinon JSON encodé (orjson), compressé en gzip au-delà de
+      GZIP_MIN_SIZE si le client l'accepte
+
+    Args:
+        payload (dict): Corps de la réponse (non encodé pour un 304)
+        tag (str): ETag de la représentation (etag(...))
+        max_age (int): Durée de fraîcheur côté client, 0 = revalider à chaque fois
+    """
+    headers = {"ETag": tag, "Cache-Control": cache_control(max_age), "Vary": "Accept-Encoding"}
+    if _matches(request, tag):
+        return Response(status_code=304, headers=headers)
+
+    body = dumps(payload)
+    if len(body) >= GZIP_MIN_SIZE and "gzip" in request.headers.get("accept-encoding", ""):
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        headers["ETag"] = _gzip_tag(tag)
+        headers["Content-Encoding"] = "gzip"
+    return Response(body, media_type="application/json", headers=headers)
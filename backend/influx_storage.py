@@ -0,0 +1,309 @@
+# backend/influx_storage.py
+import io
+import re
+import atexit
+from datetime import timedelta, timezone
+
+import pandas as pd
+from influxdb_client import InfluxDBClient
+from influxdb_client.client.influxdb_client_async import InfluxDBClientAsync
+from influxdb_client.client.write_api import SYNCHRONOUS
+from influxdb_client.domain.dialect import Dialect
+
+import config
+from storage import StorageBackend
+from tracing import traced
+from influx_writer import (
+    BatchingWriter,
+    WriteBehindQueue,
+    dataframe_to_line_protocol,
+    predictions_to_line_protocol
+)
+
+INFLUX_TIMEOUT_MS = 10_000      # une requête lente ne bloque pas un worker plus longtemps
+INFLUX_POOL_SIZE = 20           # connexions HTTP simultanées par client
+
+# Valeurs admises dans un prédicat de suppression (l'API delete n'a pas de paramètres)
+PREDICATE_VALUE = re.compile(r"[A-Za-z0-9._^=-]+")
+
+# Requête paramétrée: aucune valeur interpolée dans le texte Flux
+SERIES_QUERY = '''
+from(bucket: params.bucket)
+  |> range(start: params.start)
+  |> filter(fn: (r) => r._measurement == params.measurement)
+  |> filter(fn: (r) => r.symbol == params.symbol)
+  |> filter(fn: (r) => contains(value: r._field, set: params.fields))
+  |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
+  |> group()
+  |> drop(columns: ["_start", "_stop", "_measurement", "symbol"])
+  |> sort(columns: ["_time"])
+'''
+
+# Plusieurs symboles en une requête: une colonne par symbole (dates × symboles)
+PANEL_QUERY = '''
+from(bucket: params.bucket)
+  |> range(start: params.start)
+  |> filter(fn: (r) => r._measurement == params.measurement)
+  |> filter(fn: (r) => r._field == params.field)
+  |> filter(fn: (r) => contains(value: r.symbol, set: params.symbols))
+  |> pivot(rowKey: ["_time"], columnKey: ["symbol"], valueColumn: "_value")
+  |> group()
+  |> drop(columns: ["_start", "_stop", "_measurement", "_field"])
+  |> sort(columns: ["_time"])
+'''
+
+# Courbe de prévision stockée (une ligne par date cible)
+HORIZON_QUERY = '''
+from(bucket: params.bucket)
+  |> range(start: params.start, stop: params.stop)
+  |> filter(fn: (r) => r._measurement == "predictions")
+  |> filter(fn: (r) => r.symbol == params.symbol)
+  |> filter(fn: (r) => r._field == "predicted_close" or r._field == "model" or r._field == "run_date")
+  |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
+  |> group()
+  |> keep(columns: ["_time", "predicted_close", "model", "run_date"])
+  |> sort(columns: ["_time"])
+'''
+
+HORIZON_FIELDS = ["predicted_close", "model", "run_date"]
+
+# Prédictions de plusieurs symboles (une ligne par symbole et date cible)
+PREDICTION_PANEL_QUERY = '''
+from(bucket: params.bucket)
+  |> range(start: params.start, stop: params.stop)
+  |> filter(fn: (r) => r._measurement == "predictions")
+  |> filter(fn: (r) => contains(value: r.symbol, set: params.symbols))
+  |> filter(fn: (r) => r._field == "predicted_close" or r._field == "model")
+  |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
+  |> group()
+  |> keep(columns: ["_time", "symbol", "predicted_close", "model"])
+  |> sort(columns: ["_time"])
+'''
+
+LAST_BAR_QUERY = '''
+from(bucket: params.bucket)
+  |> range(start: 0)
+  |> filter(fn: (r) => r._measurement == "stock_prices")
+  |> filter(fn: (r) => r.symbol == params.symbol)
+  |> filter(fn: (r) => r._field == "close")
+  |> last()
+'''
+
+LATEST_PREDICTION_QUERY = '''
+from(bucket: params.bucket)
+  |> range(start: params.start)
+  |> filter(fn: (r) => r._measurement == "predictions")
+  |> filter(fn: (r) => r.symbol == params.symbol)
+  |> filter(fn: (r) => r._field == "predicted_close")
+  |> sort(columns: ["_time"], desc: true)
+  |> limit(n: 1)
+'''
+
+# CSV brut sans annotations: décodé d'un bloc par le parseur C de pandas
+CSV_DIALECT = Dialect(header=True, annotations=[], delimiter=",", comment_prefix="#", date_time_format="RFC3339")
+
+
+@traced("influx.decode_csv")
+def read_csv_frame(payload, fields):
+    """CSV Flux → DataFrame indexé par date (UTC), colonnes = fields (NaN si absente)"""
+    wanted = set(fields)
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    try:
+        frame = pd.read_csv(io.BytesIO(payload), usecols=lambda c: c == "_time" or c in wanted)
+    except (pd.errors.EmptyDataError, ValueError):
+        return pd.DataFrame()
+
+    if frame.empty or "_time" not in frame:
+        return pd.DataFrame()
+
+    frame = frame.reindex(columns=["_time", *fields])
+    frame.index = pd.DatetimeIndex(pd.to_datetime(frame.pop("_time"), utc=True, format="ISO8601"), name="date")
+    return frame.sort_index()
+
+
+def _utc(value):
+    """Date → datetime UTC (naïf = UTC, comme Point.time)"""
+    value = pd.Timestamp(value)
+    return (value.tz_localize("UTC") if value.tzinfo is None else value.tz_convert("UTC")).to_pydatetime()
+
+
+class InfluxStorage(StorageBackend):
+    """
+    InfluxDB 2.x (serveur distant)
+
+    - lectures: requêtes Flux paramétrées, pivot côté serveur, CSV brut
+    - barres: line protocol par lots avec retry (BatchingWriter)
+    - prédictions: file d'écriture différée, groupée entre requêtes
+    - client asynchrone pour la boucle FastAPI (ouvert par le lifespan)
+    """
+
+    name = "influx"
+
+    def __init__(self, url=None, token=None, org=None, bucket=None, breaker=None):
+        self.url = url or config.INFLUX_URL
+        self.org = org or config.INFLUX_ORG
+        self.bucket = bucket or config.INFLUX_BUCKET
+        self._token = token if token is not None else config.INFLUX_TOKEN
+        if not self._token:
+            print("⚠️ INFLUX_TOKEN non défini (voir backend/.env.example)")
+
+        # Client synchrone (threads, pool ARIMA, scripts)
+        self.client = InfluxDBClient(url=self.url, token=self._token, org=self.org,
+                                     timeout=INFLUX_TIMEOUT_MS, connection_pool_maxsize=INFLUX_POOL_SIZE)
+        self.write_api = self.client.write_api(write_options=SYNCHRONOUS)
+        self.query_api = self.client.query_api()
+        self.delete_api = self.client.delete_api()
+        self.async_client = None
+
+        self.market_writer = BatchingWriter(self.write_api, self.bucket, org=self.org,
+                                            breaker=breaker, name="market")
+        # Prédictions: écriture différée (vidée à l'arrêt)
+        self.prediction_queue = WriteBehindQueue(BatchingWriter(self.write_api, self.bucket, org=self.org,
+                                                                flush_interval=0, breaker=breaker,
+                                                                name="predictions"))
+        atexit.register(self.prediction_queue.close)
+
+        print(f"✅ Client InfluxDB connecté à {self.url}")
+
+    # ----- lectures -----
+
+    def _series_params(self, symbol, lookback_days, fields, measurement):
+        return {
+            "bucket": self.bucket,
+            "start": timedelta(days=-lookback_days),
+            "measurement": measurement,
+            "symbol": symbol,
+            "fields": list(fields),
+        }
+
+    def _horizon_params(self, symbol, start, stop):
+        return {"bucket": self.bucket, "symbol": symbol, "start": _utc(start), "stop": _utc(stop)}
+
+    def _raw(self, query, params):
+        return self.query_api.query_raw(query=query, org=self.org, dialect=CSV_DIALECT, params=params).data
+
+    def read_series(self, symbol, lookback_days=100, fields=("close",), measurement="stock_prices"):
+        fields = list(fields)
+        payload = self._raw(SERIES_QUERY, self._series_params(symbol, lookback_days, fields, measurement))
+        return read_csv_frame(payload, fields)
+
+    def read_panel(self, symbols, lookback_days=100, field="close", measurement="stock_prices"):
+        symbols = list(symbols)
+        params = {
+            "bucket": self.bucket,
+            "start": timedelta(days=-lookback_days),
+            "measurement": measurement,
+            "field": field,
+            "symbols": symbols,
+        }
+        return read_csv_frame(self._raw(PANEL_QUERY, params), symbols)
+
+    def read_horizon(self, symbol, start, stop):
+        payload = self._raw(HORIZON_QUERY, self._horizon_params(symbol, start, stop))
+        return read_csv_frame(payload, HORIZON_FIELDS)
+
+    def read_prediction_panel(self, symbols, start, stop):
+        params = {"bucket": self.bucket, "symbols": list(symbols), "start": _utc(start), "stop": _utc(stop)}
+        return read_csv_frame(self._raw(PREDICTION_PANEL_QUERY, params), ["symbol", "predicted_close", "model"])
+
+    def last_bar(self, symbol):
+        result = self.query_api.query(query=LAST_BAR_QUERY, org=self.org,
+                                      params={"bucket": self.bucket, "symbol": symbol})
+        for table in result:
+            for record in table.records:
+                return pd.Timestamp(record.get_time())
+        return None
+
+    def latest_prediction(self, symbol, since):
+        result = self.query_api.query(query=LATEST_PREDICTION_QUERY, org=self.org,
+                                      params={"bucket": self.bucket, "symbol": symbol, "start": _utc(since)})
+        for table in result:
+            for record in table.records:
+                return record.get_value()
+        return None
+
+    # ----- écritures -----
+
+    def write_bars(self, symbol, df, batch_size=None):
+        """Line protocol vectorisé + écriture par lots; retourne (lignes, lignes non écrites)"""
+        lines = dataframe_to_line_protocol("stock_prices", df, field="close", tags={"symbol": symbol})
+        failed = self.market_writer.write_lines(lines.tolist(), batch_size=batch_size, sync=True)
+        return len(lines), failed
+
+    def write_predictions(self, symbol, dates, predictions, model="ARIMA", run_date=None, wait=False):
+        """Mise en file: visibles au prochain flush de prediction_queue (wait=True: attend ce flush)"""
+        lines = predictions_to_line_protocol(symbol, dates, predictions, model=model, run_date=run_date)
+        self.prediction_queue.put(lines, wait=wait)
+
+    def delete(self, measurement, symbol=None):
+        for value in (measurement, symbol):
+            if value is not None and not PREDICATE_VALUE.fullmatch(value):
+                raise ValueError(f"Valeur invalide dans le prédicat de suppression: {value!r}")
+        predicate = f'_measurement="{measurement}"'
+        if symbol is not None:
+            predicate += f' AND symbol="{symbol}"'
+        self.delete_api.delete("1970-01-01T00:00:00Z", pd.Timestamp.now(tz=timezone.utc).to_pydatetime(),
+                               predicate, bucket=self.bucket, org=self.org)
+
+    # ----- cycle de vie -----
+
+    def ping(self):
+        if not self.client.ping():
+            raise ConnectionError(f"InfluxDB injoignable ({self.url})")
+
+    def flush(self):
+        self.market_writer.flush()
+        self.prediction_queue.flush()
+
+    def close(self):
+        self.market_writer.flush()
+        self.prediction_queue.close()
+
+    def pending_writes(self):
+        return self.prediction_queue.stats()["queue_depth"]
+
+    def stats(self):
+        return {
+            "backend": self.name,
+            "url": self.url,
+            "bucket": self.bucket,
+            "predictions": self.prediction_queue.stats(),
+            "market_data": self.market_writer.stats(),
+        }
+
+    # ----- asynchrone -----
+
+    async def open_async(self):
+        """Client asynchrone et son pool de connexions (dans la boucle de l'API)"""
+        if self.async_client is None:
+            self.async_client = InfluxDBClientAsync(url=self.url, token=self._token, org=self.org,
+                                                    timeout=INFLUX_TIMEOUT_MS,
+                                                    connection_pool_maxsize=INFLUX_POOL_SIZE)
+        return self.async_client
+
+    async def close_async(self):
+        if self.async_client is not None:
+            await self.async_client.close()
+            self.async_client = None
+
+    async def _araw(self, query, params):
+        if self.async_client is None:
+            raise RuntimeError("Client InfluxDB asynchrone non ouvert")
+        return await self.async_client.query_api().query_raw(query=query, org=self.org,
+                                                             dialect=CSV_DIALECT, params=params)
+
+    async def aread_series(self, symbol, lookback_days=100, fields=("close",), measurement="stock_prices"):
+        fields = list(fields)
+        payload = await self._araw(SERIES_QUERY, self._series_params(symbol, lookback_days, fields, measurement))
+        return read_csv_frame(payload, fields)
+
+    async def aread_horizon(self, symbol, start, stop):
+        payload = await self._araw(HORIZON_QUERY, self._horizon_params(symbol, start, stop))
+        return read_csv_frame(payload, HORIZON_FIELDS)
+
+    async def aping(self):
+        if self.async_client is None:
+            return await super().aping()
+        if not await self.async_client.ping():
+            raise ConnectionError(f"InfluxDB injoignable ({self.url})")
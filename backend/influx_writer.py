@@ -0,0 +1,385 @@
+# backend/influx_writer.py
+import time
+import queue
+import threading
+import numpy as np
+import pandas as pd
+from metrics import INFLUX_WRITE_SECONDS, INFLUX_WRITE_ROWS
+
+# Configuration écriture par lots
+WRITE_BATCH_SIZE = 5000         # lignes par requête HTTP
+WRITE_FLUSH_INTERVAL = 1.0      # secondes (flush automatique en arrière-plan)
+WRITE_MAX_RETRIES = 5
+WRITE_RETRY_INTERVAL = 0.5      # secondes, premier délai
+WRITE_RETRY_MAX_DELAY = 30.0
+WRITE_EXPONENTIAL_BASE = 2
+
+# File d'écriture différée (prédictions)
+WRITE_BEHIND_MAX_DELAY = 0.2    # secondes d'attente max pour grouper les écritures
+WRITE_BEHIND_MAX_QUEUE = 10000  # envois en attente avant de bloquer les producteurs
+WRITE_BEHIND_CLOSE_TIMEOUT = 10.0
+
+
+def _escape_tag(value):
+    """Échappement line protocol des clés/valeurs de tag"""
+    return str(value).replace("\\", "\\\\").replace(",", "\\,").replace("=", "\\=").replace(" ", "\\ ")
+
+
+def index_to_ns(index):
+    """Dates → int64 ns UTC (index naïf = UTC, comme Point.time)"""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    return index.as_unit("ns").asi8
+
+
+def dataframe_to_line_protocol(measurement, df, field="close", tags=None):
+    """
+    Sérialise un DataFrame en line protocol en une passe vectorisée
+
+    Exemple de ligne: stock_prices,symbol=AAPL close=185.0 1697500800000000000
+
+    Args:
+        measurement (str): Nom de la measurement
+        df (DataFrame): Index temporel + colonne `field`
+        tags (dict): Tags communs à toutes les lignes
+
+    Returns:
+        ndarray: Lignes (str), NaN exclus
+    """
+    values = df[field].to_numpy(dtype=np.float64)
+    timestamps = index_to_ns(df.index)
+
+    keep = np.isfinite(values)
+    values, timestamps = values[keep], timestamps[keep]
+
+    prefix = _escape_tag(measurement)
+    for key, value in sorted((tags or {}).items()):
+        prefix += f",{_escape_tag(key)}={_escape_tag(value)}"
+    prefix += f" {_escape_tag(field)}="
+
+    lines = np.char.add(prefix, values.astype(str))
+    lines = np.char.add(lines, " ")
+    return np.char.add(lines, timestamps.astype(str))
+
+
+def _escape_field_string(value):
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def predictions_to_line_protocol(symbol, dates, predictions, model="ARIMA", run_date=None):
+    """
+    Lignes "predictions" (predicted_close + model [+ run_date]), une par date
+
+    Exemple: predictions,symbol=AAPL model="ARIMA",run_date="2024-10-17",predicted_close=186.2 1697500800000000000
+    """
+    run = f"run_date={_escape_field_string(run_date)}," if run_date is not None else ""
+    prefix = f"predictions,symbol={_escape_tag(symbol)} model={_escape_field_string(model)},{run}predicted_close="
+    timestamps = index_to_ns(dates)
+    return [f"{prefix}{float(value)!r} {ts}" for value, ts in zip(predictions, timestamps)]
+
+
+def _is_retryable(error):
+    status = getattr(error, "status", None)
+    return status is None or status == 429 or status >= 500
+
+
+class BatchingWriter:
+    """
+    Écrivain line protocol par lots avec retry (backoff exponentiel)
+
+    - write_lines() met en tampon, flush automatique par taille de lot
+      ou toutes les `flush_interval` secondes; sync=True écrit directement
+      les lignes de l'appel (hors tampon) et retourne ses lignes non écrites
+    - flush() écrit tout le tampon de façon synchrone
+    - stats() expose le débit (lignes/s) et les échecs
+    - avec un disjoncteur ouvert, les lots échouent sans attendre
+    """
+
+    def __init__(self, write_api, bucket, org=None, batch_size=WRITE_BATCH_SIZE,
+                 flush_interval=WRITE_FLUSH_INTERVAL, max_retries=WRITE_MAX_RETRIES,
+                 retry_interval=WRITE_RETRY_INTERVAL, max_retry_delay=WRITE_RETRY_MAX_DELAY,
+                 exponential_base=WRITE_EXPONENTIAL_BASE, breaker=None, name="default"):
+        self.write_api = write_api
+        self.bucket = bucket
+        self.org = org
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_interval = retry_interval
+        self.max_retry_delay = max_retry_delay
+        self.exponential_base = exponential_base
+        self.breaker = breaker
+        self.name = name
+
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._timer = None
+
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.requests = 0
+        self.retries = 0
+        self.write_seconds = 0.0
+
+    def write_lines(self, lines, batch_size=None, sync=False):
+        """
+        Ajoute des lignes au tampon (flush si un lot est complet)
+        
+        Args:
+            batch_size (int): Taille de lot pour cet appel (sync=True), sans
+                              modifier celle de l'écrivain partagé
+            sync (bool): Écrire tout de suite ces lignes seulement
+        
+        Returns:
+            int: Lignes de cet appel non écrites (0 en mode tampon: les échecs
+                 des flushs ultérieurs sont comptés dans rows_failed)
+        """
+        if sync:
+            _, failed = self._write_batches(list(lines), batch_size)
+            return failed
+        
+        with self._lock:
+            self._buffer.extend(lines)
+            full = len(self._buffer) >= self.batch_size
+
+        if full:
+            self._flush_full_batches()
+        else:
+            self._schedule_flush()
+        return 0
+
+    def flush(self):
+        """Écrit tout le tampon (synchrone) → nombre de lignes écrites"""
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        written, _ = self._write_batches(lines)
+        return written
+
+    def _flush_full_batches(self):
+        with self._lock:
+            n = len(self._buffer) - len(self._buffer) % self.batch_size
+            lines, self._buffer = self._buffer[:n], self._buffer[n:]
+        self._write_batches(lines)
+
+    def _schedule_flush(self):
+        if not self.flush_interval:
+            return
+        with self._lock:
+            if self._timer is not None or not self._buffer:
+                return
+            self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_flush(self):
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def _write_batches(self, lines, batch_size=None):
+        """Écrit des lignes par lots → (lignes écrites, lignes non écrites)"""
+        batch_size = batch_size or self.batch_size
+        written = failed = 0
+        for i in range(0, len(lines), batch_size):
+            batch = lines[i:i + batch_size]
+            if self._write_with_retry("\n".join(batch)):
+                written += len(batch)
+            else:
+                failed += len(batch)
+        self.rows_failed += failed
+        return written, failed
+
+    def _write_with_retry(self, payload):
+        n = payload.count("\n") + 1
+        delay = self.retry_interval
+
+        for attempt in range(self.max_retries + 1):
+            if self.breaker is not None and not self.breaker.allow():
+                print(f"   ⛔ Lot de {n} lignes abandonné: {self.breaker.name} indisponible")
+                INFLUX_WRITE_ROWS.inc(n, writer=self.name, status="rejected")
+                return False
+            start = time.perf_counter()
+            try:
+                with self._write_lock:
+                    self.write_api.write(bucket=self.bucket, org=self.org, record=payload)
+                self.requests += 1
+                self.rows_written += n
+                self.write_seconds += time.perf_counter() - start
+                if self.breaker is not None:
+                    self.breaker.record_success()
+                INFLUX_WRITE_SECONDS.observe(time.perf_counter() - start, writer=self.name, status="ok")
+                INFLUX_WRITE_ROWS.inc(n, writer=self.name, status="ok")
+                return True
+            except Exception as e:
+                INFLUX_WRITE_SECONDS.observe(time.perf_counter() - start, writer=self.name, status="error")
+                if self.breaker is not None:
+                    # 4xx: le serveur répond, le lot est en cause (libère aussi l'essai demi-ouvert)
+                    if _is_retryable(e):
+                        self.breaker.record_failure(e)
+                    else:
+                        self.breaker.record_success()
+                if attempt == self.max_retries or not _is_retryable(e):
+                    print(f"   ❌ Lot de {n} lignes abandonné: {e}")
+                    INFLUX_WRITE_ROWS.inc(n, writer=self.name, status="failed")
+                    return False
+                self.retries += 1
+                print(f"   ⚠️ Écriture échouée ({e}), nouvel essai dans {delay:.1f}s")
+                time.sleep(delay)
+                delay = min(delay * self.exponential_base, self.max_retry_delay)
+
+    def stats(self):
+        return {
+            "rows_written": self.rows_written,
+            "rows_failed": self.rows_failed,
+            "requests": self.requests,
+            "retries": self.retries,
+            "buffered": len(self._buffer),
+            "rows_per_second": round(self.rows_written / self.write_seconds, 1) if self.write_seconds else 0.0,
+        }
+
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    Écriture différée: put() rend la main immédiatement, un thread
+    regroupe les envois de toutes les requêtes en gros lots
+
+    - Un lot part dès `max_batch` lignes ou après `max_delay` secondes
+    - put(..., wait=True) attend l'écriture du lot qui contient ses lignes:
+      ce lot part sans attendre `max_delay` (avec les envois déjà en file)
+    - Écriture (lots + retry) déléguée à un BatchingWriter
+    - close() vide la file avant de rendre la main (arrêt de l'API)
+    - stats() expose la profondeur de file et la latence des flushs
+    """
+
+    def __init__(self, writer, max_batch=WRITE_BATCH_SIZE, max_delay=WRITE_BEHIND_MAX_DELAY,
+                 maxsize=WRITE_BEHIND_MAX_QUEUE):
+        self.writer = writer
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+
+        self._queue = queue.Queue(maxsize)
+        self._thread = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+        self.enqueued = 0
+        self.max_depth = 0
+        self.flushes = 0
+        self.flush_seconds = 0.0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    def put(self, lines, wait=False):
+        """
+        Met des lignes en file (écriture synchrone si la file est fermée)
+        wait=True: rend la main une fois le lot écrit (visible à la lecture suivante)
+        """
+        lines = list(lines)
+        if not lines:
+            return
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._start()
+                self.enqueued += len(lines)
+        if closed:
+            self._write(lines)
+            return
+        done = threading.Event() if wait else None
+        self._queue.put((lines, done))
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+        if done is not None:
+            done.wait()
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+
+            lines, done = item
+            batch, waiters, taken, stop = list(lines), [done], 1, False
+            urgent = done is not None       # un appelant attend ce lot
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    if urgent:
+                        item = self._queue.get_nowait()
+                    else:
+                        timeout = deadline - time.monotonic()
+                        if timeout <= 0:
+                            break
+                        item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                taken += 1
+                if item is _STOP:
+                    stop = True
+                    break
+                lines, done = item
+                batch.extend(lines)
+                waiters.append(done)
+                urgent = urgent or done is not None
+
+            try:
+                self._write(batch)
+            finally:
+                for done in waiters:
+                    if done is not None:
+                        done.set()
+                for _ in range(taken):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, lines):
+        start = time.perf_counter()
+        try:
+            self.writer.write_lines(lines, sync=True)
+        except Exception as e:
+            print(f"   ❌ Écriture différée échouée ({len(lines)} lignes): {e}")
+        elapsed = time.perf_counter() - start
+        self.flushes += 1
+        self.flush_seconds += elapsed
+        self.last_flush_seconds = elapsed
+        self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+
+    def flush(self):
+        """Attend que tout ce qui est en file soit écrit"""
+        self._queue.join()
+
+    def close(self, timeout=WRITE_BEHIND_CLOSE_TIMEOUT):
+        """Vide la file et arrête le thread (les put() suivants écrivent en direct)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+            if thread.is_alive():
+                print(f"⚠️ File d'écriture non vidée après {timeout}s ({self._queue.qsize()} envois)")
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self.max_depth,
+            "lines_enqueued": self.enqueued,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_seconds * 1000, 2),
+            "avg_flush_ms": round(self.flush_seconds / self.flushes * 1000, 2) if self.flushes else 0.0,
+            "max_flush_ms": round(self.max_flush_seconds * 1000, 2),
+            "writer": self.writer.stats(),
+        }
@@ -1,117 +1,257 @@
 # backend/influxdb_client_local.py
+#
+# Accès aux données du backend: caches (disque local, high-water marks),
+# disjoncteur, métriques et replis, devant le stockage configuré
+# (STORAGE_BACKEND: InfluxDB ou SQLite, voir storage.py)
+import time
+import asyncio
 import pandas as pd
-from datetime import datetime, timedelta
 
-# Configuration InfluxDB
-INFLUX_URL = "http://localhost:8086"
-INFLUX_TOKEN = "_eUyZZY91Y0Lvq3kQeLOP0-iC_jRtnSTUxUnbbsfdKEhCaC5GpTopqT8QiDB0dcVlewES29Gf8R0TsuSJXs0YQ=="
-INFLUX_ORG = "NOSQL"
-INFLUX_BUCKET = "finance"
+from forecast_cache import forecast_cache
+from broadcaster import broadcaster
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from metrics import INFLUX_QUERY_SECONDS, FALLBACKS
+from tracing import span, traced
+from storage import open_storage
+from influx_writer import WRITE_BATCH_SIZE
+import local_cache
 
-from influxdb_client import InfluxDBClient, Point
-from influxdb_client.client.write_api import SYNCHRONOUS
+# Échecs répétés → appels refusés immédiatement (lectures servies depuis le cache local)
+storage_breaker = CircuitBreaker("Stockage")
+storage = open_storage(breaker=storage_breaker)
+storage_breaker.name = {"influx": "InfluxDB", "sqlite": "SQLite"}.get(storage.name, storage.name)
 
-# Initialiser le client
-client = InfluxDBClient(url=INFLUX_URL, token=INFLUX_TOKEN, org=INFLUX_ORG, timeout=30_000)
-write_api = client.write_api(write_options=SYNCHRONOUS)
-query_api = client.query_api()
-
-print(f"✅ Client InfluxDB connecté à {INFLUX_URL}")
+def _query(name, fn, **kwargs):
+    """Requête synchrone via le disjoncteur, durée par type de requête"""
+    start = time.perf_counter()
+    status = "error"
+    try:
+        with span(f"influx.query.{name}"):
+            result = storage_breaker.call(fn, **kwargs)
+        status = "ok"
+        return result
+    except CircuitOpenError:
+        status = "rejected"
+        raise
+    finally:
+        INFLUX_QUERY_SECONDS.observe(time.perf_counter() - start, query=name, status=status)
 
-def get_close_from_influx(symbol):
-    """Récupère les prix de clôture depuis InfluxDB"""
+async def _aquery(name, fn, **kwargs):
+    """Version asynchrone de _query"""
+    start = time.perf_counter()
+    status = "error"
     try:
-        query = f'''
-        from(bucket: "{INFLUX_BUCKET}")
-          |> range(start: -100d)
-          |> filter(fn: (r) => r._measurement == "stock_prices")
-          |> filter(fn: (r) => r.symbol == "{symbol}")
-          |> filter(fn: (r) => r._field == "close")
-          |> sort(columns: ["_time"])
-        '''
-        
-        result = query_api.query(query=query, org=INFLUX_ORG)
-        
-        dates = []
-        closes = []
-        
-        for table in result:
-            for record in table.records:
-                dates.append(record.get_time())
-                closes.append(record.get_value())
-        
-        if dates:
-            df = pd.DataFrame({'close': closes}, index=dates)
-            df.index.name = 'date'
-            df = df.sort_index()
-            print(f"✅ {len(df)} jours récupérés pour {symbol}")
-            return df
+        with span(f"influx.query.{name}"):
+            result = await storage_breaker.acall(fn, **kwargs)
+        status = "ok"
+        return result
+    except CircuitOpenError:
+        status = "rejected"
+        raise
+    finally:
+        INFLUX_QUERY_SECONDS.observe(time.perf_counter() - start, query=name, status=status)
+
+# High-water mark: date de la dernière barre stockée, par symbole
+_high_water = {}
+
+def query_series(symbol, lookback_days=100, fields=("close",), measurement="stock_prices"):
+    """
+    Série temporelle d'un symbole
+    
+    Args:
+        lookback_days (int): Profondeur d'historique (60 bars ARIMA ≈ 90j, backtests: années)
+        fields (tuple): Champs projetés (une colonne par champ)
+    
+    Returns:
+        DataFrame (vide si aucune donnée)
+    """
+    return _query("series", storage.read_series, symbol=symbol, lookback_days=lookback_days,
+                  fields=tuple(fields), measurement=measurement)
+
+def query_panel(symbols, lookback_days=100, field="close", measurement="stock_prices"):
+    """
+    Historique de plusieurs symboles en une seule requête
+    
+    Returns:
+        DataFrame: index date (UTC), une colonne par symbole, NaN là où un symbole n'a pas de barre
+    """
+    return _query("panel", storage.read_panel, symbols=list(symbols), lookback_days=lookback_days,
+                  field=field, measurement=measurement)
+
+@traced("influx.get_closes_matrix")
+def get_closes_matrix(symbols, lookback_days=100, fill="ffill"):
+    """
+    Clôtures alignées de plusieurs symboles (dates × symboles)
+    
+    Les séries du cache disque local sont reprises telles quelles, les autres
+    sont lues en une seule requête InfluxDB. Les dates sont l'union des jours
+    de cotation de tous les symboles.
+    
+    Args:
+        symbols (list): Symboles (ordre des colonnes)
+        lookback_days (int): Profondeur d'historique
+        fill (str): "ffill" → jour manquant = dernière clôture connue
+                    (jamais avant la première barre d'un symbole), None → NaN
+    
+    Returns:
+        DataFrame: Colonnes = symboles (vide si aucune donnée), .to_numpy() → matrice
+    """
+    symbols = list(dict.fromkeys(symbols))
+    columns = {}
+    missing = []
+    
+    for symbol in symbols:
+        cached = local_cache.read_closes(symbol, lookback_days=lookback_days)
+        if cached is not None:
+            update_high_water_mark(symbol, cached.index.max())
+            columns[symbol] = cached['close']
         else:
-            print(f"⚠️ Aucune donnée pour {symbol}")
-            return pd.DataFrame()
-            
-    except Exception as e:
-        print(f"❌ Erreur récupération {symbol}: {e}")
+            missing.append(symbol)
+    
+    if missing:
+        try:
+            panel = query_panel(missing, lookback_days=lookback_days)
+            print(f"✅ {len(missing)} symboles récupérés en une requête ({len(panel)} dates)")
+        except Exception as e:
+            print(f"❌ Erreur récupération groupée {missing}: {e}")
+            panel = pd.DataFrame()
+            for symbol in missing:
+                stale = local_cache.read_closes(symbol, lookback_days=lookback_days, ttl=None)
+                if stale is not None:
+                    FALLBACKS.inc(kind="stale_local_cache")
+                    columns[symbol] = stale['close']
+            missing = [s for s in missing if s not in columns]
+        
+        for symbol in missing:
+            series = panel[symbol].dropna() if symbol in panel else pd.Series(dtype=float)
+            if not series.empty:
+                update_high_water_mark(symbol, series.index.max())
+                local_cache.write_closes(symbol, series.to_frame('close'), lookback_days=lookback_days)
+            columns[symbol] = series
+    
+    columns = {s: c for s, c in columns.items() if not c.empty}
+    if not columns:
         return pd.DataFrame()
+    
+    matrix = pd.concat(columns, axis=1).sort_index().reindex(columns=symbols)
+    matrix.index.name = "date"
+    if fill == "ffill":
+        matrix = matrix.ffill()
+    return matrix
+
+def _store_closes(symbol, df, lookback_days):
+    """Résultat d'une lecture InfluxDB → high-water mark + cache disque local"""
+    if not df.empty:
+        update_high_water_mark(symbol, df.index.max())
+        local_cache.write_closes(symbol, df, lookback_days=lookback_days)
+        print(f"✅ {len(df)} jours récupérés pour {symbol}")
+    else:
+        print(f"⚠️ Aucune donnée pour {symbol}")
+    return df
+
+def _stale_closes(symbol, lookback_days, error):
+    """InfluxDB indisponible: dernière série locale connue, quel que soit son âge"""
+    print(f"❌ Erreur récupération {symbol}: {error}")
+    stale = local_cache.read_closes(symbol, lookback_days=lookback_days, ttl=None)
+    if stale is not None:
+        FALLBACKS.inc(kind="stale_local_cache")
+        print(f"📂 {symbol}: série locale servie ({len(stale)} jours)")
+        return stale
+    return pd.DataFrame()
+
+@traced("influx.get_close")
+def get_close_from_influx(symbol, lookback_days=100):
+    """Récupère les prix de clôture (cache disque local, sinon InfluxDB)"""
+    cached = local_cache.read_closes(symbol, lookback_days=lookback_days)
+    if cached is not None:
+        update_high_water_mark(symbol, cached.index.max())
+        return cached
+    
+    try:
+        df = query_series(symbol, lookback_days=lookback_days, fields=("close",))
+        return _store_closes(symbol, df, lookback_days)
+    except Exception as e:
+        return _stale_closes(symbol, lookback_days, e)
 
-# backend/influxdb_client_local.py - MODIFIEZ la fonction write_market_dataframe
-def write_market_dataframe(symbol, df, batch_size=50):
-    """Écrit un DataFrame dans InfluxDB par batch pour éviter timeout"""
+@traced("influx.write_market_dataframe")
+def write_market_dataframe(symbol, df, batch_size=WRITE_BATCH_SIZE):
+    """
+    Écrit un DataFrame dans le stockage
+    InfluxDB: line protocol vectorisé + écriture par lots avec retry
+    
+    Returns:
+        dict: Lignes écrites / échouées et débit (lignes/s)
+    """
+    report = {"symbol": symbol, "rows": 0, "written": 0, "failed": 0, "rows_per_second": 0.0}
+    
     try:
-        points = []
-        for date, row in df.iterrows():
-            point = Point("stock_prices") \
-                .tag("symbol", symbol) \
-                .field("close", float(row['close'])) \
-                .time(date)
-            points.append(point)
-        
-        # Écrire par batch pour éviter timeout
-        total_points = len(points)
-        print(f"💾 Écriture {total_points} points pour {symbol} (batch de {batch_size})...")
-        
-        for i in range(0, total_points, batch_size):
-            batch = points[i:i + batch_size]
-            try:
-                write_api.write(bucket=INFLUX_BUCKET, record=batch)
-                print(f"   ✅ Batch {i//batch_size + 1}/{(total_points + batch_size - 1)//batch_size}: {len(batch)} points")
-            except Exception as e:
-                print(f"   ❌ Erreur batch {i//batch_size + 1}: {e}")
-                # Essayer point par point pour identifier le problème
-                for j, point in enumerate(batch):
-                    try:
-                        write_api.write(bucket=INFLUX_BUCKET, record=point)
-                    except Exception as point_error:
-                        print(f"     ❌ Point {j} échoué: {point_error}")
-                raise e
-        
-        print(f"✅ {total_points} points écrits avec succès pour {symbol}")
+        start = time.perf_counter()
+        print(f"💾 Écriture {len(df)} points pour {symbol} (lots de {batch_size})...")
+        
+        report["rows"], report["failed"] = storage.write_bars(symbol, df, batch_size=batch_size)
+        
+        elapsed = time.perf_counter() - start
+        report["written"] = report["rows"] - report["failed"]
+        report["rows_per_second"] = round(report["written"] / elapsed, 1) if elapsed > 0 else 0.0
+        
+        if report["failed"]:
+            print(f"⚠️ {report['failed']} points non écrits pour {symbol}")
+            local_cache.invalidate(symbol)
+        elif report["written"]:
+            update_high_water_mark(symbol, df.index.max())
+            local_cache.merge_closes(symbol, df)
+            last = df.sort_index().iloc[-1]
+            broadcaster.publish("bars", {
+                "rows": report["written"],
+                "last_date": df.index.max().isoformat(),
+                "last_close": float(last['close'])
+            }, symbol)
+        print(f"✅ {report['written']} points écrits pour {symbol} ({report['rows_per_second']:.0f} lignes/s)")
         
     except Exception as e:
         print(f"❌ Erreur écriture {symbol}: {e}")
         # Ne pas lever l'exception pour permettre la suite du processus
-        # raise e  # Commenté pour ne pas bloquer
+    
+    # Nouvelles barres (même partielles) → prédictions en mémoire obsolètes
+    forecast_cache.invalidate(symbol)
+    return report
+
+def update_high_water_mark(symbol, date):
+    """Avance le high-water mark d'un symbole (jamais de recul)"""
+    date = pd.Timestamp(date)
+    if date.tzinfo is None:
+        date = date.tz_localize("UTC")
+    current = _high_water.get(symbol)
+    if current is None or date > current:
+        _high_water[symbol] = date
+
+def get_high_water_mark(symbol):
+    """
+    Date de la dernière barre stockée pour un symbole
+    Mémoire d'abord, sinon une requête sur la dernière barre (une seule ligne)
+    """
+    if symbol in _high_water:
+        return _high_water[symbol]
+    
+    try:
+        last = _query("high_water", storage.last_bar, symbol=symbol)
+        if last is not None:
+            update_high_water_mark(symbol, last)
+        return _high_water.get(symbol)
+        
+    except Exception as e:
+        print(f"Erreur high-water mark {symbol}: {e}")
+        return None
 
 def get_recent_prediction(symbol):
     """Récupère la prédiction la plus récente (<24h)"""
     try:
-        query = f'''
-        from(bucket: "{INFLUX_BUCKET}")
-          |> range(start: -24h)
-          |> filter(fn: (r) => r._measurement == "predictions")
-          |> filter(fn: (r) => r.symbol == "{symbol}")
-          |> filter(fn: (r) => r._field == "predicted_close")
-          |> sort(columns: ["_time"], desc: true)
-          |> limit(n: 1)
-        '''
-        
-        result = query_api.query(query=query, org=INFLUX_ORG)
-        
-        for table in result:
-            for record in table.records:
-                value = record.get_value()
-                print(f"✅ Prédiction cache trouvée pour {symbol}: {value}")
-                return value
+        since = pd.Timestamp.now(tz="UTC") - pd.Timedelta(hours=24)
+        value = _query("recent_prediction", storage.latest_prediction, symbol=symbol, since=since)
+        
+        if value is not None:
+            print(f"✅ Prédiction cache trouvée pour {symbol}: {value}")
+            return value
         
         print(f"❌ Pas de prédiction récente pour {symbol}")
         return None
@@ -120,59 +260,156 @@ def get_recent_prediction(symbol):
         print(f"Erreur récupération prédiction {symbol}: {e}")
         return None
 
+@traced("influx.get_prediction_horizon")
+def get_prediction_horizon(symbol, start=None, days=6):
+    """
+    Courbe de prévision stockée pour un symbole, en une seule requête
+    
+    Chaque run réécrit les mêmes dates cibles: on lit donc la courbe du
+    dernier run (aujourd'hui → J+5 par défaut).
+    
+    Args:
+        start: Premier jour (défaut: aujourd'hui)
+        days (int): Nombre de jours lus à partir de start
+    
+    Returns:
+        DataFrame: index date (naïf, minuit), colonnes predicted_close, model
+                   et run_date (jour du run, NaN si inconnu; vide si aucune prédiction)
+    """
+    try:
+        start, stop = _horizon_range(start, days)
+        return _horizon_frame(_query("horizon", storage.read_horizon, symbol=symbol, start=start, stop=stop))
+        
+    except Exception as e:
+        print(f"Erreur lecture horizon {symbol}: {e}")
+        return pd.DataFrame()
+
+def _horizon_range(start, days):
+    start = pd.Timestamp(start if start is not None else pd.Timestamp.now()).normalize()
+    return start, start + pd.Timedelta(days=days)
+
+def _horizon_frame(horizon):
+    if horizon.empty:
+        return horizon
+    
+    horizon = horizon.dropna(subset=["predicted_close"])
+    horizon.index = horizon.index.tz_convert("UTC").tz_localize(None).normalize()
+    return horizon[~horizon.index.duplicated(keep="last")]
+
 def get_prediction_for_today(symbol):
     """Vérifie si une prédiction existe pour aujourd'hui"""
+    today = pd.Timestamp.now().normalize()
+    horizon = get_prediction_horizon(symbol, start=today, days=1)
+    
+    if today in horizon.index:
+        value = float(horizon.at[today, "predicted_close"])
+        print(f"✅ Prédiction trouvée pour {symbol} aujourd'hui: {value}")
+        return value
+    
+    print(f"❌ Pas de prédiction pour {symbol} aujourd'hui")
+    return None
+
+@traced("influx.get_predictions_for_day")
+def get_predictions_for_day(symbols, day=None):
+    """
+    Prédiction d'un jour (défaut: aujourd'hui) pour plusieurs symboles, en une seule requête
+    
+    Returns:
+        DataFrame: index symbole, colonnes predicted_close et model
+                   (symboles sans prédiction absents)
+    """
     try:
-        today = pd.Timestamp.now().normalize()
-        yesterday = today - pd.Timedelta(days=1)
-        
-        query = f'''
-        from(bucket: "{INFLUX_BUCKET}")
-          |> range(start: {yesterday.isoformat()})
-          |> filter(fn: (r) => r._measurement == "predictions")
-          |> filter(fn: (r) => r.symbol == "{symbol}")
-          |> filter(fn: (r) => r._field == "predicted_close")
-          |> sort(columns: ["_time"], desc: true)
-          |> limit(n: 1)
-        '''
-        
-        result = query_api.query(query=query, org=INFLUX_ORG)
-        
-        for table in result:
-            for record in table.records:
-                record_time = record.get_time()
-                if isinstance(record_time, pd.Timestamp):
-                    record_date = record_time.normalize()
-                else:
-                    record_date = pd.Timestamp(record_time).normalize()
-                
-                if record_date == today:
-                    value = record.get_value()
-                    print(f"✅ Prédiction trouvée pour {symbol} aujourd'hui: {value}")
-                    return value
-        
-        print(f"❌ Pas de prédiction pour {symbol} aujourd'hui")
-        return None
-        
+        start, stop = _horizon_range(day, 1)
+        panel = _query("prediction_panel", storage.read_prediction_panel, symbols=list(symbols),
+                       start=start, stop=stop)
     except Exception as e:
-        print(f"Erreur vérification prédiction: {e}")
-        return None
+        print(f"Erreur lecture prédictions groupées: {e}")
+        return pd.DataFrame()
+    
+    if panel.empty:
+        return panel
+    return panel.dropna(subset=["predicted_close"]).groupby("symbol").last()
 
-def write_prediction_to_influx(symbol, date, prediction):
-    """Stocke une prédiction dans InfluxDB"""
+@traced("influx.enqueue_predictions")
+def write_predictions_to_influx(symbol, dates, predictions, model="ARIMA", run_date=None, wait=False):
+    """
+    Stocke les prédictions d'un symbole (une par date)
+    InfluxDB: mises en file sans attendre, visibles au prochain flush.
+    wait=True: attend l'écriture (avant de rendre un verrou inter-workers)
+    """
     try:
-        point = Point("predictions") \
-            .tag("symbol", symbol) \
-            .field("predicted_close", float(prediction)) \
-            .field("model", "ARIMA") \
-            .time(date)
-        
-        write_api.write(bucket=INFLUX_BUCKET, record=point)
-        print(f"✅ Prédiction enregistrée: {symbol} = {prediction:.2f}")
+        storage.write_predictions(symbol, dates, predictions, model=model, run_date=run_date, wait=wait)
+        print(f"✅ {len(predictions)} prédictions stockées: {symbol} = {float(predictions[0]):.2f}...")
         
     except Exception as e:
         print(f"Erreur écriture prédiction {symbol}: {e}")
 
+def write_prediction_to_influx(symbol, date, prediction, model="ARIMA"):
+    """Stocke une prédiction (écriture différée avec InfluxDB)"""
+    write_predictions_to_influx(symbol, [date], [prediction], model=model)
+
+def flush_writes():
+    """Rend visibles les écritures différées (prédictions en file)"""
+    storage.flush()
+
+def close_storage():
+    """Arrêt: écrit ce qui reste en file puis libère le stockage"""
+    storage.close()
+
+# ===== Accès asynchrone (endpoints FastAPI, ouvert/fermé par le lifespan) =====
+
+async def open_async_client():
+    """Client asynchrone et son pool de connexions (dans la boucle de l'API)"""
+    await storage.open_async()
+
+async def close_async_client():
+    await storage.close_async()
+
+async def aget_close_from_influx(symbol, lookback_days=100):
+    """get_close_from_influx sans bloquer la boucle (échec rapide si disjoncteur ouvert)"""
+    cached = local_cache.read_closes(symbol, lookback_days=lookback_days)
+    if cached is not None:
+        update_high_water_mark(symbol, cached.index.max())
+        return cached
+    
+    try:
+        df = await _aquery("series", storage.aread_series, symbol=symbol, lookback_days=lookback_days,
+                           fields=("close",))
+        return _store_closes(symbol, df, lookback_days)
+    except Exception as e:
+        return _stale_closes(symbol, lookback_days, e)
+
+async def aget_prediction_horizon(symbol, start=None, days=6):
+    """get_prediction_horizon sans bloquer la boucle"""
+    try:
+        start, stop = _horizon_range(start, days)
+        return _horizon_frame(await _aquery("horizon", storage.aread_horizon, symbol=symbol,
+                                            start=start, stop=stop))
+    except Exception as e:
+        print(f"Erreur lecture horizon {symbol}: {e}")
+        return pd.DataFrame()
+
+async def readiness(timeout=2.0):
+    """
+    État du stockage pour /health
+    
+    Returns:
+        dict: {"ready": bool, "backend": "influx"/"sqlite",
+               "storage": "up"/"down"/"circuit_open", "breaker": {...}}
+    """
+    status = "down"
+    try:
+        await asyncio.wait_for(_aquery("ping", storage.aping), timeout)
+        status = "up"
+    except CircuitOpenError:
+        status = "circuit_open"
+    except Exception as e:
+        if isinstance(e, asyncio.TimeoutError):
+            storage_breaker.record_failure(e)
+    
+    return {"ready": status == "up", "backend": storage.name, "storage": status,
+            "breaker": storage_breaker.stats()}
+
 def check_recent_data_exists(symbol, hours=24):
     """Vérifie si des données récentes existent"""
     try:
@@ -0,0 +1,210 @@
+# backend/ingestion.py
+import os
+import json
+import time
+import asyncio
+import pandas as pd
+
+# Quotas Alpha Vantage (offre gratuite)
+ALPHA_VANTAGE_CALLS_PER_MINUTE = 5
+ALPHA_VANTAGE_CALLS_PER_DAY = 25
+
+INGESTION_CONCURRENCY = 4       # lectures/écritures InfluxDB simultanées
+CHECKPOINT_FILE = os.path.join(os.path.dirname(__file__), ".ingestion_checkpoint.json")
+
+
+class QuotaExceeded(Exception):
+    """Quota journalier Alpha Vantage atteint"""
+
+
+class TokenBucket:
+    """
+    Limiteur asyncio: seau à jetons par minute + plafond journalier
+
+    Le compteur journalier est repris du checkpoint pour qu'un run
+    relancé le même jour ne dépasse pas le quota.
+    """
+
+    def __init__(self, per_minute=ALPHA_VANTAGE_CALLS_PER_MINUTE,
+                 per_day=ALPHA_VANTAGE_CALLS_PER_DAY, used_today=0):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0   # jetons par seconde
+        self.per_day = per_day
+        self.used_today = used_today
+        self._tokens = float(per_minute)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            if self.used_today >= self.per_day:
+                raise QuotaExceeded(f"{self.per_day} appels/jour atteints")
+
+            self._refill()
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self.rate
+                print(f"⏳ Quota/minute: attente {wait:.1f}s")
+                await asyncio.sleep(wait)
+                self._refill()
+
+            self._tokens -= 1
+            self.used_today += 1
+
+
+def latest_session(today=None):
+    """Dernière séance close avant aujourd'hui (jours ouvrés, hors jours fériés)"""
+    today = pd.Timestamp(today or pd.Timestamp.now()).normalize()
+    return today - pd.offsets.BDay(1)
+
+
+def is_behind(last, today=None):
+    """Vrai si une barre datée `last` est antérieure à la dernière séance close"""
+    last = pd.Timestamp(last)
+    if last.tzinfo is not None:
+        last = last.tz_convert("UTC").tz_localize(None)
+    return last.normalize() < latest_session(today)
+
+
+def is_stale(df, today=None):
+    """Vrai si la dernière barre est antérieure à la dernière séance close"""
+    if df.empty:
+        return True
+    return is_behind(df.index.max(), today)
+
+
+def load_checkpoint(today=None):
+    """
+    Progression du jour ({'date', 'api_calls', 'done': {symbol: jours}})
+    'days' (jours stockés par symbole au dernier passage) est conservé d'un jour à l'autre.
+    """
+    today = today or pd.Timestamp.now().date().isoformat()
+    try:
+        with open(CHECKPOINT_FILE) as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        checkpoint = {}
+    if checkpoint.get("date") == today:
+        return checkpoint
+    return {"date": today, "api_calls": 0, "done": {}, "days": checkpoint.get("days", {})}
+
+
+def save_checkpoint(checkpoint):
+    try:
+        tmp = CHECKPOINT_FILE + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(tmp, CHECKPOINT_FILE)
+    except Exception as e:
+        print(f"⚠️ Sauvegarde checkpoint échouée: {e}")
+
+
+async def _staleness_order(markets):
+    """
+    Symboles triés du plus ancien au plus récent (sans données en premier)
+
+    Returns:
+        tuple: (symboles triés, {symbol: high-water mark ou None})
+    """
+    from influxdb_client_local import get_high_water_mark
+
+    marks = await asyncio.gather(*(asyncio.to_thread(get_high_water_mark, s) for s in markets))
+    oldest = pd.Timestamp.min.tz_localize("UTC")
+    ranked = sorted(zip(markets, marks), key=lambda item: item[1] if item[1] is not None else oldest)
+    return [symbol for symbol, _ in ranked], dict(zip(markets, marks))
+
+
+async def ingest_markets(markets, min_days=30, concurrency=INGESTION_CONCURRENCY, resume=True, refresh=False,
+                         errors=None):
+    """
+    Ingestion concurrente de plusieurs marchés
+
+    - Ordre de traitement: données les plus anciennes d'abord
+    - Symboles déjà complets: aucune attente, aucun appel API
+      (avec refresh=True, complets ET à jour de la dernière séance)
+    - High-water mark à jour et historique complet au dernier passage:
+      aucun delta possible, ni lecture de l'historique ni appel API
+    - Appels API limités par TokenBucket (minute + jour), un jeton par appel
+      réel (replis compact → full → default compris, aucun si réponse en cache)
+    - Lectures/écritures InfluxDB dans des threads, en parallèle des attentes
+    - Checkpoint après chaque symbole: un run interrompu reprend où il s'est arrêté
+    - Un symbole en échec n'interrompt pas les autres (erreur dans `errors`)
+
+    Args:
+        errors (dict): Rempli avec {symbol: message} pour les symboles en échec (optionnel)
+
+    Returns:
+        dict: {symbol: nombre de jours disponibles}
+    """
+    from fetch_api import fetch_from_api, load_existing, merge_and_store
+
+    checkpoint = load_checkpoint()
+    if not resume:
+        checkpoint.update(api_calls=0, done={}, refreshed={})
+    done = checkpoint.setdefault("refreshed" if refresh else "done", {})
+    stored = checkpoint.setdefault("days", {})
+    results = {s: done[s] for s in markets if s in done}
+    pending = [s for s in markets if s not in results]
+
+    if results:
+        print(f"♻️ Reprise: {len(results)} symboles déjà traités aujourd'hui")
+
+    bucket = TokenBucket(used_today=checkpoint["api_calls"])
+    semaphore = asyncio.Semaphore(concurrency)
+    ordered, marks = await _staleness_order(pending)
+    loop = asyncio.get_running_loop()
+    
+    def acquire():
+        # Appelé depuis le thread de fetch_from_api: le seau vit dans la boucle
+        asyncio.run_coroutine_threadsafe(bucket.acquire(), loop).result()
+        checkpoint["api_calls"] = bucket.used_today
+
+    async def process(i, symbol):
+        try:
+            await ingest(i, symbol)
+        except Exception as e:
+            print(f"❌ {symbol}: ingestion échouée ({type(e).__name__}: {e})")
+            if errors is not None:
+                errors[symbol] = f"{type(e).__name__}: {e}"
+            results.setdefault(symbol, 0)
+
+    async def ingest(i, symbol):
+        print(f"\n[{i+1}/{len(ordered)}] Traitement {symbol}")
+        mark = marks.get(symbol)
+        if mark is not None and not is_behind(mark) and stored.get(symbol, 0) >= min_days:
+            # Dernière séance déjà stockée: l'API n'apporterait aucune barre
+            print(f"✅ {symbol} à jour ({mark.date()}), pas de lecture")
+            results[symbol] = done[symbol] = stored[symbol]
+            save_checkpoint(checkpoint)
+            return
+
+        async with semaphore:
+            existing, enough = await asyncio.to_thread(load_existing, symbol, min_days)
+
+        if enough and not (refresh and is_stale(existing)):
+            count = len(existing)
+        else:
+            try:
+                new_data = await asyncio.to_thread(fetch_from_api, symbol, acquire)
+            except QuotaExceeded as e:
+                print(f"⛔ {symbol}: {e}, reporté au prochain run")
+                results[symbol] = len(existing)
+                save_checkpoint(checkpoint)
+                return
+
+            async with semaphore:
+                data = await asyncio.to_thread(merge_and_store, symbol, existing, new_data, min_days)
+            count = len(data) if not data.empty else 0
+
+        results[symbol] = stored[symbol] = count
+        if count >= min_days:
+            done[symbol] = count
+        save_checkpoint(checkpoint)
+
+    await asyncio.gather(*(process(i, s) for i, s in enumerate(ordered)))
+
+    return {s: results.get(s, 0) for s in markets}
@@ -16,7 +16,7 @@ def main():
     ]
     
     print(f"{len(markets)} marchés à initialiser")
-    print("⏳ Estimation: ~2.5 minutes (15s entre chaque appel)")
+    print("⏳ Quotas Alpha Vantage: 5 appels/min, 25/jour (reprise automatique si interrompu)")
     print()
     
     results = fetch_multiple_markets(markets, min_days=30)
@@ -0,0 +1,175 @@
+# backend/local_cache.py
+import os
+import time
+import threading
+import numpy as np
+import pandas as pd
+from influx_writer import index_to_ns
+
+# Cache disque local (lecture directe, devant InfluxDB et Alpha Vantage)
+CACHE_DIR = os.environ.get(
+    "MARKET_CACHE_DIR",
+    os.path.join(os.path.dirname(__file__), ".market_cache")
+)
+LOCAL_CACHE_TTL = 3600      # secondes avant relecture depuis InfluxDB
+
+# Un enregistrement par barre: timestamp ns UTC + close
+BAR_DTYPE = np.dtype([("t", "<i8"), ("close", "<f8")])
+
+# Série locale: un enregistrement d'en-tête (t = début de la période couverte,
+# close = NaN) puis les barres triées. Série et couverture dans un seul
+# fichier remplacé atomiquement: toujours lues ensemble.
+
+_lock = threading.Lock()
+
+
+def _closes_path(symbol):
+    return os.path.join(CACHE_DIR, "closes", f"{symbol.upper()}.npy")
+
+
+def _raw_path(symbol, day):
+    return os.path.join(CACHE_DIR, "raw", f"{symbol.upper()}_{day}.npy")
+
+
+def _to_records(df):
+    records = np.empty(len(df), dtype=BAR_DTYPE)
+    records["t"] = index_to_ns(df.index)
+    records["close"] = df['close'].to_numpy(dtype=np.float64)
+    return records
+
+
+def _to_frame(records):
+    """Enregistrements → DataFrame (index UTC, comme InfluxDB)"""
+    index = pd.DatetimeIndex(records["t"].view("M8[ns]"), name="date").tz_localize("UTC")
+    return pd.DataFrame({'close': records["close"]}, index=index)
+
+
+def _tmp_path(path):
+    # Un fichier temporaire par process: _lock ne sérialise que les threads
+    return f"{path}.{os.getpid()}.tmp"
+
+
+def _save(path, records):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = _tmp_path(path)
+    with open(tmp, "wb") as f:
+        np.save(f, records)
+    os.replace(tmp, path)  # les lecteurs en mmap gardent l'ancien fichier
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _open(path):
+    """Ouverture sans copie (memory map)"""
+    return np.load(path, mmap_mode="r")
+
+
+def _with_coverage(records, coverage_start):
+    header = np.array([(coverage_start, np.nan)], dtype=BAR_DTYPE)
+    return np.concatenate([header, records])
+
+
+def _split_coverage(records):
+    """Série locale → (début de couverture ns, barres); ValueError si pas d'en-tête"""
+    if len(records) == 0 or not np.isnan(records[0]["close"]):
+        raise ValueError("série locale sans en-tête de couverture")
+    return int(records[0]["t"]), records[1:]
+
+
+def read_closes(symbol, lookback_days=100, ttl=LOCAL_CACHE_TTL):
+    """
+    Série de clôtures depuis le cache local
+
+    Args:
+        ttl (float): Âge maximal en secondes (None = sans limite, ex. InfluxDB indisponible)
+    
+    Returns:
+        DataFrame ou None (absent / plus vieux que ttl → relire InfluxDB)
+    """
+    path = _closes_path(symbol)
+    try:
+        if ttl is not None and time.time() - os.path.getmtime(path) > ttl:
+            return None
+        coverage_start, records = _split_coverage(_open(path))
+    except (OSError, ValueError):
+        return None
+
+    # La série locale doit couvrir toute la période demandée
+    start = time.time_ns() - lookback_days * 86_400 * 10**9 if lookback_days is not None else 0
+    if start < coverage_start:
+        return None
+    records = records[np.searchsorted(records["t"], start):]
+
+    if len(records) == 0:
+        return None
+    return _to_frame(records)
+
+
+def write_closes(symbol, df, lookback_days=None):
+    """
+    Remplace la série locale (après lecture InfluxDB)
+
+    Args:
+        lookback_days (int): Période couverte par la lecture (None = tout l'historique)
+    """
+    if df.empty:
+        return
+    records = np.sort(_to_records(df), order="t")
+    coverage_start = time.time_ns() - lookback_days * 86_400 * 10**9 if lookback_days is not None else 0
+    with _lock:
+        _save(_closes_path(symbol), _with_coverage(records, coverage_start))
+
+
+def merge_closes(symbol, df):
+    """
+    Fusionne des barres écrites dans InfluxDB avec la série locale
+    Sans série locale, rien n'est créé: une série partielle passerait pour complète.
+    """
+    path = _closes_path(symbol)
+    if df.empty or not os.path.exists(path):
+        return
+
+    with _lock:
+        try:
+            coverage_start, current = _split_coverage(np.array(_open(path)))
+        except (OSError, ValueError):
+            return
+        new = _to_records(df)
+        merged = np.concatenate([current[~np.isin(current["t"], new["t"])], new])
+        _save(path, _with_coverage(np.sort(merged, order="t"), coverage_start))
+
+
+def invalidate(symbol):
+    _remove(_closes_path(symbol))
+
+
+def read_raw_response(symbol, day=None):
+    """Réponse Alpha Vantage déjà reçue aujourd'hui (DataFrame 'close') ou None"""
+    day = day or pd.Timestamp.now().date().isoformat()
+    try:
+        records = _open(_raw_path(symbol, day))
+    except (OSError, ValueError):
+        return None
+    df = _to_frame(records)
+    df.index = df.index.tz_localize(None)  # comme fetch_from_api
+    return df
+
+
+def write_raw_response(symbol, df, day=None):
+    """Conserve la réponse Alpha Vantage du jour (les plus anciennes sont supprimées)"""
+    if df.empty:
+        return
+    day = day or pd.Timestamp.now().date().isoformat()
+    path = _raw_path(symbol, day)
+    with _lock:
+        _save(path, _to_records(df))
+        folder = os.path.dirname(path)
+        for name in os.listdir(folder):
+            if (name.startswith(f"{symbol.upper()}_") and name != os.path.basename(path)
+                    and not name.endswith(".tmp")):  # écriture en cours dans un autre process
+                os.remove(os.path.join(folder, name))
@@ -1,12 +1,60 @@
 # backend/main.py
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse, JSONResponse, PlainTextResponse
+from contextlib import asynccontextmanager
 from arima.predict_arima import predict_close
-from influxdb_client_local import get_close_from_influx
-from datetime import datetime
+from arima.batch_predict import predict_batch, shutdown_process_pool
+from arima.model_store import model_store
+from influxdb_client_local import (
+    aget_close_from_influx,
+    aget_prediction_horizon,
+    open_async_client,
+    close_async_client,
+    readiness,
+    storage,
+    storage_breaker,
+    close_storage
+)
+from forecast_cache import forecast_cache
+from market_overview import market_overview
+from broadcaster import broadcaster
+from metrics import registry, Gauge, KNOWN_SYMBOLS
+from precompute import PRECOMPUTE_ENABLED, precompute_loop, load_last_report
+from tracing import PROFILING_ENABLED, start_trace
+from http_cache import FAST_TIER_MAX_AGE, cached_json, etag, seconds_until_next_update
+from datetime import datetime, timedelta
+import asyncio
+import gzip
+import json
+import threading
 import pandas as pd
 
-app = FastAPI(title="Financial Prediction API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app):
+    # Pool de connexions InfluxDB asynchrone, lié à la boucle de l'API
+    await open_async_client()
+    # Démarrage: charger les modèles du registre en arrière-plan
+    threading.Thread(
+        target=model_store.preload,
+        args=([m["symbol"] for m in SUPPORTED_MARKETS],),
+        daemon=True
+    ).start()
+    # Vue d'ensemble prête avant le premier tableau de bord
+    threading.Thread(target=market_overview.get, args=(SUPPORTED_MARKETS,), daemon=True).start()
+    # Précalcul nocturne des prévisions (rattrapage si un run a été manqué)
+    scheduler = None
+    if PRECOMPUTE_ENABLED:
+        scheduler = asyncio.create_task(precompute_loop([m["symbol"] for m in SUPPORTED_MARKETS]))
+    yield
+    if scheduler is not None:
+        scheduler.cancel()
+    # Arrêt: écrire les prédictions en file, puis libérer les pools (ARIMA, stockage)
+    await asyncio.to_thread(close_storage)
+    shutdown_process_pool()
+    await close_async_client()
+
+app = FastAPI(title="Financial Prediction API", version="1.0.0", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -17,6 +65,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Profilage à la demande: X-Profile: 1 (spans) ou X-Profile: sample (spans + piles)
+# Actif seulement avec PROFILING_ENABLED=1
+if PROFILING_ENABLED:
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        mode = request.headers.get("x-profile") or request.query_params.get("profile")
+        if not mode:
+            return await call_next(request)
+
+        with start_trace(f"{request.method} {request.url.path}", sample=mode == "sample") as trace:
+            response = await call_next(request)
+            if response.headers.get("content-type", "").startswith("text/event-stream"):
+                return response     # flux SSE: pas de mise en mémoire
+            body = b"".join([chunk async for chunk in response.body_iterator])
+
+        headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+        headers["X-Trace-Id"] = trace.id
+        profile = trace.to_dict()
+        if response.media_type == "application/json" or headers.get("content-type", "").startswith("application/json"):
+            # Réponse JSON: l'arbre des spans est ajouté sous "_profile"
+            # (corps compressé par cached_json si le client accepte gzip)
+            try:
+                payload = json.loads(gzip.decompress(body) if headers.get("content-encoding") == "gzip" else body)
+            except (ValueError, OSError):
+                payload = None
+            if isinstance(payload, dict):
+                payload["_profile"] = profile
+                # Autre corps: ni l'encodage ni l'ETag de la réponse d'origine
+                for name in ("content-type", "content-encoding", "etag"):
+                    headers.pop(name, None)
+                return JSONResponse(payload, status_code=response.status_code, headers=headers)
+        headers["X-Profile-Wall-Ms"] = str(profile["spans"]["wall_ms"])
+        return Response(body, status_code=response.status_code, headers=headers)
+
 # Liste des marchés
 SUPPORTED_MARKETS = [
     {"symbol": "AAPL", "name": "Apple Inc."},
@@ -30,6 +112,7 @@ SUPPORTED_MARKETS = [
     {"symbol": "JPM", "name": "JPMorgan Chase & Co."},
     {"symbol": "V", "name": "Visa Inc."}
 ]
+KNOWN_SYMBOLS.update(m["symbol"] for m in SUPPORTED_MARKETS)
 
 @app.get("/")
 def root():
@@ -41,27 +124,102 @@ def root():
         "process": "1) Check cache <24h 2) Fetch 30+ days 3) Train ARIMA 4) Store prediction",
         "endpoints": {
             "/markets": "Liste des marchés",
+            "/markets/overview": "Tous les marchés: dernier close, variation, prédiction du jour, sparkline",
             "/market-data/{symbol}": "Données marché (close d'hier)",
-            "/predict/{symbol}": "Prédiction close d'aujourd'hui"
+            "/predict/{symbol}": "Prédiction close d'aujourd'hui",
+            "/predict/batch?symbols=AAPL,MSFT": "Prédictions multiples en parallèle (NDJSON)",
+            "/cache/stats": "Statistiques du cache de prédictions",
+            "/writes/stats": "File d'écriture des prédictions (profondeur, latence des flushs)",
+            "/precompute/last": "Rapport du dernier précalcul nocturne",
+            "/stream?symbols=AAPL,MSFT": "Flux SSE: prédictions, progression et nouvelles barres",
+            "/health": "Readiness (stockage + disjoncteur), /health/live: liveness",
+            "/metrics": "Métriques Prometheus (latences par étape, I/O, fits, fallbacks)",
+            "?profile=1|sample": "Profil de la requête (PROFILING_ENABLED=1): spans, temps CPU, piles"
         }
     }
 
 @app.get("/health")
-def health_check():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+async def health_check():
+    """
+    Readiness: stockage joignable et disjoncteur fermé (503 sinon)
+    Les prédictions en cache restent servies pendant une panne.
+    """
+    state = await readiness()
+    body = {
+        "status": "healthy" if state["ready"] else "degraded",
+        "storage": state["storage"],
+        "backend": state["backend"],
+        "breaker": state["breaker"],
+        "prediction_queue_depth": storage.pending_writes(),
+        "timestamp": datetime.now().isoformat()
+    }
+    return JSONResponse(body, status_code=200 if state["ready"] else 503)
+
+@app.get("/health/live")
+def liveness():
+    """Liveness: le process répond (sans dépendance externe)"""
+    return {"status": "alive", "timestamp": datetime.now().isoformat()}
+
+# Jauges lues au moment du scrape
+registry.register(Gauge("prediction_queue_depth", "Envois en attente dans la file d'écriture des prédictions",
+                        storage.pending_writes))
+registry.register(Gauge("influx_circuit_open", "1 si le disjoncteur du stockage refuse les appels",
+                        lambda: 0 if storage_breaker.state == "closed" else 1))
+registry.register(Gauge("forecast_cache_entries", "Prédictions dans le cache mémoire",
+                        lambda: forecast_cache.stats()["size"]))
+registry.register(Gauge("stream_subscribers", "Clients abonnés au flux SSE",
+                        lambda: broadcaster.stats()["subscribers"]))
+
+@app.get("/metrics")
+def metrics():
+    """Exposition Prometheus (métriques du process courant)"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Compteurs du cache mémoire des prédictions"""
+    return forecast_cache.stats()
+
+@app.get("/writes/stats")
+def write_stats():
+    """Écritures du stockage (InfluxDB: file différée des prédictions et écrivain des barres)"""
+    return storage.stats()
+
+@app.get("/precompute/last")
+def last_precompute():
+    """Rapport du dernier précalcul (durées par symbole)"""
+    report = load_last_report()
+    if report is None:
+        raise HTTPException(status_code=404, detail="Aucun précalcul effectué")
+    return report
 
 @app.get("/markets")
 def get_markets():
     """Liste des marchés supportés"""
     return SUPPORTED_MARKETS
 
+@app.get("/markets/overview")
+async def markets_overview(request: Request):
+    """
+    Vue d'ensemble de tous les marchés en une requête
+    Instantané partagé (deux requêtes au stockage par reconstruction),
+    revalidé par ETag à chaque rafraîchissement du tableau de bord
+    """
+    snapshot = await asyncio.to_thread(market_overview.get, SUPPORTED_MARKETS)
+    payload = {k: v for k, v in snapshot.items() if k != "etag"}
+    return cached_json(request, payload, snapshot["etag"])
+
 @app.get("/market-data/{symbol}")
-def get_market_data(symbol: str):
-    """Données marché (close d'hier)"""
+async def get_market_data(request: Request, symbol: str):
+    """
+    Données marché (close d'hier)
+    ETag (symbole, dernière barre): If-None-Match → 304 jusqu'à la séance suivante
+    """
     symbol = symbol.upper()
     
     try:
-        df = get_close_from_influx(symbol)
+        df = await aget_close_from_influx(symbol)
+        max_age = seconds_until_next_update()
         
         if df.empty:
             # Données par défaut
@@ -72,6 +230,7 @@ def get_market_data(symbol: str):
             }
             last_close = default_prices.get(symbol, 100.0)
             last_date = datetime.now().date() - timedelta(days=1)
+            max_age = 0     # valeur de repli: revalider dès que l'historique est chargé
         else:
             last_close = float(df['close'].iloc[-1])
             last_date = df.index[-1].date()
@@ -81,7 +240,8 @@ def get_market_data(symbol: str):
         high_price = last_close * 1.015
         low_price = last_close * 0.985
         
-        return {
+        data_points = len(df) if not df.empty else 0
+        payload = {
             "symbol": symbol,
             "name": next((m["name"] for m in SUPPORTED_MARKETS if m["symbol"] == symbol), symbol),
             "open": round(open_price, 2),
@@ -90,51 +250,163 @@ def get_market_data(symbol: str):
             "close": round(last_close, 2),  # ⚠️ Close D'HIER
             "volume": 10000000,
             "last_updated": last_date.isoformat(),
-            "data_points": len(df) if not df.empty else 0,
+            "data_points": data_points,
             "note": "Close historique (d'hier)"
         }
+        return cached_json(request, payload, etag(symbol, last_date, data_points, last_close), max_age)
         
     except Exception as e:
         print(f"❌ Erreur /market-data/{symbol}: {e}")
         raise HTTPException(status_code=500, detail="Erreur récupération données")
 
+@app.get("/predict/batch")
+def predict_many(symbols: str = Query(None, description="Symboles séparés par des virgules (défaut: tous)")):
+    """
+    Prédictions pour plusieurs marchés, fits en parallèle
+    Chaque ligne NDJSON est envoyée dès que son symbole est terminé
+    """
+    if symbols:
+        requested = [s.strip() for s in symbols.split(",") if s.strip()]
+    else:
+        requested = [m["symbol"] for m in SUPPORTED_MARKETS]
+    
+    print(f"\n🌐 /predict/batch appelé pour {len(requested)} symboles")
+    
+    def stream():
+        for result in predict_batch(requested):
+            yield json.dumps(result, default=str) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+STREAM_KEEPALIVE = 15   # secondes entre deux commentaires SSE (proxies)
+
+_computing = set()
+_computing_lock = threading.Lock()
+
+def _compute_for_stream(symbol):
+    """
+    Un seul calcul par symbole, quel que soit le nombre d'abonnés en attente
+    Exécuté dans le pool de threads borné de la boucle (les demandes en trop attendent leur tour).
+    """
+    with _computing_lock:
+        if symbol in _computing:
+            return
+        _computing.add(symbol)
+    
+    def run():
+        try:
+            result = predict_close(symbol)
+            if result.get("error"):
+                broadcaster.publish("error", {"message": result["message"]}, symbol)
+        except Exception as e:
+            broadcaster.publish("error", {"message": str(e)}, symbol)
+        finally:
+            with _computing_lock:
+                _computing.discard(symbol)
+    
+    asyncio.get_running_loop().run_in_executor(None, run)
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.get("/stream")
+async def stream(request: Request,
+                 symbols: str = Query(None, description="Symboles séparés par des virgules (défaut: tous)"),
+                 compute: bool = Query(True, description="Lancer la prédiction des symboles sans valeur en cache")):
+    """
+    Flux Server-Sent Events
+    
+    - prediction: valeur en cache immédiatement, puis chaque nouvelle prédiction
+    - progress: étapes du calcul en cours (un seul calcul partagé par tous les abonnés)
+    - bars: nouvelles barres écrites dans InfluxDB
+    """
+    if symbols:
+        requested = [s.strip().upper() for s in symbols.split(",") if s.strip()]
+    else:
+        requested = [m["symbol"] for m in SUPPORTED_MARKETS]
+    
+    async def events():
+        sub = broadcaster.subscribe(requested)
+        try:
+            for symbol in requested:
+                cached = forecast_cache.get(symbol)
+                if cached is not None:
+                    cached["source"] = "memory_cache"
+                    cached["cache_hit"] = True
+                    yield _sse("prediction", {"event": "prediction", "symbol": symbol, "data": cached})
+                elif compute:
+                    yield _sse("progress", {"event": "progress", "symbol": symbol,
+                                            "data": {"stage": "queued", "message": "Calcul en file"}})
+                    _compute_for_stream(symbol)
+            
+            while not await request.is_disconnected():
+                try:
+                    message = await sub.get(timeout=STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse(message["event"], message)
+        finally:
+            broadcaster.unsubscribe(sub)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
 @app.get("/predict/{symbol}")
-def predict(symbol: str):
+def predict(request: Request, symbol: str,
+            budget_ms: int = Query(None, ge=0, description="Budget de latence (ms) pour ARIMA")):
     """
     Endpoint principal - Prédiction close d'aujourd'hui
+    Le champ "tier" indique le niveau ayant produit la prévision (fast / arima)
+    ETag faible (symbole, run de prévision): source, cache_hit et message varient
+    selon le chemin (calcul ou cache) pour un même run. Une prévision rapide n'est
+    fraîche qu'une minute (remplacée par ARIMA), une prévision ARIMA jusqu'au
+    prochain précalcul
     """
     print(f"\n🌐 /predict/{symbol} appelé à {datetime.now().strftime('%H:%M:%S')}")
     
-    result = predict_close(symbol)
+    result = predict_close(symbol, budget_ms=budget_ms)
     
     if "error" in result and result["error"]:
         raise HTTPException(status_code=400, detail=result["message"])
     
-    return result
+    max_age = FAST_TIER_MAX_AGE if result.get("tier") == "fast" else seconds_until_next_update()
+    return cached_json(request, result, etag(result["symbol"], result["run_id"], weak=True), max_age)
 
 @app.get("/status/{symbol}")
-def get_status(symbol: str):
-    """État des données et prédictions"""
-    from influxdb_client_local import get_close_from_influx, get_prediction_for_today
-    
+async def get_status(request: Request, symbol: str):
+    """
+    État des données et prédictions (ETag: dernière barre et prédiction du jour)
+    Sans prédiction du jour, revalidé à chaque appel: /predict peut la stocker à tout moment
+    """
     symbol = symbol.upper()
     today = datetime.now().date()
     
-    df = get_close_from_influx(symbol)
-    prediction = get_prediction_for_today(symbol)
+    df, horizon = await asyncio.gather(
+        aget_close_from_influx(symbol),
+        aget_prediction_horizon(symbol, days=1)
+    )
+    prediction = float(horizon["predicted_close"].iloc[0]) if not horizon.empty else None
+    last_date = df.index[-1].date().isoformat() if not df.empty else None
+    last_close = float(df['close'].iloc[-1]) if not df.empty else None
     
-    return {
+    # Corps entièrement déterminé par l'ETag (pas d'horodatage de la réponse)
+    payload = {
         "symbol": symbol,
         "today": today.isoformat(),
         "has_historical_data": not df.empty,
         "historical_days": len(df) if not df.empty else 0,
-        "last_close": float(df['close'].iloc[-1]) if not df.empty else None,
-        "last_date": df.index[-1].date().isoformat() if not df.empty else None,
+        "last_close": last_close,
+        "last_date": last_date,
         "has_today_prediction": prediction is not None,
         "today_prediction": prediction,
-        "needs_more_data": len(df) < 30 if not df.empty else True,
-        "timestamp": datetime.now().isoformat()
+        "needs_more_data": len(df) < 30 if not df.empty else True
     }
+    tag = etag(symbol, today, last_date, len(df), last_close, prediction)
+    max_age = seconds_until_next_update() if prediction is not None else 0
+    return cached_json(request, payload, tag, max_age)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,161 @@
+# backend/market_overview.py
+import time
+import threading
+
+import numpy as np
+import pandas as pd
+
+from broadcaster import broadcaster
+from http_cache import dumps, etag
+from ingestion import is_stale
+from single_flight import SingleFlight
+
+# Configuration
+OVERVIEW_TTL = 300              # secondes: reconstruction même sans événement
+OVERVIEW_LOOKBACK_DAYS = 100
+SPARKLINE_POINTS = 30           # dernières clôtures renvoyées par marché
+
+
+def _prediction(predicted_close, model, last_close):
+    predicted_close = float(predicted_close)
+    model = model if isinstance(model, str) else "ARIMA"
+    return {
+        "predicted_close": predicted_close,
+        "model": model,
+        "tier": "arima" if model == "ARIMA" else "fast",
+        "change_percent": round((predicted_close - last_close) / last_close * 100, 2) if last_close else None,
+    }
+
+
+class MarketOverview:
+    """
+    Vue d'ensemble de tous les marchés, un instantané partagé par les requêtes
+
+    Par marché: dernier close et variation, prédiction du jour, fraîcheur
+    des données et sparkline des dernières clôtures.
+
+    - construit avec une requête groupée sur les clôtures (get_closes_matrix)
+      et une sur les prédictions du jour, quel que soit le nombre de marchés
+    - prédiction publiée → ligne du symbole mise à jour sur place (sans
+      attendre que la file d'écriture du stockage soit vidée)
+    - nouvelles barres → reconstruction à la demande suivante
+    """
+
+    def __init__(self, ttl=OVERVIEW_TTL, lookback_days=OVERVIEW_LOOKBACK_DAYS, points=SPARKLINE_POINTS):
+        self.ttl = ttl
+        self.lookback_days = lookback_days
+        self.points = points
+        self.builds = 0
+        self._snapshot = None
+        self._expires_at = 0.0
+        self._version = 0           # incrémenté à chaque invalidation
+        self._predictions = {}      # symbol -> dernière prédiction publiée (jour courant)
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+
+    def get(self, markets):
+        """Instantané courant, reconstruit s'il est expiré, invalidé ou d'un autre jour"""
+        today = pd.Timestamp.now().date().isoformat()
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot["date"] == today and self._expires_at > time.monotonic():
+                return snapshot
+        return self._flight.do("overview", lambda: self.refresh(markets))
+
+    def refresh(self, markets):
+        """Reconstruit l'instantané (deux requêtes au stockage)"""
+        from influxdb_client_local import get_closes_matrix, get_predictions_for_day
+
+        with self._lock:
+            version = self._version
+
+        symbols = [m["symbol"] for m in markets]
+        today = pd.Timestamp.now().date().isoformat()
+        matrix = get_closes_matrix(symbols, lookback_days=self.lookback_days, fill=None)
+        predictions = get_predictions_for_day(symbols)
+        rows = [self._row(market, matrix, predictions) for market in markets]
+
+        with self._lock:
+            published = {s: p for s, p in self._predictions.items() if p.get("prediction_date", "")[:10] == today}
+            self._predictions = published
+            rows = [self._with_prediction(row, published[row["symbol"]]) if row["symbol"] in published else row
+                    for row in rows]
+            snapshot = self._snapshot = self._make_snapshot(rows, today)
+            # Invalidé pendant la construction: resservi, mais reconstruit à la demande suivante
+            self._expires_at = time.monotonic() + self.ttl if version == self._version else 0.0
+            self.builds += 1
+        return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._expires_at = 0.0
+
+    def on_event(self, message):
+        """Écouteur du broadcaster: nouvelles barres et nouvelles prédictions"""
+        event, symbol, data = message["event"], message["symbol"], message["data"]
+        if event == "bars":
+            self.invalidate()
+        elif event == "prediction" and symbol and data.get("predicted_close") is not None:
+            self._apply_prediction(symbol.upper(), data)
+
+    def _row(self, market, matrix, predictions):
+        symbol = market["symbol"]
+        closes = matrix[symbol].dropna() if symbol in matrix else pd.Series(dtype=float)
+        row = {
+            "symbol": symbol,
+            "name": market["name"],
+            "last_close": None,
+            "last_date": None,
+            "change": None,
+            "change_percent": None,
+            "stale": True,
+            "data_points": len(closes),
+            "prediction": None,
+            "sparkline": [],
+        }
+        if closes.empty:
+            return row
+
+        last = float(closes.iloc[-1])
+        row.update(
+            last_close=round(last, 2),
+            last_date=closes.index[-1].date().isoformat(),
+            stale=bool(is_stale(closes)),
+            sparkline=np.round(closes.to_numpy()[-self.points:], 2).tolist(),
+        )
+        if len(closes) > 1:
+            previous = float(closes.iloc[-2])
+            row["change"] = round(last - previous, 2)
+            row["change_percent"] = round((last - previous) / previous * 100, 2)
+        if symbol in predictions.index:
+            row["prediction"] = _prediction(predictions.at[symbol, "predicted_close"],
+                                            predictions.at[symbol, "model"], last)
+        return row
+
+    def _with_prediction(self, row, data):
+        return {**row, "prediction": _prediction(data["predicted_close"], data.get("model"), row["last_close"])}
+
+    def _apply_prediction(self, symbol, data):
+        with self._lock:
+            self._predictions[symbol] = data
+            snapshot = self._snapshot
+            if snapshot is None or data.get("prediction_date", "")[:10] != snapshot["date"]:
+                return
+            # Copie: les requêtes en cours gardent un instantané cohérent
+            rows = [self._with_prediction(row, data) if row["symbol"] == symbol else row
+                    for row in snapshot["markets"]]
+            self._snapshot = self._make_snapshot(rows, snapshot["date"])
+
+    def _make_snapshot(self, rows, day):
+        # Corps = date + lignes uniquement: mêmes octets pour un même ETag fort
+        return {
+            "date": day,
+            "etag": etag("overview", day, dumps(rows)),
+            "markets": rows,
+        }
+
+
+# Instance partagée par le process, tenue à jour par les événements publiés
+market_overview = MarketOverview()
+broadcaster.add_listener(market_overview.on_event)
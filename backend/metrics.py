@@ -0,0 +1,189 @@
+# backend/metrics.py
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Bornes (secondes) des histogrammes de latence: de 1 ms à 1 min
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Label symbol: marchés suivis seulement (renseignés par main), le reste
+# regroupé sous OTHER_LABEL pour borner le nombre de séries
+KNOWN_SYMBOLS = set()
+OTHER_LABEL = "other"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help, labels=(), allowed=None):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.allowed = allowed or {}    # label -> valeurs admises (les autres → OTHER_LABEL)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _value(self, name, labels):
+        value = str(labels.get(name, ""))
+        allowed = self.allowed.get(name)
+        if allowed is not None and value and value not in allowed:
+            return OTHER_LABEL
+        return value
+
+    def _key(self, labels):
+        return tuple(self._value(n, labels) for n in self.labels)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Compteur monotone par combinaison de labels"""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labels, k)} {_format_value(v)}" for k, v in series]
+
+
+class Gauge(_Metric):
+    """Valeur instantanée, lue au moment du rendu (callback)"""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, fn):
+        super().__init__(name, help)
+        self.fn = fn
+
+    def render(self):
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        return self.header() + [f"{self.name} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    """
+    Histogramme à bornes fixes (cumulé au rendu)
+
+    observe() = une recherche dichotomique + trois incréments sous verrou
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS, allowed=None):
+        super().__init__(name, help, labels, allowed)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Chronomètre un bloc; les labels peuvent être complétés dans le bloc"""
+        start = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        with self._lock:
+            series = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._series.items())
+
+        lines = self.header()
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """Format texte d'exposition Prometheus (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ===== Pipeline de prédiction =====
+PREDICT_SECONDS = registry.register(Histogram(
+    "predict_seconds", "Durée totale de predict_close",
+    labels=("symbol", "cache", "tier", "order"), allowed={"symbol": KNOWN_SYMBOLS}))
+PREDICT_STAGE_SECONDS = registry.register(Histogram(
+    "predict_stage_seconds", "Durée par étape du pipeline de prédiction",
+    labels=("stage", "symbol"), allowed={"symbol": KNOWN_SYMBOLS}))
+
+# ===== I/O =====
+INFLUX_QUERY_SECONDS = registry.register(Histogram(
+    "influx_query_seconds", "Durée des requêtes InfluxDB",
+    labels=("query", "status")))
+INFLUX_WRITE_SECONDS = registry.register(Histogram(
+    "influx_write_seconds", "Durée des écritures InfluxDB (un lot)",
+    labels=("writer", "status")))
+INFLUX_WRITE_ROWS = registry.register(Counter(
+    "influx_write_rows_total", "Lignes écrites dans InfluxDB",
+    labels=("writer", "status")))
+ALPHA_VANTAGE_SECONDS = registry.register(Histogram(
+    "alpha_vantage_seconds", "Durée des appels Alpha Vantage",
+    labels=("outputsize", "status")))
+
+# ===== Modèles =====
+ARIMA_FIT_SECONDS = registry.register(Histogram(
+    "arima_fit_seconds", "Durée des fits / mises à jour statsmodels",
+    labels=("order", "kind")))
+FALLBACKS = registry.register(Counter(
+    "fallbacks_total", "Chemins de repli empruntés",
+    labels=("kind",)))
+
@@ -0,0 +1,265 @@
+# backend/precompute.py
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+import pandas as pd
+
+from single_flight import LOCK_DIR
+
+# Verrou inter-process (workers uvicorn) - POSIX uniquement
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Précalcul nocturne: après la clôture US (22h heure de Paris) et après minuit,
+# pour que les prévisions du jour soient prêtes avant le premier utilisateur
+PRECOMPUTE_AT = os.environ.get("PRECOMPUTE_AT", "00:30")            # heure locale HH:MM
+PRECOMPUTE_CONCURRENCY = int(os.environ.get("PRECOMPUTE_CONCURRENCY", "0")) or None  # None = un fit par worker
+PRECOMPUTE_ENABLED = os.environ.get("PRECOMPUTE_ENABLED", "1") == "1"
+REPORT_DIR = os.path.join(os.path.dirname(__file__), "precompute_reports")
+
+_run_lock = threading.Lock()
+
+
+def _slot_time(at=PRECOMPUTE_AT):
+    hour, minute = (int(part) for part in at.split(":"))
+    return pd.Timedelta(hours=hour, minutes=minute)
+
+
+def last_slot(now=None, at=PRECOMPUTE_AT):
+    """Dernier créneau planifié déjà passé"""
+    now = pd.Timestamp(now or pd.Timestamp.now())
+    slot = now.normalize() + _slot_time(at)
+    return slot if slot <= now else slot - pd.Timedelta(days=1)
+
+
+def next_slot(now=None, at=PRECOMPUTE_AT):
+    return last_slot(now, at) + pd.Timedelta(days=1)
+
+
+def _report_path(run_date):
+    return os.path.join(REPORT_DIR, f"precompute_{run_date.replace('-', '')}.json")
+
+
+def save_report(report):
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    path = _report_path(report["run_date"])
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    os.replace(tmp, path)
+    return path
+
+
+def load_last_report():
+    """Rapport du run le plus récent, ou None"""
+    try:
+        names = sorted(n for n in os.listdir(REPORT_DIR) if n.startswith("precompute_") and n.endswith(".json"))
+        if names:
+            with open(os.path.join(REPORT_DIR, names[-1])) as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def run_missed(now=None, at=PRECOMPUTE_AT):
+    """Vrai si le dernier créneau passé n'a pas de run terminé (API arrêtée, crash...)"""
+    report = load_last_report()
+    if report is None:
+        return True
+    return report["run_date"] < last_slot(now, at).date().isoformat()
+
+
+@contextmanager
+def _worker_lock():
+    """
+    Verrou fichier non bloquant partagé par les workers uvicorn
+    Vrai si ce worker l'a obtenu: les autres sautent le run au lieu de l'attendre
+    """
+    if fcntl is None:
+        yield True
+        return
+
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    with open(os.path.join(LOCK_DIR, "precompute.lock"), "w") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _already_done(trigger, at=PRECOMPUTE_AT):
+    """Run planifié ou de rattrapage déjà terminé par un autre worker"""
+    if trigger == "catch-up":
+        return not run_missed(at=at)
+    if trigger == "scheduled":
+        report = load_last_report()
+        return report is not None and report["run_date"] >= pd.Timestamp.now().date().isoformat()
+    return False
+
+
+def run_precompute(symbols, concurrency=PRECOMPUTE_CONCURRENCY, trigger="manual", min_days=30,
+                   at=PRECOMPUTE_AT):
+    """
+    Précalcule les prévisions de tous les symboles
+
+    1. Nouvelles barres (Alpha Vantage, quotas respectés) pour chaque symbole
+       dont la dernière séance manque
+    2. Recherche d'ordre pour les symboles dont l'ordre est ancien
+    3. Fits ARIMA parallèles (au plus `concurrency`) sans cache mémoire
+    4. Prévisions écrites dans InfluxDB et caches chauds
+       (cache mémoire, modèles, cache disque local)
+
+    Un seul run à la fois, tous workers confondus (verrou fichier):
+    chaque worker planifie le précalcul, un seul consomme le quota
+    Alpha Vantage.
+    
+    Returns:
+        dict: Rapport du run (aussi écrit dans precompute_reports/),
+              None si un autre run est en cours ou a déjà couvert le créneau
+    """
+    if not _run_lock.acquire(blocking=False):
+        print("⏭️ Précalcul déjà en cours")
+        return None
+
+    try:
+        with _worker_lock() as acquired:
+            if not acquired:
+                print("⏭️ Précalcul en cours dans un autre worker")
+                return None
+            if _already_done(trigger, at):
+                print(f"⏭️ Précalcul ({trigger}) déjà effectué par un autre worker")
+                return None
+            return _run_precompute(symbols, concurrency, trigger, min_days)
+    finally:
+        _run_lock.release()
+
+
+def _run_precompute(symbols, concurrency, trigger, min_days):
+    from ingestion import ingest_markets
+    from arima.batch_predict import predict_batch
+    from arima.order_selection import order_is_stale, search_order
+    from influxdb_client_local import get_close_from_influx, flush_writes
+
+    started = pd.Timestamp.now()
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    report = {
+        "run_date": started.date().isoformat(),
+        "trigger": trigger,
+        "started_at": started.isoformat(),
+        "concurrency": concurrency,
+        "symbols": {s: {"status": "pending"} for s in symbols},
+    }
+    print(f"\n🌙 PRÉCALCUL ({trigger}): {len(symbols)} symboles")
+
+    # ===== 1. NOUVELLES BARRES =====
+    t0 = time.perf_counter()
+    errors = {}
+    try:
+        days = asyncio.run(ingest_markets(symbols, min_days=min_days, refresh=True, errors=errors))
+    except Exception as e:
+        print(f"❌ Ingestion échouée: {e}")
+        days = {}
+        errors = {symbol: f"{type(e).__name__}: {e}" for symbol in symbols}
+    report["ingestion_seconds"] = round(time.perf_counter() - t0, 3)
+    report["ingestion_errors"] = len(errors)
+    for symbol in symbols:
+        report["symbols"][symbol]["days"] = days.get(symbol, 0)
+        if symbol in errors:
+            # Prévision faite sur les barres déjà stockées
+            report["symbols"][symbol]["ingestion_error"] = errors[symbol]
+
+    # ===== 2. ORDRES ARIMA =====
+    t0 = time.perf_counter()
+    for symbol in symbols:
+        if order_is_stale(symbol):
+            df = get_close_from_influx(symbol)
+            if len(df) >= min_days:
+                search_order(symbol, df)
+    report["order_search_seconds"] = round(time.perf_counter() - t0, 3)
+
+    # ===== 3-4. FITS + STOCKAGE =====
+    t0 = time.perf_counter()
+    for result in predict_batch(symbols, use_cache=False, concurrency=concurrency):
+        entry = report["symbols"].setdefault(result["symbol"], {})
+        entry["completed_after_seconds"] = round(time.perf_counter() - t0, 3)
+        if result.get("error"):
+            entry.update(status="error", message=result["message"])
+        else:
+            entry.update(
+                status="ok",
+                model=result["model"],
+                tier=result["tier"],
+                fit_seconds=result.get("fit_seconds"),
+                predicted_close=result["predicted_close"],
+            )
+    report["forecast_seconds"] = round(time.perf_counter() - t0, 3)
+
+    # Prédictions visibles dans le stockage pour les autres workers
+    flush_writes()
+
+    finished = pd.Timestamp.now()
+    statuses = [entry["status"] for entry in report["symbols"].values()]
+    report.update(
+        finished_at=finished.isoformat(),
+        duration_seconds=round((finished - started).total_seconds(), 3),
+        ok=statuses.count("ok"),
+        failed=len(statuses) - statuses.count("ok"),
+    )
+    path = save_report(report)
+    print(f"✅ PRÉCALCUL terminé: {report['ok']}/{len(symbols)} en {report['duration_seconds']:.1f}s ({path})")
+    return report
+
+
+async def precompute_loop(symbols, at=PRECOMPUTE_AT, concurrency=PRECOMPUTE_CONCURRENCY):
+    """
+    Planificateur (tâche du lifespan FastAPI)
+
+    Rattrapage au démarrage si le dernier créneau a été manqué,
+    puis un run par jour à `at` (heure locale). Un run en échec n'arrête
+    pas le planificateur.
+    """
+    if run_missed(at=at):
+        try:
+            await asyncio.to_thread(run_precompute, symbols, concurrency, "catch-up", at=at)
+        except Exception as e:
+            print(f"❌ Précalcul de rattrapage échoué: {e}")
+
+    while True:
+        wait = (next_slot(at=at) - pd.Timestamp.now()).total_seconds()
+        print(f"🌙 Prochain précalcul dans {wait / 3600:.1f}h")
+        await asyncio.sleep(max(wait, 1))
+        try:
+            await asyncio.to_thread(run_precompute, symbols, concurrency, "scheduled", at=at)
+        except Exception as e:
+            print(f"❌ Précalcul échoué: {e}")
+
+
+if __name__ == "__main__":
+    # python -m precompute [--loop] [--concurrency N] [SYMBOLS...]
+    import argparse
+    from main import SUPPORTED_MARKETS
+
+    parser = argparse.ArgumentParser(description="Précalcul des prévisions de tous les marchés")
+    parser.add_argument("symbols", nargs="*")
+    parser.add_argument("--concurrency", type=int, default=PRECOMPUTE_CONCURRENCY)
+    parser.add_argument("--loop", action="store_true", help="Rester actif et lancer un run par jour")
+    args = parser.parse_args()
+
+    symbols = args.symbols or [m["symbol"] for m in SUPPORTED_MARKETS]
+    if args.loop:
+        asyncio.run(precompute_loop(symbols, concurrency=args.concurrency))
+    else:
+        report = run_precompute(symbols, concurrency=args.concurrency)
+        sys.exit(0 if report and not report["failed"] else 1)
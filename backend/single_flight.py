@@ -0,0 +1,107 @@
+# backend/single_flight.py
+import os
+import time
+import tempfile
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+# Verrou inter-process (workers uvicorn) - POSIX uniquement
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+LOCK_DIR = os.path.join(tempfile.gettempdir(), "financial-dashboard-locks")
+LOCK_TIMEOUT = 120  # secondes
+
+
+class SingleFlight:
+    """
+    Regroupe les appels concurrents sur une même clé
+
+    Le premier appelant exécute la fonction, les suivants attendent
+    le même Future et reçoivent le même résultat (ou la même exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> Future
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not leader:
+            print(f"🔗 {key}: calcul déjà en cours, attente du résultat partagé")
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self):
+        """Clés en cours de calcul"""
+        with self._lock:
+            return list(self._calls)
+
+
+@contextmanager
+def symbol_file_lock(symbol, timeout=LOCK_TIMEOUT):
+    """
+    Verrou fichier par symbole, partagé entre les workers uvicorn
+
+    Si le verrou n'est pas obtenu avant `timeout`, on continue sans:
+    mieux vaut un calcul dupliqué qu'une requête bloquée.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    path = os.path.join(LOCK_DIR, f"{symbol.upper()}.lock")
+
+    with open(path, "w") as handle:
+        deadline = time.monotonic() + timeout
+        acquired = False
+        waited = False
+
+        while True:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                acquired = True
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    print(f"⚠️ Verrou {symbol} non obtenu après {timeout}s, on continue")
+                    break
+                if not waited:
+                    print(f"⏳ {symbol}: calcul en cours dans un autre worker...")
+                    waited = True
+                time.sleep(0.05)
+
+        try:
+            yield
+        finally:
+            if acquired:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+# Instance partagée par le process
+predict_flight = SingleFlight()
@@ -0,0 +1,229 @@
+# backend/sqlite_storage.py
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+import config
+from storage import StorageBackend
+from influx_writer import index_to_ns
+
+# Une barre / une prédiction par (symbole, date): clé primaire en cluster
+# (WITHOUT ROWID), une lecture d'historique est un parcours contigu
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    t INTEGER NOT NULL,             -- ns UTC (comme le line protocol)
+    close REAL NOT NULL,
+    PRIMARY KEY (symbol, t)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS predictions (
+    symbol TEXT NOT NULL,
+    t INTEGER NOT NULL,             -- date cible, ns UTC
+    predicted_close REAL NOT NULL,
+    model TEXT,
+    run_date TEXT,                  -- jour du run qui a écrit la courbe (YYYY-MM-DD)
+    PRIMARY KEY (symbol, t)
+) WITHOUT ROWID;
+"""
+
+SQLITE_BUSY_TIMEOUT = 10.0      # secondes d'attente sur un verrou d'écriture (autre process)
+
+BAR_DTYPE = np.dtype([("t", "<i8"), ("close", "<f8")])
+_TABLES = {"stock_prices": "bars", "predictions": "predictions"}
+_VALUE_COLUMNS = {"bars": "close", "predictions": "predicted_close"}    # champ numérique lu par table
+
+
+def _ns(value):
+    return int(index_to_ns([pd.Timestamp(value)])[0])
+
+
+def _index(ns):
+    return pd.DatetimeIndex(np.asarray(ns, dtype="int64").view("M8[ns]"), name="date").tz_localize("UTC")
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    Fichier SQLite local (sans serveur): petites installations, CI, benchmarks
+
+    - une connexion par thread, journal WAL (lecteurs jamais bloqués
+      par l'écrivain), plusieurs process peuvent partager le fichier
+    - écritures synchrones en une transaction (barres et prédictions)
+    - un seul champ numérique par table ("close" pour les barres,
+      "predicted_close" pour les prédictions): un autre champ demandé
+      revient en NaN, comme avec InfluxDB
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path=None):
+        self.path = path or config.SQLITE_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.rows_written = 0
+
+        self._conn().executescript(SCHEMA)
+        self._migrate()
+        print(f"✅ Stockage SQLite: {self.path}")
+
+    def _migrate(self):
+        # Fichiers créés avant la colonne run_date
+        columns = {row[1] for row in self._read("PRAGMA table_info(predictions)")}
+        if "run_date" not in columns:
+            self._conn().execute("ALTER TABLE predictions ADD COLUMN run_date TEXT")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Utilisée par un seul thread; check_same_thread=False pour la fermer depuis close()
+            conn = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _read(self, sql, args=()):
+        self.reads += 1
+        return self._conn().execute(sql, args).fetchall()
+
+    def _start(self, lookback_days):
+        return _ns(pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=lookback_days))
+
+    def _table(self, measurement):
+        if measurement not in _TABLES:
+            raise ValueError(f"Mesure inconnue: {measurement}")
+        return _TABLES[measurement]
+
+    # ----- lectures -----
+
+    def read_series(self, symbol, lookback_days=100, fields=("close",), measurement="stock_prices"):
+        fields = list(fields)
+        table = self._table(measurement)
+        column = _VALUE_COLUMNS[table]
+        rows = self._read(f"SELECT t, {column} FROM {table} WHERE symbol = ? AND t >= ? ORDER BY t",
+                          (symbol, self._start(lookback_days)))
+        if not rows:
+            return pd.DataFrame()
+
+        records = np.array(rows, dtype=BAR_DTYPE)
+        frame = pd.DataFrame({column: records["close"]}, index=_index(records["t"]))
+        return frame.reindex(columns=fields)
+
+    def read_panel(self, symbols, lookback_days=100, field="close", measurement="stock_prices"):
+        symbols = list(symbols)
+        table = self._table(measurement)
+        column = _VALUE_COLUMNS[table]
+        if not symbols or field != column:
+            return pd.DataFrame()
+
+        # Un parcours de clé primaire par symbole, puis matrice dates × symboles en NumPy
+        start = self._start(lookback_days)
+        query = f"SELECT t, {column} FROM {table} WHERE symbol = ? AND t >= ?"
+        series = [np.array(self._read(query, (symbol, start)), dtype=BAR_DTYPE) for symbol in symbols]
+        if not any(len(records) for records in series):
+            return pd.DataFrame()
+
+        dates = np.unique(np.concatenate([records["t"] for records in series]))
+        matrix = np.full((len(dates), len(symbols)), np.nan)
+        for i, records in enumerate(series):
+            matrix[np.searchsorted(dates, records["t"]), i] = records["close"]
+        return pd.DataFrame(matrix, index=_index(dates), columns=symbols)
+
+    def read_horizon(self, symbol, start, stop):
+        rows = self._read("SELECT t, predicted_close, model, run_date FROM predictions "
+                          "WHERE symbol = ? AND t >= ? AND t < ? ORDER BY t",
+                          (symbol, _ns(start), _ns(stop)))
+        if not rows:
+            return pd.DataFrame()
+
+        t, values, models, runs = zip(*rows)
+        return pd.DataFrame({"predicted_close": values, "model": models, "run_date": runs}, index=_index(t))
+
+    def read_prediction_panel(self, symbols, start, stop):
+        symbols = list(symbols)
+        if not symbols:
+            return pd.DataFrame()
+        rows = self._read("SELECT t, symbol, predicted_close, model FROM predictions "
+                          f"WHERE symbol IN ({', '.join('?' * len(symbols))}) AND t >= ? AND t < ? ORDER BY t",
+                          (*symbols, _ns(start), _ns(stop)))
+        if not rows:
+            return pd.DataFrame()
+
+        t, symbol, values, models = zip(*rows)
+        return pd.DataFrame({"symbol": symbol, "predicted_close": values, "model": models}, index=_index(t))
+
+    def last_bar(self, symbol):
+        (t,), = self._read("SELECT MAX(t) FROM bars WHERE symbol = ?", (symbol,))
+        return _index([t])[0] if t is not None else None
+
+    def latest_prediction(self, symbol, since):
+        rows = self._read("SELECT predicted_close FROM predictions WHERE symbol = ? AND t >= ? AND t <= ? "
+                          "ORDER BY t DESC LIMIT 1",
+                          (symbol, _ns(since), _ns(pd.Timestamp.now(tz="UTC"))))
+        return rows[0][0] if rows else None
+
+    # ----- écritures -----
+
+    def _write(self, sql, rows):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(sql, rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.rows_written += len(rows)
+
+    def write_bars(self, symbol, df, batch_size=None):
+        """Une transaction (upsert); retourne (lignes, lignes non écrites)"""
+        values = df['close'].to_numpy(dtype=np.float64)
+        keep = np.isfinite(values)
+        timestamps = index_to_ns(df.index)[keep].tolist()
+        rows = list(zip([symbol] * len(timestamps), timestamps, values[keep].tolist()))
+        self._write("INSERT OR REPLACE INTO bars (symbol, t, close) VALUES (?, ?, ?)", rows)
+        return len(rows), 0
+
+    def write_predictions(self, symbol, dates, predictions, model="ARIMA", run_date=None, wait=False):
+        # Toujours synchrone (une transaction)
+        rows = [(symbol, int(t), float(v), model, run_date) for t, v in zip(index_to_ns(dates), predictions)]
+        self._write("INSERT OR REPLACE INTO predictions (symbol, t, predicted_close, model, run_date) "
+                    "VALUES (?, ?, ?, ?, ?)", rows)
+
+    def delete(self, measurement, symbol=None):
+        table = self._table(measurement)
+        if symbol is None:
+            self._conn().execute(f"DELETE FROM {table}")
+        else:
+            self._conn().execute(f"DELETE FROM {table} WHERE symbol = ?", (symbol,))
+
+    # ----- cycle de vie -----
+
+    def ping(self):
+        self._conn().execute("SELECT 1").fetchone()
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def stats(self):
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return {
+            "backend": self.name,
+            "path": self.path,
+            "size_bytes": size,
+            "reads": self.reads,
+            "rows_written": self.rows_written,
+        }
@@ -0,0 +1,138 @@
+# backend/storage.py
+import asyncio
+from abc import ABC, abstractmethod
+
+import config
+
+
+class StorageBackend(ABC):
+    """
+    Interface de persistance: historique des clôtures, prédictions, fraîcheur
+
+    Conventions communes aux implémentations:
+    - lectures: DataFrame indexé par date UTC (DatetimeIndex "date"),
+      vide si aucune donnée, NaN pour un champ absent
+    - écritures de barres synchrones (visibles à la lecture suivante),
+      écritures de prédictions éventuellement différées (flush())
+    - les erreurs sont levées telles quelles: disjoncteur, métriques et
+      repli sur le cache local restent dans influxdb_client_local
+    - méthodes abstraites obligatoires (une implémentation incomplète
+      échoue à l'instanciation), le reste a un comportement par défaut
+    """
+
+    name = "base"
+
+    # ----- lectures -----
+
+    @abstractmethod
+    def read_series(self, symbol, lookback_days=100, fields=("close",), measurement="stock_prices"):
+        """Série d'un symbole, une colonne par champ"""
+        ...
+
+    @abstractmethod
+    def read_panel(self, symbols, lookback_days=100, field="close", measurement="stock_prices"):
+        """Plusieurs symboles alignés sur les dates, une colonne par symbole"""
+        ...
+
+    @abstractmethod
+    def read_horizon(self, symbol, start, stop):
+        """Prédictions stockées de [start, stop[: colonnes predicted_close, model et run_date"""
+        ...
+
+    @abstractmethod
+    def read_prediction_panel(self, symbols, start, stop):
+        """Prédictions stockées de plusieurs symboles sur [start, stop[: colonnes symbol, predicted_close, model"""
+        ...
+
+    @abstractmethod
+    def last_bar(self, symbol):
+        """Date (UTC) de la dernière barre stockée, ou None"""
+        ...
+
+    @abstractmethod
+    def latest_prediction(self, symbol, since):
+        """Dernière valeur prédite pour une date ≥ since, ou None"""
+        ...
+
+    # ----- écritures -----
+
+    @abstractmethod
+    def write_bars(self, symbol, df, batch_size=None):
+        """Écrit les clôtures de df (colonne 'close'); retourne (lignes, lignes non écrites)"""
+        ...
+
+    @abstractmethod
+    def write_predictions(self, symbol, dates, predictions, model="ARIMA", run_date=None, wait=False):
+        """
+        Écrit les prédictions; wait=True: visibles à la lecture suivante (même différées)
+        run_date: jour du run (YYYY-MM-DD), relu par read_horizon
+        """
+        ...
+
+    @abstractmethod
+    def delete(self, measurement, symbol=None):
+        """Supprime une mesure ("stock_prices" / "predictions"), pour un symbole ou tous"""
+        ...
+
+    # ----- cycle de vie -----
+
+    @abstractmethod
+    def ping(self):
+        """Lève une exception si le stockage est injoignable"""
+        ...
+
+    def flush(self):
+        """Rend visibles les écritures différées"""
+
+    def close(self):
+        """Écrit ce qui reste en attente et libère les ressources"""
+
+    def pending_writes(self):
+        return 0
+
+    def stats(self):
+        return {"backend": self.name}
+
+    # ----- asynchrone (boucle FastAPI) -----
+    # Par défaut les appels synchrones passent dans un thread
+
+    async def open_async(self):
+        pass
+
+    async def close_async(self):
+        pass
+
+    async def aread_series(self, symbol, lookback_days=100, fields=("close",), measurement="stock_prices"):
+        return await asyncio.to_thread(self.read_series, symbol, lookback_days, fields, measurement)
+
+    async def aread_horizon(self, symbol, start, stop):
+        return await asyncio.to_thread(self.read_horizon, symbol, start, stop)
+
+    async def aping(self):
+        return await asyncio.to_thread(self.ping)
+
+
+def _influx(**kwargs):
+    from influx_storage import InfluxStorage
+    return InfluxStorage(**kwargs)
+
+
+def _sqlite(**kwargs):
+    from sqlite_storage import SQLiteStorage
+    kwargs.pop("breaker", None)
+    return SQLiteStorage(**kwargs)
+
+
+# Implémentations importées à la demande (le client InfluxDB n'est pas requis pour SQLite)
+STORAGE_BACKENDS = {
+    "influx": _influx,
+    "sqlite": _sqlite,
+}
+
+
+def open_storage(name=None, **kwargs):
+    """Backend configuré (STORAGE_BACKEND), ou `name`"""
+    name = (name or config.STORAGE_BACKEND).lower()
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(f"Backend de stockage inconnu: {name} ({', '.join(STORAGE_BACKENDS)})")
+    return STORAGE_BACKENDS[name](**kwargs)
@@ -1,11 +1,8 @@
 # backend/test_influx_query.py
+# Script manuel (serveur InfluxDB requis); benchmarks hors ligne: python -m benchmarks
 from influxdb_client import InfluxDBClient
 from influxdb_client.client.query_api import QueryApi
-
-INFLUX_URL = "http://localhost:8086"
-INFLUX_TOKEN = "_eUyZZY91Y0Lvq3kQeLOP0-iC_jRtnSTUxUnbbsfdKEhCaC5GpTopqT8QiDB0dcVlewES29Gf8R0TsuSJXs0YQ=="
-INFLUX_ORG = "NOSQL"
-INFLUX_BUCKET = "Data-Finance"
+from config import INFLUX_URL, INFLUX_TOKEN, INFLUX_ORG, INFLUX_BUCKET
 
 client = InfluxDBClient(url=INFLUX_URL, token=INFLUX_TOKEN, org=INFLUX_ORG)
 query_api = client.query_api()
@@ -61,9 +58,9 @@ def test_query(symbol):
 
 def list_measurements():
     """Liste toutes les measurements"""
-    query = '''
+    query = f'''
     import "influxdata/influxdb/schema"
-    schema.measurements(bucket: "Data-Finance")
+    schema.measurements(bucket: "{INFLUX_BUCKET}")
     '''
     
     try:
@@ -77,8 +74,8 @@ def list_measurements():
 
 def list_symbols():
     """Liste tous les symboles"""
-    query = '''
-    from(bucket: "Data-Finance")
+    query = f'''
+    from(bucket: "{INFLUX_BUCKET}")
       |> range(start: -30d)
       |> filter(fn: (r) => r._measurement == "stock_prices")
       |> group(columns: ["symbol"])
@@ -0,0 +1,35 @@
+# backend/tests/conftest.py
+#
+# Tests hors ligne: stockage SQLite temporaire, aucun serveur InfluxDB ni
+# appel Alpha Vantage. Les variables d'environnement doivent être posées
+# avant l'import des modules du backend (lues à l'import).
+import os
+import sys
+import tempfile
+
+_ROOT = tempfile.mkdtemp(prefix="dashboard-tests-")
+os.environ.update(
+    STORAGE_BACKEND="sqlite",
+    SQLITE_PATH=os.path.join(_ROOT, "market.sqlite3"),
+    MARKET_CACHE_DIR=os.path.join(_ROOT, "market_cache"),
+    MODEL_REGISTRY_DIR=os.path.join(_ROOT, "models"),
+    PRECOMPUTE_ENABLED="0",
+    PROFILING_ENABLED="1",          # middleware actif seulement avec X-Profile / ?profile=
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """Stockage vide, caches du client (disque local, high-water marks) remis à zéro"""
+    import local_cache
+    import influxdb_client_local as client
+
+    for measurement in ("stock_prices", "predictions"):
+        client.storage.delete(measurement)
+    client._high_water.clear()
+    monkeypatch.setattr(local_cache, "CACHE_DIR", str(tmp_path / "market_cache"))
+    yield client.storage
+    client.flush_writes()
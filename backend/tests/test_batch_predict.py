@@ -0,0 +1,40 @@
+# backend/tests/test_batch_predict.py
+import time
+
+import pytest
+
+from arima import batch_predict
+from benchmarks.fakes import synthetic_prices
+from influxdb_client_local import flush_writes, write_market_dataframe
+
+
+def _hang(symbol, dates, closes, state=None, order=None):
+    # Worker bloqué (ex: verrou hérité): ne rend jamais la main
+    time.sleep(3600)
+
+
+@pytest.fixture
+def pool():
+    batch_predict.shutdown_process_pool()
+    yield
+    current = batch_predict._pool
+    if current is not None:
+        batch_predict.discard_process_pool(current)
+
+
+def test_pool_does_not_fork_the_server_process(pool):
+    assert batch_predict.get_process_pool()._mp_context.get_start_method() in ("forkserver", "spawn")
+
+
+def test_stuck_fit_fails_the_job_instead_of_hanging(storage, pool, monkeypatch):
+    write_market_dataframe("AAPL", synthetic_prices("AAPL", days=60))
+    flush_writes()
+    monkeypatch.setattr(batch_predict, "BATCH_FIT_TIMEOUT", 1)
+    monkeypatch.setattr(batch_predict, "_fit_and_forecast", _hang)
+
+    start = time.perf_counter()
+    results = list(batch_predict.predict_batch(["AAPL"], use_cache=False))
+
+    assert [r["symbol"] for r in results] == ["AAPL"]
+    assert results[0]["error"] and "sans réponse" in results[0]["message"]
+    assert time.perf_counter() - start < 30
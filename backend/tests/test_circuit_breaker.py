@@ -0,0 +1,82 @@
+# backend/tests/test_circuit_breaker.py
+import time
+import asyncio
+
+import pytest
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def _fail():
+    raise ConnectionError("injoignable")
+
+
+def _trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+
+
+def test_opens_after_consecutive_failures_and_rejects_without_calling():
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=60)
+    calls = []
+
+    _trip(breaker)
+    with pytest.raises(CircuitOpenError):
+        breaker.call(calls.append, 1)
+
+    assert calls == []
+    assert breaker.stats()["state"] == "open"
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=60)
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+    breaker.call(lambda: None)
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+
+    assert breaker.state == "closed"
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+    _trip(breaker)
+    time.sleep(0.06)
+
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()     # essai déjà en cours
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_failed_probe_reopens_immediately():
+    breaker = CircuitBreaker("test", failure_threshold=5, reset_timeout=0.05)
+    _trip(breaker)
+    time.sleep(0.06)
+
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+
+    assert breaker.state == "open"
+    assert breaker.trips == 2
+
+
+def test_cancelled_probe_releases_the_half_open_slot():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+    _trip(breaker)
+    time.sleep(0.06)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(breaker.acall(asyncio.sleep, 1), timeout=0.01)
+
+    asyncio.run(run())
+
+    assert breaker.allow()
@@ -0,0 +1,54 @@
+# backend/tests/test_fetch_api.py
+import numpy as np
+
+from benchmarks.fakes import synthetic_prices
+from fetch_api import compute_delta
+
+
+def _stored(df):
+    # Comme une lecture du stockage: index UTC
+    return df.tz_localize("UTC")
+
+
+def test_without_existing_bars_everything_is_written():
+    fetched = synthetic_prices("AAPL", days=20)
+
+    assert compute_delta(fetched).equals(fetched)
+    # Un high-water mark seul ne prouve pas que les barres sont stockées
+    assert len(compute_delta(fetched, high_water=fetched.index[-1])) == 20
+
+
+def test_only_bars_after_the_high_water_mark_are_written():
+    fetched = synthetic_prices("AAPL", days=20)
+    existing = _stored(fetched.iloc[:15])
+
+    delta = compute_delta(fetched, existing, high_water=existing.index.max())
+
+    assert list(delta.index) == list(fetched.index[15:])
+
+
+def test_high_water_mark_defaults_to_the_last_existing_bar():
+    fetched = synthetic_prices("AAPL", days=20)
+
+    delta = compute_delta(fetched, _stored(fetched.iloc[:18]))
+
+    assert list(delta.index) == list(fetched.index[18:])
+
+
+def test_modified_or_missing_old_bars_are_rewritten():
+    fetched = synthetic_prices("AAPL", days=20)
+    existing = _stored(fetched.iloc[:15]).drop(index=_stored(fetched).index[3])
+    existing.iloc[5, 0] += 1.0      # correction de la clôture côté API
+
+    delta = compute_delta(fetched, existing, high_water=existing.index.max())
+
+    rewritten = {fetched.index[3], existing.index[5].tz_localize(None)}
+    assert set(delta.index) == rewritten | set(fetched.index[15:])
+
+
+def test_identical_bars_produce_an_empty_delta():
+    fetched = synthetic_prices("AAPL", days=20)
+    existing = _stored(fetched.copy())
+    existing["close"] += np.full(len(existing), 1e-9)   # arrondi du stockage
+
+    assert compute_delta(fetched, existing).empty
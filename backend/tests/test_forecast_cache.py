@@ -0,0 +1,64 @@
+# backend/tests/test_forecast_cache.py
+import pandas as pd
+
+from forecast_cache import ForecastCache
+
+LAST = pd.Timestamp("2026-10-16")
+
+
+def test_entry_is_served_until_invalidated():
+    cache = ForecastCache()
+    cache.put("aapl", LAST, (1, 1, 1), {"predictions": [1.0]})
+
+    assert cache.get("AAPL") == {"predictions": [1.0]}
+    cache.invalidate("AAPL")
+    assert cache.get("AAPL") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_returned_result_is_a_copy():
+    cache = ForecastCache()
+    cache.put("AAPL", LAST, (1, 1, 1), {"source": "arima"})
+
+    cache.get("AAPL")["source"] = "memory_cache"
+
+    assert cache.get("AAPL") == {"source": "arima"}
+
+
+def test_expired_entry_is_dropped():
+    cache = ForecastCache(ttl=0)
+    cache.put("AAPL", LAST, (1, 1, 1), {})
+
+    assert cache.get("AAPL") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_entry_from_a_previous_day_is_not_served():
+    cache = ForecastCache()
+    cache.put("AAPL", LAST, (1, 1, 1), {})
+    key = cache._latest["AAPL"]
+    expires_at, _, result = cache._entries[key]
+    cache._entries[key] = (expires_at, pd.Timestamp.now().normalize() - pd.Timedelta(days=1), result)
+
+    assert cache.get("AAPL") is None
+
+
+def test_new_close_replaces_the_previous_entry():
+    cache = ForecastCache()
+    cache.put("AAPL", LAST, (1, 1, 1), {"v": 1})
+    cache.put("AAPL", LAST + pd.Timedelta(days=1), (2, 1, 2), {"v": 2})
+
+    assert cache.get("AAPL") == {"v": 2}
+    assert cache.stats()["size"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ForecastCache(maxsize=2)
+    cache.put("AAPL", LAST, None, {"v": "aapl"})
+    cache.put("MSFT", LAST, None, {"v": "msft"})
+    cache.get("AAPL")
+    cache.put("TSLA", LAST, None, {"v": "tsla"})
+
+    assert cache.get("MSFT") is None
+    assert cache.get("AAPL") == {"v": "aapl"}
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,61 @@
+# backend/tests/test_influx_writer.py
+import time
+import threading
+
+from influx_writer import BatchingWriter, WriteBehindQueue
+
+
+class RecordingWriteApi:
+    """write_api minimal: garde chaque envoi (une chaîne de line protocol)"""
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def write(self, bucket=None, org=None, record=None, **kwargs):
+        with self._lock:
+            self.records.append(record)
+
+    @property
+    def lines(self):
+        return [line for record in self.records for line in record.split("\n")]
+
+
+def _queue(max_delay=0.5):
+    api = RecordingWriteApi()
+    return api, WriteBehindQueue(BatchingWriter(api, "bucket", flush_interval=0), max_delay=max_delay)
+
+
+def test_put_with_wait_does_not_wait_for_the_batch_deadline():
+    api, writes = _queue(max_delay=0.5)
+
+    start = time.perf_counter()
+    writes.put([f"predictions,symbol=AAPL predicted_close={i}.0 {i}" for i in range(6)], wait=True)
+    elapsed = time.perf_counter() - start
+
+    assert len(api.lines) == 6
+    assert elapsed < 0.25
+    writes.close()
+
+
+def test_put_with_wait_flushes_lines_already_queued():
+    api, writes = _queue(max_delay=0.5)
+
+    writes.put(["predictions,symbol=MSFT predicted_close=1.0 1"])
+    writes.put(["predictions,symbol=AAPL predicted_close=2.0 2"], wait=True)
+
+    assert sorted(api.lines) == ["predictions,symbol=AAPL predicted_close=2.0 2",
+                                 "predictions,symbol=MSFT predicted_close=1.0 1"]
+    writes.close()
+
+
+def test_put_without_wait_groups_writes_until_the_deadline():
+    api, writes = _queue(max_delay=0.2)
+
+    for i in range(5):
+        writes.put([f"predictions,symbol=AAPL predicted_close={i}.0 {i}"])
+    assert api.records == []
+
+    writes.flush()
+    assert len(api.records) == 1 and len(api.lines) == 5
+    writes.close()
@@ -0,0 +1,90 @@
+# backend/tests/test_ingestion.py
+import asyncio
+
+import pandas as pd
+import pytest
+
+import fetch_api
+import ingestion
+from benchmarks.fakes import synthetic_prices
+from influxdb_client_local import flush_writes, get_close_from_influx, write_market_dataframe
+
+
+@pytest.fixture
+def checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestion, "CHECKPOINT_FILE", str(tmp_path / "checkpoint.json"))
+
+
+def _store(symbol, df):
+    write_market_dataframe(symbol, df)
+    flush_writes()
+
+
+def test_refresh_merges_naive_api_bars_into_stored_utc_series(storage, checkpoint, monkeypatch):
+    # Barres stockées suffisantes mais en retard: le run du soir doit les compléter
+    full = synthetic_prices("AAPL", days=60)
+    _store("AAPL", full.iloc[:-10])
+    monkeypatch.setattr(fetch_api, "fetch_from_api", lambda symbol, acquire=None: full.iloc[-30:])
+
+    days = asyncio.run(ingestion.ingest_markets(["AAPL"], min_days=30, resume=False, refresh=True))
+
+    assert days == {"AAPL": 60}
+    stored = storage.read_series("AAPL", lookback_days=1000)
+    assert len(stored) == 60
+    assert stored.index.max() == full.index.max().tz_localize("UTC")
+
+
+def test_failing_symbol_does_not_abort_the_others(storage, checkpoint, monkeypatch):
+    full = synthetic_prices("AAPL", days=60)
+    for symbol in ("AAPL", "MSFT"):
+        _store(symbol, full.iloc[:-10])
+
+    def fetch(symbol, acquire=None):
+        if symbol == "MSFT":
+            raise RuntimeError("réponse invalide")
+        return full.iloc[-30:]
+
+    monkeypatch.setattr(fetch_api, "fetch_from_api", fetch)
+    errors = {}
+    days = asyncio.run(ingestion.ingest_markets(["AAPL", "MSFT"], min_days=30, resume=False,
+                                                refresh=True, errors=errors))
+
+    assert days["AAPL"] == 60
+    assert errors == {"MSFT": "RuntimeError: réponse invalide"}
+    assert "MSFT" not in ingestion.load_checkpoint()["refreshed"]
+
+
+def test_merge_and_store_returns_a_utc_index_without_existing_bars(storage):
+    fetched = synthetic_prices("AAPL", days=40)
+
+    combined = fetch_api.merge_and_store("AAPL", pd.DataFrame(), fetched, min_days=30)
+
+    assert str(combined.index.tz) == "UTC"
+    assert len(get_close_from_influx("AAPL", lookback_days=1000)) == 40
+
+
+def test_up_to_date_symbol_is_not_read_again(storage, checkpoint, monkeypatch):
+    # Barres jusqu'à la dernière séance close, historique complet au passage précédent
+    full = synthetic_prices("AAPL", days=60)
+    _store("AAPL", full)
+    asyncio.run(ingestion.ingest_markets(["AAPL"], min_days=30, resume=False, refresh=True))
+
+    def load_existing(symbol, min_days=30):
+        raise AssertionError("lecture de l'historique inutile")
+
+    monkeypatch.setattr(fetch_api, "load_existing", load_existing)
+    monkeypatch.setattr(fetch_api, "fetch_from_api", load_existing)
+    days = asyncio.run(ingestion.ingest_markets(["AAPL"], min_days=30, resume=False, refresh=True))
+
+    assert days == {"AAPL": 60}
+
+
+def test_symbol_behind_the_last_session_is_still_refreshed(storage, checkpoint, monkeypatch):
+    full = synthetic_prices("AAPL", days=60)
+    _store("AAPL", full.iloc[:-5])
+    asyncio.run(ingestion.ingest_markets(["AAPL"], min_days=30, resume=False))
+    monkeypatch.setattr(fetch_api, "fetch_from_api", lambda symbol, acquire=None: full.iloc[-30:])
+
+    days = asyncio.run(ingestion.ingest_markets(["AAPL"], min_days=30, resume=False, refresh=True))
+
+    assert days == {"AAPL": 60}
@@ -0,0 +1,54 @@
+# backend/tests/test_local_cache.py
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import local_cache
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_cache, "CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _closes(days):
+    index = pd.date_range(end=pd.Timestamp.now(tz="UTC").normalize() - pd.Timedelta(days=1), periods=days,
+                          freq="D", name="date")
+    return pd.DataFrame({"close": np.arange(days, dtype=float) + 100}, index=index)
+
+
+def test_series_is_served_only_within_its_coverage(cache_dir):
+    local_cache.write_closes("AAPL", _closes(10), lookback_days=10)
+
+    assert 0 < len(local_cache.read_closes("AAPL", lookback_days=5)) < 10
+    assert local_cache.read_closes("AAPL", lookback_days=100) is None
+
+
+def test_coverage_is_replaced_with_the_series(cache_dir):
+    local_cache.write_closes("AAPL", _closes(90), lookback_days=100)
+    local_cache.write_closes("AAPL", _closes(10), lookback_days=10)
+
+    # Une seule lecture de fichier: la courte série ne passe pas pour 100 jours
+    assert local_cache.read_closes("AAPL", lookback_days=100) is None
+    assert sorted(os.listdir(cache_dir / "closes")) == ["AAPL.npy"]
+
+
+def test_merge_keeps_the_coverage(cache_dir):
+    local_cache.write_closes("AAPL", _closes(10), lookback_days=10)
+    latest = _closes(1)
+    latest.index = latest.index + pd.Timedelta(days=1)
+    local_cache.merge_closes("AAPL", latest)
+
+    series = local_cache.read_closes("AAPL", lookback_days=5)
+    assert series.index.max() == latest.index.max()
+    assert local_cache.read_closes("AAPL", lookback_days=100) is None
+
+
+def test_file_without_coverage_header_is_a_miss(cache_dir):
+    # Ancien format (couverture dans un fichier .start séparé)
+    local_cache._save(local_cache._closes_path("AAPL"), local_cache._to_records(_closes(10)))
+
+    assert local_cache.read_closes("AAPL", lookback_days=5) is None
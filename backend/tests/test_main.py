@@ -0,0 +1,68 @@
+# backend/tests/test_main.py
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+import main
+
+
+def _get(path, **headers):
+    async def request():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, headers=headers)
+    return asyncio.run(request())
+
+
+def test_overview_is_gzipped_for_clients_that_accept_it(storage):
+    response = _get("/markets/overview", **{"accept-encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["markets"]
+
+
+def test_profile_is_attached_to_a_gzipped_json_response(storage):
+    response = _get("/markets/overview?profile=1", **{"accept-encoding": "gzip"})
+
+    body = response.json()
+    assert "_profile" in body and body["markets"]
+    assert "etag" not in response.headers
+    assert response.headers["x-trace-id"]
+
+
+def test_stream_computations_run_on_the_bounded_pool(monkeypatch):
+    running, peak, calls = [0], [0], []
+    lock = threading.Lock()
+
+    def predict(symbol):
+        with lock:
+            calls.append(symbol)
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return {"symbol": symbol}
+
+    monkeypatch.setattr(main, "predict_close", predict)
+    symbols = [f"SYM{i}" for i in range(12)]
+
+    async def trigger():
+        loop = asyncio.get_running_loop()
+        pool = ThreadPoolExecutor(max_workers=2)
+        loop.set_default_executor(pool)
+        for symbol in symbols + symbols:   # deux abonnés, mêmes symboles
+            main._compute_for_stream(symbol)
+        while main._computing:
+            await asyncio.sleep(0.01)
+        pool.shutdown()
+
+    before = threading.active_count()
+    asyncio.run(trigger())
+
+    assert sorted(calls) == sorted(symbols)
+    assert peak[0] <= 2
+    assert threading.active_count() <= before
@@ -0,0 +1,25 @@
+# backend/tests/test_metrics.py
+from metrics import KNOWN_SYMBOLS, Histogram, Registry
+
+
+def _histogram():
+    return Registry().register(Histogram("predict_seconds", "test", labels=("symbol", "cache"),
+                                         buckets=(0.1,), allowed={"symbol": {"AAPL"}}))
+
+
+def test_unknown_symbols_are_folded_into_other():
+    histogram = _histogram()
+    for symbol in ("AAPL", "ZZZ1", "ZZZ2", "ZZZ3"):
+        histogram.observe(0.05, symbol=symbol, cache="miss")
+
+    lines = histogram.render()
+
+    assert 'predict_seconds_count{symbol="AAPL",cache="miss"} 1' in lines
+    assert 'predict_seconds_count{symbol="other",cache="miss"} 3' in lines
+    assert not any("ZZZ" in line for line in lines)
+
+
+def test_supported_markets_are_known_symbols():
+    import main
+
+    assert KNOWN_SYMBOLS == {m["symbol"] for m in main.SUPPORTED_MARKETS}
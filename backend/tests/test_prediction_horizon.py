@@ -0,0 +1,44 @@
+# backend/tests/test_prediction_horizon.py
+import pandas as pd
+
+from arima.predict_arima import horizon_dates, todays_horizon
+from influxdb_client_local import get_prediction_horizon, write_predictions_to_influx
+
+TODAY = pd.Timestamp.now().normalize()
+
+
+def _write(run_day, values, symbol="AAPL"):
+    write_predictions_to_influx(symbol, horizon_dates(run_day), values, model="ARIMA",
+                                run_date=run_day.date().isoformat())
+
+
+def test_horizon_written_today_is_reused(storage):
+    _write(TODAY, [100.0, 101.0, 102.0, 103.0, 104.0, 105.0])
+
+    run = todays_horizon(get_prediction_horizon("AAPL", start=TODAY, days=6), TODAY)
+
+    assert run is not None
+    assert run["predicted_close"].tolist() == [100.0, 101.0, 102.0, 103.0, 104.0, 105.0]
+
+
+def test_yesterdays_points_for_today_are_not_a_recent_prediction(storage):
+    # Le run d'hier couvre aujourd'hui (J+1) à J+4: pas une prédiction du jour
+    _write(TODAY - pd.Timedelta(days=1), [99.0, 100.0, 101.0, 102.0, 103.0, 104.0])
+
+    horizon = get_prediction_horizon("AAPL", start=TODAY, days=6)
+
+    assert TODAY in horizon.index
+    assert todays_horizon(horizon, TODAY) is None
+
+
+def test_partial_rewrite_mixing_runs_is_not_reused(storage):
+    _write(TODAY - pd.Timedelta(days=1), [99.0, 100.0, 101.0, 102.0, 103.0, 104.0])
+    write_predictions_to_influx("AAPL", [TODAY], [100.5], run_date=TODAY.date().isoformat())
+
+    assert todays_horizon(get_prediction_horizon("AAPL", start=TODAY, days=6), TODAY) is None
+
+
+def test_points_without_run_date_are_not_reused(storage):
+    write_predictions_to_influx("AAPL", horizon_dates(TODAY), [100.0] * 6)
+
+    assert todays_horizon(get_prediction_horizon("AAPL", start=TODAY, days=6), TODAY) is None
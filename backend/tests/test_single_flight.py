@@ -0,0 +1,93 @@
+# backend/tests/test_single_flight.py
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import single_flight
+from single_flight import SingleFlight, symbol_file_lock
+
+
+@pytest.fixture
+def lock_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(single_flight, "LOCK_DIR", str(tmp_path))
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return {"value": 42}
+
+    with ThreadPoolExecutor(4) as pool:
+        leader = pool.submit(flight.do, "AAPL", compute)
+        started.wait(2)
+        followers = [pool.submit(flight.do, "AAPL", compute) for _ in range(3)]
+        while flight.followers < 3:
+            time.sleep(0.01)
+        release.set()
+        results = [f.result(2) for f in [leader, *followers]]
+
+    assert calls == [1]
+    assert all(r is results[0] for r in results)
+    assert flight.in_flight() == []
+
+
+def test_followers_receive_the_leader_exception_and_the_key_is_released():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(2)
+        raise ValueError("fit impossible")
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flight.do, "AAPL", fail)
+        started.wait(2)
+        follower = pool.submit(flight.do, "AAPL", fail)
+        while flight.followers < 1:
+            time.sleep(0.01)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result(2)
+
+    assert flight.do("AAPL", lambda: "ok") == "ok"
+
+
+def _hold(symbol, timeout, acquired):
+    with symbol_file_lock(symbol, timeout=timeout):
+        acquired.set()
+
+
+@pytest.mark.skipif(single_flight.fcntl is None, reason="verrou fichier POSIX")
+def test_file_lock_excludes_other_holders_until_released(lock_dir):
+    acquired = threading.Event()
+    worker = threading.Thread(target=_hold, args=("aapl", 5, acquired))
+    with symbol_file_lock("AAPL"):
+        worker.start()
+        assert not acquired.wait(0.2)
+    assert acquired.wait(2)
+    worker.join()
+
+
+@pytest.mark.skipif(single_flight.fcntl is None, reason="verrou fichier POSIX")
+def test_file_lock_gives_up_after_timeout(lock_dir):
+    # Mieux vaut un calcul dupliqué qu'une requête bloquée
+    acquired = threading.Event()
+    with symbol_file_lock("AAPL"):
+        start = time.perf_counter()
+        worker = threading.Thread(target=_hold, args=("AAPL", 0.1, acquired))
+        worker.start()
+        worker.join(2)
+        elapsed = time.perf_counter() - start
+
+    assert acquired.is_set()
+    assert 0.1 <= elapsed < 1
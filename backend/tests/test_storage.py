@@ -0,0 +1,26 @@
+# backend/tests/test_storage.py
+import pandas as pd
+import pytest
+
+from storage import StorageBackend
+
+
+def test_incomplete_backend_fails_at_instantiation():
+    class ReadOnly(StorageBackend):
+        def read_series(self, symbol, lookback_days=100, fields=("close",), measurement="stock_prices"):
+            return pd.DataFrame()
+
+    with pytest.raises(TypeError, match="abstract"):
+        ReadOnly()
+
+
+def test_sqlite_reads_the_table_of_the_requested_measurement(storage):
+    today = pd.Timestamp.now().normalize()
+    storage.write_predictions("AAPL", [today], [101.5])
+
+    predictions = storage.read_series("AAPL", fields=("predicted_close",), measurement="predictions")
+
+    assert predictions["predicted_close"].tolist() == [101.5]
+    assert storage.read_series("AAPL").empty
+    with pytest.raises(ValueError):
+        storage.read_series("AAPL", measurement="volumes")
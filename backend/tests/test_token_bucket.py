@@ -0,0 +1,43 @@
+# backend/tests/test_token_bucket.py
+import time
+import asyncio
+
+import pytest
+
+from ingestion import QuotaExceeded, TokenBucket
+
+
+def test_burst_up_to_capacity_then_waits_for_a_token():
+    async def run():
+        bucket = TokenBucket(per_minute=600, per_day=1000)   # 10 jetons/s
+        start = time.perf_counter()
+        for _ in range(600):
+            await bucket.acquire()
+        burst = time.perf_counter() - start
+        await bucket.acquire()
+        return burst, time.perf_counter() - start - burst
+
+    burst, wait = asyncio.run(run())
+
+    assert burst < 0.05
+    assert 0.05 < wait < 0.5
+
+
+def test_daily_quota_includes_calls_from_the_checkpoint():
+    async def run():
+        bucket = TokenBucket(per_minute=5, per_day=3, used_today=2)
+        await bucket.acquire()
+        with pytest.raises(QuotaExceeded):
+            await bucket.acquire()
+        return bucket.used_today
+
+    assert asyncio.run(run()) == 3
+
+
+def test_concurrent_callers_share_the_bucket():
+    async def run():
+        bucket = TokenBucket(per_minute=600, per_day=10)
+        results = await asyncio.gather(*(bucket.acquire() for _ in range(12)), return_exceptions=True)
+        return bucket.used_today, sum(isinstance(r, QuotaExceeded) for r in results)
+
+    assert asyncio.run(run()) == (10, 2)
@@ -0,0 +1,204 @@
+# backend/tracing.py
+import os
+import sys
+import time
+import uuid
+import threading
+import functools
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+
+from metrics import registry, Histogram
+
+# Profilage par requête (en-tête X-Profile ou ?profile=), désactivé par défaut
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0") == "1"
+PROFILE_DIR = os.path.join(os.path.dirname(__file__), "profiles")
+SAMPLE_INTERVAL = 0.005         # secondes entre deux échantillons de pile
+
+# Toujours actif: durée de chaque span, avec ou sans trace en cours
+SPAN_SECONDS = registry.register(Histogram(
+    "span_seconds", "Durée des sections annotées (tracing.span)",
+    labels=("span",)))
+
+_current_trace = contextvars.ContextVar("trace", default=None)
+_current_span = contextvars.ContextVar("span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start", "wall", "cpu", "thread", "children")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.wall = None
+        self.cpu = None
+        self.thread = threading.get_ident()
+        self.children = []
+
+    def to_dict(self, origin):
+        node = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "wall_ms": round(self.wall * 1000, 3) if self.wall is not None else None,
+            "cpu_ms": round(self.cpu * 1000, 3) if self.cpu is not None else None,
+        }
+        if self.attrs:
+            node["attrs"] = self.attrs
+        if self.children:
+            node["children"] = [child.to_dict(origin) for child in self.children]
+        return node
+
+
+class Trace:
+    """Arbre de spans d'une requête profilée (+ échantillonnage de piles optionnel)"""
+
+    def __init__(self, name, sample=False):
+        self.id = uuid.uuid4().hex[:16]
+        self.root = Span(name, {})
+        self.threads = {self.root.thread}
+        self._lock = threading.Lock()
+        self.sampler = StackSampler(self) if sample else None
+
+    def add_child(self, parent, span):
+        with self._lock:
+            parent.children.append(span)
+            self.threads.add(span.thread)
+
+    def to_dict(self):
+        profile = {"trace_id": self.id, "spans": self.root.to_dict(self.root.start)}
+        if self.sampler is not None:
+            profile["samples"] = self.sampler.summary()
+        return profile
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Annote une section chaude: with span("influx.query", query="series"): ...
+
+    Hors requête profilée: une mesure de durée (métrique span_seconds).
+    Dans une requête profilée: nœud de l'arbre avec temps mur et CPU du thread.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        start = time.perf_counter()
+        try:
+            yield None
+        finally:
+            SPAN_SECONDS.observe(time.perf_counter() - start, span=name)
+        return
+
+    parent = _current_span.get() or trace.root
+    node = Span(name, attrs)
+    trace.add_child(parent, node)
+    token = _current_span.set(node)
+    cpu_start = time.thread_time()
+    try:
+        yield node
+    finally:
+        node.wall = time.perf_counter() - node.start
+        node.cpu = time.thread_time() - cpu_start
+        _current_span.reset(token)
+        SPAN_SECONDS.observe(node.wall, span=name)
+
+
+def traced(name=None):
+    """Décorateur: toute la fonction dans un span"""
+    def decorator(fn):
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def start_trace(name, sample=False):
+    """Trace de la requête courante (propagée aux threads via contextvars)"""
+    trace = Trace(name, sample=sample)
+    token = _current_trace.set(trace)
+    span_token = _current_span.set(trace.root)
+    cpu_start = time.thread_time()
+    if trace.sampler is not None:
+        trace.sampler.start()
+    try:
+        yield trace
+    finally:
+        if trace.sampler is not None:
+            trace.sampler.stop()
+        trace.root.wall = time.perf_counter() - trace.root.start
+        trace.root.cpu = time.thread_time() - cpu_start
+        _current_span.reset(span_token)
+        _current_trace.reset(token)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+class StackSampler:
+    """
+    Échantillonneur de piles (thread dédié, toutes les SAMPLE_INTERVAL s)
+
+    Seuls les threads ayant ouvert un span de la trace sont échantillonnés.
+    Résultat au format "folded stacks" (flamegraph.pl, speedscope).
+    """
+
+    def __init__(self, trace, interval=SAMPLE_INTERVAL):
+        self.trace = trace
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in list(self.trace.threads):
+                frame = frames.get(ident)
+                if frame is None or ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def summary(self, top=15):
+        """Fonctions les plus présentes en haut de pile + fichier folded"""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{self.trace.id}.folded")
+        self.dump(path)
+
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return {
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "folded_file": path,
+            "top_self": [{"frame": frame, "samples": n} for frame, n in leaves.most_common(top)],
+        }
@@ -1,7 +1,9 @@
 import { useState, useEffect } from "react";
-import api from "../services/api";
+import api, { subscribeToMarkets } from "../services/api";
 import "../css/style.css";
 
+const OVERVIEW_REFRESH_MS = 5 * 60 * 1000; // durée de vie de l'instantané côté backend
+
 function MarketList() {
   const [markets, setMarkets] = useState([]);
   const [selectedMarket, setSelectedMarket] = useState("");
@@ -12,20 +14,42 @@ function MarketList() {
 
   const [theme, setTheme] = useState("dark");
 
-  // Charger les marchés
+  // Charger les marchés (vue d'ensemble: dernier close, variation, prédiction du jour)
+  // Rechargée toutes les OVERVIEW_REFRESH_MS, revalidée par ETag (304 si inchangée)
   useEffect(() => {
-    console.log("📥 Chargement des marchés...");
-    api.get("/markets")
-      .then(res => {
-        console.log("✅ Marchés chargés:", res.data.length);
-        setMarkets(res.data);
-      })
-      .catch(err => {
-        console.error("❌ Erreur chargement marchés:", err);
-        setError("Impossible de charger la liste des marchés");
-      });
+    const loadOverview = () => {
+      console.log("📥 Chargement des marchés...");
+      api.get("/markets/overview")
+        .then(res => {
+          console.log("✅ Marchés chargés:", res.data.markets.length);
+          setMarkets(res.data.markets);
+        })
+        .catch(err => {
+          console.error("❌ Erreur chargement marchés:", err);
+          setError("Impossible de charger la liste des marchés");
+        });
+    };
+
+    loadOverview();
+    const timer = setInterval(loadOverview, OVERVIEW_REFRESH_MS);
+    return () => clearInterval(timer);
   }, []);
 
+  // Mises à jour poussées pour le marché sélectionné (sans polling)
+  useEffect(() => {
+    if (!selectedMarket) return;
+
+    return subscribeToMarkets([selectedMarket], {
+      // Nouvelle prédiction (ex: ARIMA remplace la prévision rapide)
+      prediction: data => setPrediction(prev => (prev ? data : prev)),
+      bars: data => setMarketData(prev => prev && {
+        ...prev,
+        close: Math.round(data.last_close * 100) / 100,
+        last_updated: data.last_date.slice(0, 10)
+      })
+    });
+  }, [selectedMarket]);
+
   const handleSelectMarket = (symbol) => {
     console.log(`🎯 Marché sélectionné: ${symbol}`);
     setSelectedMarket(symbol);
@@ -184,6 +208,13 @@ function MarketList() {
     }
   };
 
+  const formatOverview = (market) => {
+    if (market.last_close === undefined || market.last_close === null) return "";
+    const change = market.change_percent === null ? "" :
+      ` ${market.change_percent >= 0 ? '+' : ''}${market.change_percent.toFixed(2)}%`;
+    return ` — ${formatPrice(market.last_close, market.symbol)}${change}`;
+  };
+
   const getMarketName = (symbol) => {
     const market = markets.find(m => m.symbol === symbol);
     return market ? market.name : symbol;
@@ -270,7 +301,7 @@ function MarketList() {
                 <option value="">Select a market...</option>
                 {markets.map((market) => (
                   <option key={market.symbol} value={market.symbol}>
-                    {market.name} ({market.symbol})
+                    {market.name} ({market.symbol}){formatOverview(market)}
                   </option>
                 ))}
               </select>
@@ -51,4 +51,21 @@ api.interceptors.response.use(
   }
 );
 
+// Flux SSE: prédictions, progression et nouvelles barres poussées par le backend
+// handlers: { prediction, progress, bars, error } → retourne une fonction de fermeture
+export const subscribeToMarkets = (symbols, handlers = {}, { compute = false } = {}) => {
+  const params = new URLSearchParams({ symbols: symbols.join(','), compute: String(compute) });
+  const source = new EventSource(`${API_BASE_URL}/stream?${params}`);
+
+  ['prediction', 'progress', 'bars', 'error'].forEach(event => {
+    source.addEventListener(event, e => {
+      if (!e.data) return; // erreur de connexion (EventSource se reconnecte seul)
+      const message = JSON.parse(e.data);
+      handlers[event]?.(message.data, message.symbol);
+    });
+  });
+
+  return () => source.close();
+};
+
 export default api;
\ No newline at end of file